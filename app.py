@@ -1,18 +1,41 @@
-from flask import Flask, request
+import hmac
+from flask import Flask, Response, request, stream_with_context
 from flask_cors import CORS
-from src.shaming.shaming import check_text_shaming, check_text_shaming_nopath
-
-from src.urgency.urgency import check_text_urgency
-from src.scarcity.scarcity import check_text_scarcity, check_text_scarcity_schema
-from src.urgency.types import UrgencyRequestSchema, UrgencyResponseSchema
-from src.scarcity.types import ScarcityRequestSchema, ScarcityResponseSchema
-from src.urgency.urgency import check_text_urgency_schema
-
-from src.shaming.my_types import ShamingSchema, ShamingResponse
+from marshmallow import ValidationError
+from src.analysis.handlers import handle_analyze, handle_incremental, handle_scarcity, handle_shaming, handle_urgency
+from src.analysis.incremental import SnapshotMismatchError
+from src.analysis.lifecycle import LIFECYCLE
+from src.analysis.cache import RESULT_CACHE
+from src.analysis.packs import PatternPackError, pack_versions, reload_packs, start_watcher
+from src.analysis.stream import read_lines, stream_results
+from config import ADMIN_TOKEN, MAX_REQUEST_BYTES, PATTERNS_WATCH_INTERVAL
 
 app = Flask(__name__)
 CORS(app)
 
+if PATTERNS_WATCH_INTERVAL > 0:
+    start_watcher(PATTERNS_WATCH_INTERVAL)
+
+# Precalienta el modelo según MODEL_WARMUP (ver src/analysis/lifecycle.py)
+LIFECYCLE.start()
+
+
+@app.get("/health")
+def health():
+    """
+    Liveness: el proceso está vivo y atiende solicitudes.
+    """
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness: 200 cuando terminó el precalentamiento; 503 mientras tanto
+    (o si falló).
+    """
+    return LIFECYCLE.status(), 200 if LIFECYCLE.ready() else 503
+
 @app.post("/scarcity")
 def detect_scarcity():
     """
@@ -58,8 +81,7 @@ def detect_scarcity():
     Retorna:
         dict: Diccionario serializado que indica para cada texto si se detecta escasez.
     """
-    json_data = ScarcityRequestSchema().load(request.get_json())
-    return check_text_scarcity_schema(json_data)
+    return handle_scarcity(request.get_json())
 
 
 
@@ -79,18 +101,7 @@ def detect_shaming():
     Returns:
         list o dict: Resultados del análisis de shaming, dependiendo de la versión del esquema recibido.
     """
-    json_data = request.get_json()
-    if json_data.get("Version", "0.1") != "0.2":
-        sentences = []
-        tokens = request.get_json().get("tokens")
-        for token in tokens:
-            sentences.extend(check_text_shaming(token["text"], token["path"]))
-        return sentences
-    else:
-        schema = ShamingSchema()
-        data = schema.load(json_data)
-        response_schema = ShamingResponse()
-        return response_schema.dump(check_text_shaming_nopath(data))
+    return handle_shaming(request.get_json())
 
 
 
@@ -137,6 +148,161 @@ def detect_urgency():
     Retorna:
         dict: Diccionario serializado que indica para cada texto si se detecta urgencia.
     """
-    json_data = UrgencyRequestSchema().load(request.get_json())
-    return check_text_urgency_schema(json_data)
+    return handle_urgency(request.get_json())
+
+
+@app.post("/analyze")
+def detect_all():
+    """
+    Detecta shaming, urgencia y escasez en una sola solicitud POST.
+
+    Cada texto se procesa una única vez con el modelo de spaCy y el mismo Doc
+    se evalúa con los tres detectores, evitando enviar los mismos textos a
+    `/shaming`, `/urgency` y `/scarcity` por separado.
+
+    JSON de entrada (ejemplo):
+    {
+        "version": "1.0",
+        "texts": [
+            {
+                "text": "Solo quedan 3 unidades!",
+                "path": "/producto/123",
+                "id": "a1"
+            }
+        ]
+    }
+
+    JSON de salida (ejemplo):
+    {
+        "version": "1.0",
+        "instances": [
+            {
+                "text": "Solo quedan 3 unidades!",
+                "path": "/producto/123",
+                "id": "a1",
+                "has_shaming": false,
+                "has_urgency": false,
+                "has_scarcity": true
+            }
+        ]
+    }
+
+    Retorna:
+        dict: Diccionario serializado con el resultado de cada detector por texto.
+    """
+    return handle_analyze(request.get_json())
+
+
+@app.post("/analyze/incremental")
+def detect_incremental():
+    """
+    Re-escaneo incremental de una página (ver src/analysis/incremental.py).
+
+    El servidor guarda por cliente (`session`) y `page` el hash y el
+    resultado de cada texto. Las
+    solicitudes siguientes envían solo los textos agregados o modificados
+    (`text`), referencias por `hash` a los que no cambiaron y los ids
+    eliminados (`removed`); la respuesta trae el resultado de `/analyze`
+    para toda la página, con el `hash` de cada texto.
+
+    JSON de entrada (ejemplo):
+    {
+        "version": "1.0",
+        "session": "9b2e4c7a-...",
+        "page": "https://tienda.com/listado",
+        "texts": [
+            {"id": "a7", "text": "Solo quedan 2 unidades!"}
+        ],
+        "removed": ["a3"]
+    }
 
+    Retorna:
+        dict: Respuesta de IncrementalResponseSchema, o 409 con los ids a
+            reenviar completos (`resend`) si el snapshot no tiene alguno de
+            los hashes referenciados, o 400 si trae más de
+            PAGE_SNAPSHOT_MAX_ITEMS textos.
+    """
+    try:
+        return handle_incremental(request.get_json())
+    except SnapshotMismatchError as e:
+        return {"error": str(e), "resend": e.ids}, 409
+    except ValidationError as e:
+        return {"error": e.messages}, 400
+
+
+@app.post("/<any(analyze, urgency, scarcity):name>/stream")
+def detect_stream(name):
+    """
+    Variante en streaming de `/analyze`, `/urgency` y `/scarcity` para páginas
+    muy largas (ver src/analysis/stream.py).
+
+    El cuerpo es NDJSON: una línea por texto, con el mismo formato que los
+    elementos de `texts` del endpoint correspondiente. La respuesta también
+    es NDJSON y se envía por lotes a medida que se procesan, con una línea
+    por texto en el mismo orden:
+
+    {"line": 0, "instance": {"text": "Solo quedan 3 unidades!", "has_shaming": false, ...}}
+    {"line": 1, "error": {"text": ["Missing data for required field."]}}
+
+    Retorna:
+        Response: Respuesta application/x-ndjson, o 413 si el cuerpo declara
+            más de MAX_REQUEST_BYTES bytes (los demás límites se informan en
+            la última línea de la respuesta; las líneas de más de
+            STREAM_MAX_LINE_BYTES bytes, en su propia línea con error).
+    """
+    if request.content_length is not None and request.content_length > MAX_REQUEST_BYTES:
+        return {"error": f"La solicitud tiene {request.content_length} bytes (máximo {MAX_REQUEST_BYTES})"}, 413
+    return Response(
+        stream_with_context(stream_results(name, read_lines(request.stream))),
+        mimetype="application/x-ndjson",
+    )
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Devuelve los contadores de la caché de resultados (aciertos, fallos,
+    tamaño actual y límites configurados).
+    """
+    return RESULT_CACHE.stats()
+
+
+def is_admin_request():
+    """
+    Verifica el header X-Admin-Token contra ADMIN_TOKEN. Si ADMIN_TOKEN no
+    está configurado, ninguna solicitud es de administración.
+    """
+    token = request.headers.get("X-Admin-Token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+@app.get("/admin/patterns")
+def patterns_versions():
+    """
+    Devuelve la versión de los paquetes de patrones cargados por detector.
+    """
+    if not is_admin_request():
+        return {"error": "No autorizado"}, 403
+    return pack_versions()
+
+
+@app.post("/admin/patterns/reload")
+def patterns_reload():
+    """
+    Vuelve a leer los paquetes de patrones (patterns/*.json), los valida y
+    compila, y los reemplaza sin reiniciar el servidor. Si alguno es
+    inválido responde 400 y se siguen usando los anteriores.
+
+    JSON de salida (ejemplo):
+    {
+        "urgency": "3f2a...",
+        "scarcity": "9b1c...",
+        "shaming": "c04e..."
+    }
+    """
+    if not is_admin_request():
+        return {"error": "No autorizado"}, 403
+    try:
+        return reload_packs()
+    except PatternPackError as e:
+        return {"error": str(e)}, 400
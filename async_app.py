@@ -0,0 +1,239 @@
+"""
+Variante asíncrona de ``app.py`` (aiohttp) con un pool acotado de procesos de NLP.
+
+    python async_app.py
+
+El proceso principal solo recibe las solicitudes, valida su tamaño y delega
+el análisis (spaCy, matchers y clasificador) en un pool de procesos creados
+con fork después de cargar el modelo, que comparten su memoria
+copy-on-write. Así una página enorme no bloquea el servidor y la latencia no
+crece sin límite ante picos de tráfico:
+
+- 413 si la solicitud supera MAX_REQUEST_TEXTS, MAX_REQUEST_CHARS o MAX_REQUEST_BYTES.
+- 503 si ya hay ASYNC_MAX_PENDING solicitudes en curso o en espera.
+- 429 si ya hay ASYNC_MAX_LARGE_PENDING solicitudes grandes (más de
+  ASYNC_SMALL_REQUEST_CHARS caracteres) en curso o en espera.
+
+Las solicitudes grandes usan a lo sumo ASYNC_POOL_WORKERS - ASYNC_RESERVED_WORKERS
+procesos a la vez; los restantes quedan libres para las chicas.
+
+Si un proceso del pool muere (por ejemplo, el sistema lo mata por falta de
+memoria con una página enorme), el pool entero queda inutilizable: las
+solicitudes en curso reciben 503 y se crea un pool nuevo, cuyos procesos
+precalientan el modelo antes de atender.
+"""
+
+import asyncio
+import gc
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from aiohttp import web
+from marshmallow import ValidationError
+
+from config import (
+    ASYNC_MAX_LARGE_PENDING,
+    ASYNC_MAX_PENDING,
+    ASYNC_POOL_WORKERS,
+    ASYNC_RESERVED_WORKERS,
+    ASYNC_SMALL_REQUEST_CHARS,
+    MAX_REQUEST_BYTES,
+    MAX_REQUEST_CHARS,
+    MAX_REQUEST_TEXTS,
+    MODEL_WARMUP,
+)
+from src.analysis.cache import RESULT_CACHE
+from src.analysis.handlers import request_size, run_handler
+from src.analysis.lifecycle import LIFECYCLE
+
+
+class Overloaded(Exception):
+    """
+    El pool no acepta más solicitudes o perdió un proceso; ``status`` es 503 o 429.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def warm_worker():
+    # Inicializador de los procesos de un pool recreado
+    if MODEL_WARMUP != "off":
+        LIFECYCLE.warm_up()
+
+
+class NLPPool:
+    """
+    Pool de procesos que ejecuta los handlers con control de cola.
+
+    Parámetros:
+        workers (int): Cantidad de procesos.
+        reserved (int): Procesos que no pueden ocupar las solicitudes grandes.
+        max_pending (int): Máximo de solicitudes en curso o en espera.
+        max_large_pending (int): Máximo de solicitudes grandes en curso o en espera.
+        small_chars (int): Caracteres a partir de los cuales una solicitud es grande.
+    """
+
+    def __init__(self, workers=ASYNC_POOL_WORKERS, reserved=ASYNC_RESERVED_WORKERS,
+                 max_pending=ASYNC_MAX_PENDING, max_large_pending=ASYNC_MAX_LARGE_PENDING,
+                 small_chars=ASYNC_SMALL_REQUEST_CHARS):
+        self.workers = workers
+        self.executor = self._create_executor()
+        self.restarts = 0
+        self.large_slots = asyncio.Semaphore(max(1, workers - reserved))
+        self.max_pending = max_pending
+        self.max_large_pending = max_large_pending
+        self.small_chars = small_chars
+        self.pending = 0
+        self.large_pending = 0
+
+    def _create_executor(self, initializer=None):
+        # fork: los procesos heredan el modelo ya cargado en lugar de volver a importarlo
+        return ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("fork"), initializer=initializer
+        )
+
+    def _restart(self, broken):
+        """
+        Reemplaza el pool ``broken`` por uno nuevo. Varias solicitudes pueden
+        fallar con el mismo pool roto: solo la primera lo reemplaza.
+        """
+        if self.executor is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.executor = self._create_executor(initializer=warm_worker)
+        self.restarts += 1
+
+    def stats(self):
+        return {"pending": self.pending, "large_pending": self.large_pending, "restarts": self.restarts}
+
+    async def _submit(self, name, json_data):
+        executor = self.executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, run_handler, name, json_data)
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise Overloaded(503, "Un proceso de análisis terminó inesperadamente, reintentar más tarde")
+
+    async def run(self, name, json_data, chars):
+        if self.pending >= self.max_pending:
+            raise Overloaded(503, "El servidor está saturado, reintentar más tarde")
+        large = chars > self.small_chars
+        if large and self.large_pending >= self.max_large_pending:
+            raise Overloaded(429, "Demasiadas solicitudes grandes en curso, reintentar más tarde")
+
+        self.pending += 1
+        self.large_pending += large
+        try:
+            if large:
+                async with self.large_slots:
+                    return await self._submit(name, json_data)
+            return await self._submit(name, json_data)
+        finally:
+            self.pending -= 1
+            self.large_pending -= large
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+NLP_POOL = web.AppKey("nlp_pool", NLPPool)
+
+
+def error(status, message, **headers):
+    return web.json_response({"error": message}, status=status, headers=headers)
+
+
+def detector_endpoint(name):
+    """
+    Crea el handler de aiohttp para el endpoint ``/<name>``: valida el
+    tamaño de la solicitud y ejecuta el análisis en el pool.
+    """
+    async def endpoint(request):
+        try:
+            json_data = await request.json()
+        except ValueError:
+            return error(400, "El cuerpo de la solicitud no es JSON válido")
+        texts, chars = request_size(json_data)
+        if texts > MAX_REQUEST_TEXTS or chars > MAX_REQUEST_CHARS:
+            return error(
+                413,
+                f"La solicitud tiene {texts} textos y {chars} caracteres "
+                f"(máximo {MAX_REQUEST_TEXTS} textos y {MAX_REQUEST_CHARS} caracteres)",
+            )
+        try:
+            response = await request.app[NLP_POOL].run(name, json_data, chars)
+        except Overloaded as e:
+            return error(e.status, str(e), **{"Retry-After": "1"})
+        except ValidationError as e:
+            return web.json_response({"error": e.messages}, status=400)
+        return web.json_response(response)
+
+    return endpoint
+
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+}
+
+
+@web.middleware
+async def cors(request, handler):
+    """
+    Mismo comportamiento que ``CORS(app)`` en app.py: cualquier origen puede
+    llamar a la API (la usa la extensión del navegador).
+    """
+    if request.method == "OPTIONS":
+        return web.Response(headers=CORS_HEADERS)
+    response = await handler(request)
+    response.headers.update(CORS_HEADERS)
+    return response
+
+
+async def cache_stats(request):
+    # Cada proceso del pool tiene su propia caché en memoria: este endpoint
+    # solo es representativo con un backend compartido (sqlite o redis)
+    return web.json_response({**RESULT_CACHE.stats(), "pool": request.app[NLP_POOL].stats()})
+
+
+async def health(request):
+    return web.json_response({"status": "ok"})
+
+
+async def ready(request):
+    return web.json_response(LIFECYCLE.status(), status=200 if LIFECYCLE.ready() else 503)
+
+
+async def start_pool(app):
+    # Se precalienta antes del fork para que los procesos del pool nazcan
+    # listos ("background" no aplica: el pool se crea recién después)
+    LIFECYCLE.start("off" if MODEL_WARMUP == "off" else "sync")
+    # El modelo ya está cargado: se congela antes del fork para compartirlo
+    gc.collect()
+    gc.freeze()
+    app[NLP_POOL] = NLPPool()
+
+
+async def stop_pool(app):
+    app[NLP_POOL].shutdown()
+
+
+def create_app():
+    app = web.Application(client_max_size=MAX_REQUEST_BYTES, middlewares=[cors])
+    for name in ("scarcity", "shaming", "urgency", "analyze"):
+        app.router.add_post(f"/{name}", detector_endpoint(name))
+    app.router.add_get("/cache/stats", cache_stats)
+    app.router.add_get("/health", health)
+    app.router.add_get("/ready", ready)
+    app.on_startup.append(start_pool)
+    app.on_cleanup.append(stop_pool)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host="0.0.0.0", port=int(os.environ.get("PORT", "5000")))
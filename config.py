@@ -1,8 +1,124 @@
+import os
 import spacy
 
+# Directorio del proyecto: las rutas por defecto no dependen del directorio de trabajo
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modelo de spaCy usado por los detectores y para entrenar el clasificador de shaming
+SPACY_MODEL = os.environ.get("SPACY_MODEL", "es_core_news_lg")
+
 try:
-    NLP = spacy.load("es_core_news_lg") # O "es_core_news_lg" para más robustez
-except OSError:
-    print("Descargando modelo 'es_core_news_lg'. Esto puede tardar un poco...")
-    spacy.cli.download("es_core_news_lg")
-    NLP = spacy.load("es_core_news_lg")
\ No newline at end of file
+    # NER no es usado por ningún detector: se excluye para ahorrar memoria y CPU
+    NLP = spacy.load(SPACY_MODEL, exclude=["ner"])
+except OSError as e:
+    # El modelo se instala con requirements.txt (o en la imagen de Docker); no
+    # se descarga desde un proceso que atiende solicitudes
+    raise RuntimeError(
+        f"No se encontró el modelo de spaCy '{SPACY_MODEL}'. "
+        f"Instalarlo con 'pip install -r requirements.txt' o 'python -m spacy download {SPACY_MODEL}'."
+    ) from e
+
+# El senter viene deshabilitado en el modelo. Se habilita para que los
+# detectores que solo necesitan límites de oración no tengan que correr el parser.
+if "senter" in NLP.disabled:
+    NLP.enable_pipe("senter")
+
+# Precalentamiento al arrancar (ver src/analysis/lifecycle.py): "sync" lo hace
+# antes de atender solicitudes (con gunicorn, en el maestro antes del fork),
+# "background" en un hilo mientras /ready responde 503 y "off" no lo hace
+MODEL_WARMUP = os.environ.get("MODEL_WARMUP", "sync")
+# gunicorn.conf.py lo define en 1: con "background" el hilo de precalentamiento
+# se crea en cada worker (hook post_fork) y no en el maestro antes del fork
+MODEL_WARMUP_IN_WORKERS = os.environ.get("MODEL_WARMUP_IN_WORKERS", "0") == "1"
+
+# Cantidad de textos que NLP.pipe procesa por lote
+NLP_BATCH_SIZE = int(os.environ.get("NLP_BATCH_SIZE", "64"))
+# Procesos que usa NLP.pipe (n_process) en las solicitudes con al menos
+# NLP_MULTIPROCESS_THRESHOLD textos a procesar; por debajo se usa un solo proceso
+NLP_N_PROCESS = int(os.environ.get("NLP_N_PROCESS", "1"))
+NLP_MULTIPROCESS_THRESHOLD = int(os.environ.get("NLP_MULTIPROCESS_THRESHOLD", "2000"))
+# Micro-lotes entre solicitudes concurrentes del mismo proceso (ver
+# src/analysis/microbatch.py): milisegundos que se esperan a otras
+# solicitudes (0 = desactivado) y cantidad de textos que cierra el lote.
+# Las solicitudes con MICROBATCH_MAX_TEXTS textos o más no se agrupan.
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get("MICROBATCH_MAX_WAIT_MS", "0"))
+MICROBATCH_MAX_TEXTS = int(os.environ.get("MICROBATCH_MAX_TEXTS", "256"))
+
+# Caché de resultados por texto: cantidad máxima de entradas (0 la desactiva)
+# y segundos de vida de cada entrada (0 = sin expiración)
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "50000"))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "0"))
+# Dónde se guarda la caché: "memory" (por proceso), "sqlite" (archivo local
+# compartido entre workers) o "redis" (servidor compartido por la flota).
+# RESULT_CACHE_URL es la ruta del archivo SQLite o la URL de Redis.
+RESULT_CACHE_BACKEND = os.environ.get("RESULT_CACHE_BACKEND", "memory")
+RESULT_CACHE_URL = os.environ.get("RESULT_CACHE_URL", "")
+
+# Snapshots de páginas para los re-escaneos incrementales (/analyze/incremental):
+# cantidad máxima de snapshots guardados (uno por cliente y página) y segundos
+# de vida de cada uno (0 = sin expiración). Usan el mismo RESULT_CACHE_BACKEND
+# que la caché de resultados.
+PAGE_SNAPSHOT_MAX_PAGES = int(os.environ.get("PAGE_SNAPSHOT_MAX_PAGES", "1000"))
+PAGE_SNAPSHOT_TTL = float(os.environ.get("PAGE_SNAPSHOT_TTL", "3600"))
+# Cantidad máxima de textos por página: al superarla se descartan los ids más
+# viejos (los enviados primero); una solicitud no puede traer más textos que esto
+PAGE_SNAPSHOT_MAX_ITEMS = int(os.environ.get("PAGE_SNAPSHOT_MAX_ITEMS", "2000"))
+
+# Paquete versionado del clasificador de shaming (ver src/shaming/bundle.py).
+# Si no existe se usa el modelo lineal heredado, sin metadatos para validar.
+SHAMING_MODEL_PATH = os.environ.get("SHAMING_MODEL_PATH", os.path.join(BASE_DIR, "shaming_model.npz"))
+SHAMING_LEGACY_MODEL_PATH = os.path.join(BASE_DIR, "shaming_linear.npy")
+# 1 = el servidor no arranca sin el paquete versionado (el modelo heredado fue
+# entrenado con los vectores de es_core_news_md, no con los del modelo que se sirve)
+SHAMING_REQUIRE_BUNDLE = os.environ.get("SHAMING_REQUIRE_BUNDLE", "0") == "1"
+
+# Confianza a partir de la cual el detector de shaming deja de evaluar las
+# demás oraciones candidatas de un texto (0 = evaluarlas todas)
+SHAMING_EARLY_EXIT = float(os.environ.get("SHAMING_EARLY_EXIT", "0"))
+
+# Confianza mínima para marcar shaming cuando la oración contiene términos
+# del léxico negativo (src/shaming/patterns.py) aunque el clasificador no lo prediga.
+# La confianza está calibrada (Platt): si un término negativo multiplica las
+# chances de shaming por una razón de verosimilitud LR, el umbral equivalente
+# es 1 / (1 + LR). En shaming_dataset.csv el léxico aparece en 14 de 67
+# oraciones con shaming y en 1 de 63 sin shaming (LR ≈ 13, ≈ 7 con suavizado
+# de Laplace, umbral ≈ 0.12). 0.35 supone solo LR ≈ 1.9: es conservador porque
+# el dataset es chico y el léxico se armó a partir de los mismos ejemplos
+# (ver test_shaming_model.py).
+SHAMING_NEGATIVE_TERMS_THRESHOLD = float(os.environ.get("SHAMING_NEGATIVE_TERMS_THRESHOLD", "0.35"))
+
+# Directorio con los paquetes de patrones (urgency.json, scarcity.json, shaming.json)
+PATTERNS_DIR = os.environ.get("PATTERNS_DIR", os.path.join(BASE_DIR, "patterns"))
+# Cada cuántos segundos se revisa si cambiaron los archivos de patrones (0 = no se revisa)
+PATTERNS_WATCH_INTERVAL = float(os.environ.get("PATTERNS_WATCH_INTERVAL", "0"))
+# gunicorn.conf.py lo define en 1: el hilo que revisa los archivos se crea en
+# cada worker (hook post_fork) y no en el maestro antes del fork
+PATTERNS_WATCH_IN_WORKERS = os.environ.get("PATTERNS_WATCH_IN_WORKERS", "0") == "1"
+# Artefacto con las reglas de los paquetes ya expandidas y validadas, generado con
+# `python -m src.analysis.artifacts` (si está vacío, los paquetes siempre se compilan)
+COMPILED_PATTERNS_PATH = os.environ.get("COMPILED_PATTERNS_PATH", os.path.join(BASE_DIR, "compiled_patterns.msgpack"))
+# Token requerido por los endpoints /admin (si está vacío, esos endpoints quedan deshabilitados)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+# Prefiltro léxico de urgencia y escasez (1 = activado): descarta sin pasar por
+# spaCy los textos que no pueden coincidir con ningún patrón
+PREFILTER_ENABLED = os.environ.get("PREFILTER_ENABLED", "1") == "1"
+
+# Servidor asíncrono (async_app.py)
+# Procesos del pool que ejecutan los detectores
+ASYNC_POOL_WORKERS = int(os.environ.get("ASYNC_POOL_WORKERS", os.cpu_count() or 1))
+# Procesos del pool que nunca ocupan las solicitudes grandes, para que las chicas no esperen
+ASYNC_RESERVED_WORKERS = int(os.environ.get("ASYNC_RESERVED_WORKERS", "1"))
+# Una solicitud con más caracteres de texto que este valor se considera grande
+ASYNC_SMALL_REQUEST_CHARS = int(os.environ.get("ASYNC_SMALL_REQUEST_CHARS", "20000"))
+# Solicitudes en curso o en espera a partir de las cuales se responde 503
+ASYNC_MAX_PENDING = int(os.environ.get("ASYNC_MAX_PENDING", "64"))
+# Solicitudes grandes en curso o en espera a partir de las cuales se responde 429
+ASYNC_MAX_LARGE_PENDING = int(os.environ.get("ASYNC_MAX_LARGE_PENDING", "8"))
+# Límites por solicitud (413 si se superan)
+MAX_REQUEST_TEXTS = int(os.environ.get("MAX_REQUEST_TEXTS", "5000"))
+MAX_REQUEST_CHARS = int(os.environ.get("MAX_REQUEST_CHARS", "1000000"))
+MAX_REQUEST_BYTES = int(os.environ.get("MAX_REQUEST_BYTES", str(16 * 1024 * 1024)))
+# Bytes máximos de cada línea en los endpoints NDJSON (/<endpoint>/stream): una
+# línea más larga no se guarda entera en memoria y se responde con error
+STREAM_MAX_LINE_BYTES = int(os.environ.get("STREAM_MAX_LINE_BYTES", str(1024 * 1024)))
@@ -0,0 +1,57 @@
+"""
+Configuración de gunicorn para producción.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Con ``preload_app`` el proceso maestro importa ``app`` una sola vez (modelo de
+spaCy, matchers de los paquetes de patrones y clasificador de shaming) y
+recién después crea los workers con fork, que comparten esa memoria
+copy-on-write en lugar de cargar cada uno su copia de los vectores. Antes del
+fork se ejecuta ``gc.freeze()`` para que el recolector de basura de los
+workers no recorra (y por lo tanto no copie) los objetos ya cargados.
+
+Con ``MODEL_WARMUP=background`` el maestro no precalienta: cada worker lo
+hace en su propio hilo, creado en ``post_fork`` (un fork con el hilo en
+curso podría dejar locks tomados en los workers). Por la misma razón, con
+``PATTERNS_WATCH_INTERVAL`` cada worker crea su hilo de recarga de patrones
+en ``post_fork``.
+
+Variables de entorno:
+    GUNICORN_BIND (por defecto 0.0.0.0:5000)
+    GUNICORN_WORKERS (por defecto la cantidad de CPUs)
+    GUNICORN_THREADS (por defecto 1): hilos por worker.
+    GUNICORN_TIMEOUT (por defecto 120): segundos antes de reiniciar un worker colgado.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", "1"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+accesslog = "-"
+
+# Se leen al importar la app en el maestro (ver config.MODEL_WARMUP_IN_WORKERS
+# y config.PATTERNS_WATCH_IN_WORKERS)
+os.environ["MODEL_WARMUP_IN_WORKERS"] = "1"
+os.environ["PATTERNS_WATCH_IN_WORKERS"] = "1"
+
+
+def when_ready(server):
+    # Se ejecuta en el maestro con la app ya cargada y antes de crear los workers
+    gc.collect()
+    gc.freeze()
+    server.log.info("Modelo cargado; %s objetos congelados para los workers", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    # Con MODEL_WARMUP=background el worker precalienta en su propio hilo y
+    # con PATTERNS_WATCH_INTERVAL revisa los archivos de patrones en otro
+    from src.analysis.lifecycle import LIFECYCLE
+    from src.analysis.packs import start_watcher_in_worker
+
+    LIFECYCLE.start_in_worker()
+    start_watcher_in_worker()
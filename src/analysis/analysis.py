@@ -0,0 +1,94 @@
+"""
+Análisis combinado de todos los detectores.
+
+Cada texto se procesa una única vez con el pipeline de spaCy y el mismo Doc
+se entrega a los matchers de shaming, urgencia y escasez.
+"""
+
+from src.analysis.batch import run_detectors
+from src.analysis.packs import get_detector
+from src.analysis.types import AnalyzeResponseSchema
+# Importar los detectores registra sus paquetes de patrones
+import src.scarcity.scarcity  # noqa: F401
+import src.urgency.urgency  # noqa: F401
+from src.shaming.shaming import has_shaming
+
+# run_detectors procesa cada texto una vez con la unión de los atributos
+# que necesitan los tres detectores
+DETECTOR_NAMES = ["urgency", "scarcity", "shaming"]
+
+
+# Detectores que tienen modo detallado (ver src/analysis/matches.py)
+DETAILED_NAMES = {"urgency", "scarcity"}
+
+
+def current_detectors(detailed=False):
+    """
+    Devuelve los Detectors vigentes (cambian al recargar los paquetes de patrones).
+    Con ``detailed`` urgencia y escasez usan su Detector detallado.
+    """
+    detectors = [get_detector(name) for name in DETECTOR_NAMES]
+    if detailed:
+        detectors = [detector.detailed if detector.name in DETAILED_NAMES else detector for detector in detectors]
+    return detectors
+
+
+def summarize_results(results):
+    """
+    Convierte los resultados crudos de los tres detectores sobre un texto
+    en los campos de AnalyzeInstanceSchema.
+
+    Retorna:
+        dict: Con las claves "has_shaming", "has_urgency", "has_scarcity"
+            y, si se detectó shaming, "shaming_confidence".
+    """
+    summary = {
+        "has_shaming": False,
+        "has_urgency": results["urgency"],
+        "has_scarcity": bool(results["scarcity"]),
+    }
+    shaming = results["shaming"]
+    if has_shaming(shaming):
+        summary["has_shaming"] = True
+        summary["shaming_confidence"] = shaming["confidence"]
+    return summary
+
+
+def analyze_instance(analized_text, results):
+    """
+    Arma la instancia de AnalyzeInstanceSchema para un texto de la solicitud
+    a partir de los resultados de run_detectors.
+
+    Si los resultados vienen de los Detectors detallados se agregan
+    "urgency_matches" y "scarcity_matches".
+    """
+    instance = {"text": analized_text["text"]}
+    if "urgency_matches" in results:
+        instance["urgency_matches"] = results["urgency_matches"]
+        instance["scarcity_matches"] = results["scarcity_matches"]
+        results = {
+            **results,
+            "urgency": bool(results["urgency_matches"]),
+            "scarcity": results["scarcity_matches"],
+        }
+    if analized_text.get("id") is not None:
+        instance["id"] = analized_text["id"]
+    if analized_text.get("path") is not None:
+        instance["path"] = analized_text["path"]
+    instance.update(summarize_results(results))
+    return instance
+
+
+def check_text_analyze_schema(data):
+    """
+    Recibe un dict validado por AnalyzeRequestSchema
+    y devuelve la respuesta serializada por AnalyzeResponseSchema.
+    """
+    results = run_detectors(
+        [analized_text["text"] for analized_text in data["texts"]],
+        current_detectors(data.get("detailed", False)),
+    )
+    instances = [analyze_instance(analized_text, result) for analized_text, result in zip(data["texts"], results)]
+    response_schema = AnalyzeResponseSchema()
+    response = {"version": data["version"], "instances": instances}
+    return response_schema.dump(response)
@@ -0,0 +1,143 @@
+"""
+Artefacto precompilado de las reglas de los paquetes de patrones.
+
+Al arrancar, cada worker compilaba los paquetes desde el JSON: expandía los
+FUZZY de escasez en decenas de miles de variantes (src/analysis/lexicon.py)
+y ``Matcher(validate=True)`` validaba cada patrón con pydantic, que es lo
+más caro del arranque después de cargar el modelo. spaCy no puede
+serializar un Matcher sin serializar también todo el vocabulario, así que
+el artefacto guarda lo que sí es costoso de producir: las reglas ya
+expandidas y validadas de cada paquete, listas para ``Matcher.add``.
+
+    python -m src.analysis.artifacts [ruta]
+
+compila y valida todos los paquetes registrados y escribe el artefacto
+(msgpack) en ``COMPILED_PATTERNS_PATH``. Al compilar un paquete,
+compiled_rules usa las reglas del artefacto solo si su clave coincide: la
+clave combina el contenido del paquete, la versión de spaCy, el modelo y el
+código que expande las reglas. Si no coincide (se editó el JSON, se
+recargó en caliente, cambió el modelo) o el artefacto no existe, se compila
+como siempre. Los strings del vocabulario que usan las reglas se agregan al
+StringStore en ``Matcher.add``, que sin validación es rápido.
+"""
+
+import hashlib
+import os
+import sys
+
+import srsly
+from spacy.matcher import Matcher
+
+from config import COMPILED_PATTERNS_PATH, NLP
+from src.analysis import lexicon
+from src.analysis.cache import detector_version
+from src.analysis.packs import get_pack, rule_patterns
+
+# Se incrementa si cambia el formato del artefacto
+ARTIFACT_FORMAT = 1
+
+# nombre -> función paquete -> {regla: [patrón, ...]} (ver compiled_rules)
+_rule_builders = {}
+
+
+def _code_version():
+    # Las reglas expandidas dependen del código de lexicon.py
+    with open(lexicon.__file__, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def artifact_key(pack):
+    """
+    Clave con la que se guardan las reglas de ``pack`` en el artefacto.
+    """
+    return detector_version(pack, _code_version(), ARTIFACT_FORMAT)
+
+
+def load_artifact(path=COMPILED_PATTERNS_PATH):
+    """
+    Lee el artefacto y devuelve {nombre: {"key": ..., "rules": ...}}, o un
+    dict vacío si no está configurado, no existe o no se puede leer.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        data = srsly.read_msgpack(path)
+    except (OSError, ValueError) as e:
+        print(f"Aviso: no se pudo leer {path} ({e}); se compilan los paquetes de patrones.")
+        return {}
+    if not isinstance(data, dict) or data.get("format") != ARTIFACT_FORMAT:
+        return {}
+    return data.get("packs", {})
+
+
+ARTIFACT = load_artifact()
+
+
+def compiled_rules(name, pack, build=rule_patterns, artifact=None):
+    """
+    Devuelve las reglas de ``pack`` listas para ``Matcher.add``: las del
+    artefacto si su clave coincide o, si no, ``build(pack)``.
+
+    Parámetros:
+        name (str): Nombre del paquete.
+        pack (dict): Paquete de patrones (ver src/analysis/packs.py).
+        build (callable, opcional): Función paquete -> {regla: [patrón]}.
+            Queda registrada para que build_artifact genere las mismas reglas.
+        artifact (dict, opcional): Artefacto a usar; por defecto ARTIFACT.
+
+    Retorna:
+        tuple: (reglas, True si vienen del artefacto y ya fueron validadas)
+    """
+    _rule_builders[name] = build
+    entry = (ARTIFACT if artifact is None else artifact).get(name)
+    if entry is not None and entry["key"] == artifact_key(pack):
+        return entry["rules"], True
+    return build(pack), False
+
+
+def create_rule_matcher(rules, validated=False):
+    """
+    Crea un Matcher con ``rules``. Las reglas que vienen del artefacto ya se
+    validaron al generarlo y se agregan sin volver a validarlas.
+    """
+    matcher = Matcher(NLP.vocab, validate=not validated)
+    for name, patterns in rules.items():
+        matcher.add(name, patterns)
+    return matcher
+
+
+def build_artifact(path=COMPILED_PATTERNS_PATH):
+    """
+    Genera las reglas de todos los paquetes registrados, las valida y
+    escribe el artefacto en ``path`` (reemplazándolo de forma atómica).
+
+    Retorna:
+        dict: {nombre: cantidad de patrones} de cada paquete guardado.
+    """
+    packs = {}
+    for name, build in _rule_builders.items():
+        pack = get_pack(name)
+        rules = build(pack)
+        create_rule_matcher(rules)  # valida los patrones
+        packs[name] = {"key": artifact_key(pack), "rules": rules}
+    tmp_path = f"{path}.tmp"
+    srsly.write_msgpack(tmp_path, {"format": ARTIFACT_FORMAT, "packs": packs})
+    os.replace(tmp_path, path)
+    return {name: sum(len(patterns) for patterns in entry["rules"].values()) for name, entry in packs.items()}
+
+
+def main(argv):
+    import src.analysis.analysis  # noqa: F401  (registra los detectores)
+    # Con `python -m` este archivo es __main__: los detectores registraron sus
+    # reglas en el módulo importado, no en este
+    from src.analysis import artifacts
+
+    path = argv[0] if argv else COMPILED_PATTERNS_PATH
+    for name, count in artifacts.build_artifact(path).items():
+        print(f"{name}: {count} patrones")
+    print(f"Artefacto escrito en {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
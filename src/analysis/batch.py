@@ -0,0 +1,266 @@
+"""
+Capa compartida de análisis por lotes.
+
+Los endpoints reciben páginas completas con cientos de textos. En lugar de
+invocar ``NLP(text)`` una vez por elemento, se juntan todos los textos de la
+solicitud y se procesan en un único flujo ``NLP.pipe``; los Docs resultantes
+se entregan luego a los matchers de cada detector.
+
+Cada detector declara qué atributos de token necesita (``PIPELINE_ATTRS``) y
+solo se ejecutan los componentes del pipeline que los producen. Las páginas
+muy grandes se pueden repartir entre varios procesos (``NLP_N_PROCESS``).
+
+Antes de procesar se aplica el prefiltro léxico de cada detector
+(``src/analysis/prefilter.py``) y se consulta la caché de resultados
+(``src/analysis/cache.py``): solo se parsean los textos que algún detector
+puede detectar y no tiene en caché. Los textos repetidos dentro de una
+misma solicitud (botones "Agregar al carrito", etiquetas de producto) se
+analizan una sola vez y el resultado se copia a cada aparición. Con ``MICROBATCH_MAX_WAIT_MS`` los
+textos de solicitudes chicas y concurrentes se procesan en un mismo lote
+(``src/analysis/microbatch.py``).
+"""
+
+import copy
+from collections import namedtuple
+
+from config import (
+    MICROBATCH_MAX_TEXTS,
+    MICROBATCH_MAX_WAIT_MS,
+    NLP,
+    NLP_BATCH_SIZE,
+    NLP_MULTIPROCESS_THRESHOLD,
+    NLP_N_PROCESS,
+    PREFILTER_ENABLED,
+)
+from src.analysis.cache import MISSING, RESULT_CACHE, cache_key
+from src.analysis.microbatch import MicroBatcher
+
+# Descripción de un detector para run_detectors:
+#   name: nombre usado en la clave de caché.
+#   version: versión de los patrones y del modelo (ver cache.detector_version).
+#   attrs: atributos de token requeridos (PIPELINE_ATTRS del detector).
+#   detect_doc: función Doc -> resultado serializable a JSON.
+#   detect_docs: opcional, función list[Doc] -> list[resultado] para detectores
+#       que ganan procesando varios Docs juntos (por ejemplo, un clasificador).
+#   compiled: opcional, matchers y datos compilados del paquete de patrones
+#       (ver src/analysis/packs.py).
+#   prefilter: opcional, función str -> bool que usa solo el tokenizador; si
+#       devuelve False el texto no puede coincidir y no se procesa con spaCy
+#       (ver src/analysis/prefilter.py).
+#   no_match: resultado que se devuelve para los textos descartados por prefilter.
+#   detailed: opcional, Detector del modo detallado, que con los mismos
+#       matchers devuelve cada coincidencia con su regla y sus offsets
+#       (ver src/analysis/matches.py).
+Detector = namedtuple(
+    "Detector",
+    ["name", "version", "attrs", "detect_doc", "detect_docs", "compiled", "prefilter", "no_match", "detailed"],
+    defaults=[None, None, None, None, None],
+)
+
+# Componentes del pipeline que produce cada atributo de token.
+# Los atributos léxicos (LOWER, TEXT, IS_DIGIT, LIKE_NUM, vectores) no
+# requieren ningún componente.
+PIPELINE_COMPONENTS = {
+    "POS": ["tok2vec", "morphologizer", "attribute_ruler"],
+    "MORPH": ["tok2vec", "morphologizer", "attribute_ruler"],
+    "LEMMA": ["tok2vec", "morphologizer", "attribute_ruler", "lemmatizer"],
+    "DEP": ["tok2vec", "parser"],
+    "SENT": ["senter"],
+}
+
+
+def disabled_components(attrs):
+    """
+    Devuelve los componentes del pipeline que pueden omitirse cuando solo
+    se necesitan los atributos indicados.
+
+    Si se pide DEP, los límites de oración los define el parser y el
+    senter no hace falta.
+
+    Parámetros:
+        attrs (Iterable[str] | None): Atributos requeridos. None ejecuta
+            el pipeline completo (con el parser en lugar del senter).
+
+    Retorna:
+        list[str]: Nombres de componentes a deshabilitar.
+    """
+    if attrs is None:
+        attrs = PIPELINE_COMPONENTS.keys()
+    attrs = set(attrs)
+    if "DEP" in attrs:
+        attrs.discard("SENT")
+    required = set()
+    for attr in attrs:
+        required.update(PIPELINE_COMPONENTS.get(attr, []))
+    return [name for name in NLP.pipe_names if name not in required]
+
+
+def sentence_source(attrs):
+    """
+    Devuelve el componente que define los límites de oración al procesar
+    con ``attrs``: "parser" si se pide DEP (o el pipeline completo),
+    "senter" si solo se pide SENT y None si no se calculan oraciones.
+
+    El parser y el senter no siempre parten igual un texto, así que un
+    detector que usa oraciones puede dar resultados distintos según qué
+    otros detectores se ejecuten junto con él (ver profile_version).
+    """
+    if attrs is None or "DEP" in attrs:
+        return "parser"
+    if "SENT" in attrs:
+        return "senter"
+    return None
+
+
+def profile_version(detector, source):
+    """
+    Versión con la que se guardan en caché los resultados de ``detector``
+    cuando las oraciones las define ``source``. Solo cambia para los
+    detectores que usan SENT, así /urgency (senter) y /analyze (parser) no
+    comparten resultados que pueden diferir.
+    """
+    if "SENT" in detector.attrs and source is not None:
+        return f"{detector.version}:{source}"
+    return detector.version
+
+
+def parse_texts(texts, attrs=None, batch_size=None, n_process=None):
+    """
+    Procesa una lista de textos con ``NLP.pipe`` y devuelve los Docs
+    en el mismo orden en que fueron recibidos.
+
+    Con ``n_process`` mayor a 1 los lotes se reparten entre varios procesos
+    (spaCy devuelve los Docs en el orden de entrada). Como crear los procesos
+    y enviarles los Docs tiene un costo fijo, por defecto solo se usa cuando
+    hay al menos ``config.NLP_MULTIPROCESS_THRESHOLD`` textos.
+
+    Parámetros:
+        texts (list[str]): Textos a procesar.
+        attrs (Iterable[str], opcional): Atributos de token requeridos por
+            los detectores (ver ``PIPELINE_COMPONENTS``).
+        batch_size (int, opcional): Tamaño de lote para ``NLP.pipe``.
+            Por defecto se usa ``config.NLP_BATCH_SIZE``.
+        n_process (int, opcional): Procesos a usar. Por defecto
+            ``config.NLP_N_PROCESS`` si se alcanza el umbral y 1 si no.
+
+    Retorna:
+        list[Doc]: Un Doc por cada texto de entrada.
+    """
+    if batch_size is None:
+        batch_size = NLP_BATCH_SIZE
+    if n_process is None:
+        n_process = NLP_N_PROCESS if len(texts) >= NLP_MULTIPROCESS_THRESHOLD else 1
+    if n_process > 1:
+        # Cada proceso recibe al menos un lote completo
+        n_process = max(1, min(n_process, len(texts) // batch_size))
+    return list(
+        NLP.pipe(texts, batch_size=batch_size, disable=disabled_components(attrs), n_process=n_process)
+    )
+
+
+# Agrupa los textos de solicitudes concurrentes (ver src/analysis/microbatch.py)
+MICRO_BATCHER = MicroBatcher(parse_texts, MICROBATCH_MAX_WAIT_MS / 1000, MICROBATCH_MAX_TEXTS, sentence_source)
+
+
+def parse_shared(texts, attrs=None):
+    """
+    Como parse_texts, pero con MICROBATCH_MAX_WAIT_MS > 0 las solicitudes
+    chicas se procesan junto con las de otros hilos del mismo proceso.
+    """
+    if MICROBATCH_MAX_WAIT_MS > 0 and len(texts) < MICROBATCH_MAX_TEXTS:
+        return MICRO_BATCHER.parse(texts, attrs)
+    return parse_texts(texts, attrs)
+
+
+def parse_text(text, attrs=None):
+    """
+    Procesa un único texto con los componentes necesarios para ``attrs``.
+    """
+    return NLP(text, disable=disabled_components(attrs))
+
+
+def run_detectors(texts, detectors, cache=RESULT_CACHE):
+    """
+    Ejecuta varios detectores sobre una lista de textos usando el
+    prefiltro léxico, la caché y un único ``NLP.pipe`` para los textos que
+    falten.
+
+    Los textos idénticos se analizan una sola vez: solo la primera aparición
+    pasa por el prefiltro, la caché y spaCy, y las demás reciben el mismo
+    resultado. No se agrupan los textos que solo difieren en espacios: spaCy
+    los tokeniza distinto y el resultado puede cambiar. Para los detectores
+    que usan oraciones, la clave de caché incluye qué componente definió los
+    límites (ver profile_version).
+
+    Parámetros:
+        texts (list[str]): Textos a analizar.
+        detectors (list[Detector]): Detectores a ejecutar.
+        cache (ResultCache, opcional): Caché de resultados.
+
+    Retorna:
+        list[dict]: Por cada texto, un dict nombre de detector -> resultado.
+    """
+    results = [{} for _ in texts]
+    pending = {}
+    attrs = set()
+    for detector in detectors:
+        attrs.update(detector.attrs)
+    source = sentence_source(attrs)
+    versions = {detector.name: profile_version(detector, source) for detector in detectors}
+    # Índice de la primera aparición de cada texto repetido
+    repeated = {}
+    first = {}
+    for i, text in enumerate(texts):
+        if text in first:
+            repeated[i] = first[text]
+        else:
+            first[text] = i
+    # (índice, detector, clave) de los textos a buscar en la caché, todos en
+    # una sola consulta: con un backend remoto cada consulta es un viaje de
+    # ida y vuelta por la red
+    lookups = []
+    for detector in detectors:
+        for i, text in enumerate(texts):
+            if i in repeated:
+                continue
+            # Los textos descartados por el prefiltro no se guardan en la caché
+            if PREFILTER_ENABLED and detector.prefilter is not None and not detector.prefilter(text):
+                results[i][detector.name] = copy.copy(detector.no_match)
+                continue
+            lookups.append((i, detector, cache_key(detector.name, versions[detector.name], text)))
+    values = cache.get_many([key for _, _, key in lookups]) if lookups else []
+    keys = {}
+    for (i, detector, key), value in zip(lookups, values):
+        if value is MISSING:
+            pending.setdefault(i, []).append(detector)
+            keys[i, detector.name] = key
+        else:
+            results[i][detector.name] = value
+
+    if pending:
+        indexes = sorted(pending)
+        docs = dict(zip(indexes, parse_shared([texts[i] for i in indexes], attrs)))
+        computed = []
+        for detector in detectors:
+            todo = [i for i in indexes if detector in pending[i]]
+            if not todo:
+                continue
+            if detector.detect_docs is not None:
+                values = detector.detect_docs([docs[i] for i in todo])
+            else:
+                values = [detector.detect_doc(docs[i]) for i in todo]
+            for i, value in zip(todo, values):
+                computed.append((keys[i, detector.name], value))
+                results[i][detector.name] = value
+        cache.set_many(computed)
+    for i, original in repeated.items():
+        results[i] = dict(results[original])
+    return results
+
+
+def run_detector(texts, detector, cache=RESULT_CACHE):
+    """
+    Igual que run_detectors pero para un único detector; devuelve la lista
+    de resultados en el orden de ``texts``.
+    """
+    return [result[detector.name] for result in run_detectors(texts, [detector], cache)]
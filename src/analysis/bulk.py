@@ -0,0 +1,153 @@
+"""
+Análisis masivo sin pasar por la API HTTP.
+
+Lee un archivo JSONL con un payload de página por línea (el mismo formato que
+reciben ``/analyze``, ``/scarcity``, ``/urgency`` o ``/shaming``), ejecuta los
+detectores en el mismo proceso y escribe un JSONL con una línea por registro:
+
+    {"offset": 0, "result": {...}}
+    {"offset": 1, "error": "..."}
+
+Los registros se leen y escriben por bloques (``--chunk-size``), así la memoria
+no depende del tamaño del archivo. Con ``--processes`` los registros de cada
+bloque se reparten entre varios procesos, que comparten el modelo ya cargado.
+Un registro que falla (JSON inválido, payload mal formado o cualquier error
+inesperado) se escribe con ``error`` y el resto del archivo se sigue procesando.
+
+Uso:
+    python -m src.analysis.bulk paginas.jsonl resultados.jsonl --detector analyze
+    python -m src.analysis.bulk paginas.jsonl resultados.jsonl --resume
+    python -m src.analysis.bulk paginas.jsonl resultados.jsonl --start 120000 --processes 8
+
+``--resume`` continúa después del último registro escrito en la salida;
+``--start`` saltea los primeros N registros de la entrada.
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+
+from marshmallow import ValidationError
+
+from src.analysis import batch
+from src.analysis.handlers import HANDLERS, run_handler
+
+
+def process_record(detector, offset, line):
+    """
+    Analiza una línea de la entrada y devuelve la línea de salida (sin el salto de línea).
+    """
+    try:
+        result = run_handler(detector, json.loads(line))
+    except ValidationError as e:
+        return json.dumps({"offset": offset, "error": e.messages}, ensure_ascii=False)
+    except Exception as e:  # noqa: BLE001  (un registro no debe cortar todo el archivo)
+        return json.dumps({"offset": offset, "error": f"{type(e).__name__}: {e}"}, ensure_ascii=False)
+    return json.dumps({"offset": offset, "result": result}, ensure_ascii=False)
+
+
+def _process_star(args):
+    return process_record(*args)
+
+
+def _init_worker():
+    # Los procesos de multiprocessing.Pool son daemon y no pueden crear
+    # procesos hijos: NLP.pipe no debe usar n_process aunque una página
+    # alcance NLP_MULTIPROCESS_THRESHOLD
+    batch.NLP_N_PROCESS = 1
+
+
+def resume_offset(output_path):
+    """
+    Devuelve el offset siguiente al último registro completo de la salida y
+    descarta una última línea incompleta (por ejemplo, si el proceso se cortó
+    mientras escribía).
+    """
+    if not os.path.exists(output_path):
+        return 0
+    with open(output_path, "rb+") as f:
+        last_offset = -1
+        complete = 0
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            complete += len(line)
+            last_offset = json.loads(line)["offset"]
+        f.truncate(complete)
+    return last_offset + 1
+
+
+def read_records(input_path, start):
+    """
+    Itera (offset, línea) desde el registro ``start``, salteando líneas vacías
+    sin contarlas como registros.
+    """
+    with open(input_path, encoding="utf-8") as f:
+        records = (line for line in f if line.strip())
+        yield from itertools.islice(enumerate(records), start, None)
+
+
+def run(input_path, output_path, detector="analyze", start=0, processes=1, chunk_size=256, progress=None):
+    """
+    Procesa ``input_path`` desde el registro ``start`` y agrega los
+    resultados a ``output_path``.
+
+    Retorna:
+        int: Cantidad de registros procesados.
+    """
+    pool = None
+    if processes > 1:
+        # El modelo ya está cargado: se congela y se comparte con los procesos hijos
+        gc.collect()
+        gc.freeze()
+        pool = multiprocessing.get_context("fork").Pool(processes, initializer=_init_worker)
+    processed = 0
+    try:
+        with open(output_path, "a", encoding="utf-8") as out:
+            records = read_records(input_path, start)
+            while True:
+                chunk = [(detector, offset, line) for offset, line in itertools.islice(records, chunk_size)]
+                if not chunk:
+                    break
+                if pool is not None:
+                    lines = pool.map(_process_star, chunk)
+                else:
+                    lines = [process_record(*item) for item in chunk]
+                out.write("".join(line + "\n" for line in lines))
+                out.flush()
+                processed += len(chunk)
+                if progress:
+                    progress(chunk[-1][1] + 1)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return processed
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m src.analysis.bulk", description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", help="JSONL con un payload por línea")
+    parser.add_argument("output", help="JSONL de resultados (se agregan líneas al final)")
+    parser.add_argument("--detector", choices=sorted(HANDLERS), default="analyze")
+    parser.add_argument("--start", type=int, default=0, help="saltear los primeros N registros")
+    parser.add_argument("--resume", action="store_true", help="continuar después del último registro de la salida")
+    parser.add_argument("--processes", type=int, default=1, help="procesos en paralelo")
+    parser.add_argument("--chunk-size", type=int, default=256, help="registros por bloque")
+    args = parser.parse_args(argv)
+
+    start = resume_offset(args.output) if args.resume else args.start
+    processed = run(
+        args.input, args.output, args.detector, start, args.processes, args.chunk_size,
+        progress=lambda offset: print(f"{offset} registros", file=sys.stderr),
+    )
+    print(f"Procesados {processed} registros desde el offset {start}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,423 @@
+"""
+Caché de resultados de detección direccionada por contenido.
+
+Las páginas de e-commerce repiten constantemente los mismos textos
+("Agregar al carrito", "Solo por hoy", pie de página). Los resultados de cada
+detector se guardan con una clave derivada del texto exacto, el nombre del
+detector y la versión de sus patrones: si cambian los patrones cambia la
+versión y las entradas viejas dejan de usarse (y terminan desalojadas por LRU).
+El texto no se normaliza porque para spaCy los espacios repetidos y los
+saltos de línea son tokens que cortan los patrones ("solo por hoy" es
+urgencia y "solo\\n\\npor hoy" no).
+
+El almacenamiento es intercambiable (``RESULT_CACHE_BACKEND``):
+- ``memory``: LRU dentro de cada proceso.
+- ``sqlite``: archivo local compartido por todos los workers del mismo host,
+  sobrevive a reinicios.
+- ``redis``: cualquier servidor que hable el protocolo Redis, compartido por
+  toda la flota (requiere el paquete ``redis``).
+"""
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import spacy
+
+from config import NLP, RESULT_CACHE_BACKEND, RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_URL
+
+# Valor centinela para distinguir "no está en caché" de resultados falsos
+MISSING = object()
+
+
+def cache_key(detector, version, text):
+    """
+    Devuelve la clave de caché para un texto analizado por un detector.
+    """
+    content = "\0".join((detector, version, text))
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def pattern_version(*parts):
+    """
+    Calcula una versión corta a partir del contenido de los patrones.
+
+    Acepta matchers de spaCy (se usan los patrones cargados) o cualquier
+    estructura serializable a JSON (listas de frases, excepciones, etc.).
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        if hasattr(part, "_patterns"):
+            strings = part.vocab.strings
+            part = {strings[key]: patterns for key, patterns in part._patterns.items()}
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def detector_version(*parts):
+    """
+    Versión de los resultados de un detector: la de sus patrones (ver
+    pattern_version) combinada con la versión de spaCy y el nombre y la
+    versión del modelo cargado. Con un backend persistente (sqlite, redis)
+    los resultados calculados con otro modelo dejan de usarse al cambiar
+    SPACY_MODEL o actualizarlo.
+    """
+    return pattern_version(*parts, spacy.__version__, NLP.meta["lang"], NLP.meta["name"], NLP.meta["version"])
+
+
+class MemoryBackend:
+    """
+    Almacenamiento LRU en memoria con expiración opcional.
+
+    Atributos:
+        max_entries (int): Cantidad máxima de entradas antes de desalojar la más vieja.
+        ttl (float): Segundos de vida de cada entrada; 0 desactiva la expiración.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Devuelve el valor guardado para la clave o MISSING si no existe o expiró.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            value, expires = entry
+            if expires and expires <= time.monotonic():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value):
+        """
+        Guarda un valor, desalojando las entradas menos usadas si hace falta.
+        """
+        if self.max_entries <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_many(self, items):
+        for key, value in items:
+            self.set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class SqliteBackend:
+    """
+    Almacenamiento en un archivo SQLite compartido entre procesos del mismo host.
+
+    Los valores se guardan como JSON. Cada proceso e hilo usa su propia
+    conexión; el modo WAL permite lecturas concurrentes mientras otro worker
+    escribe. Cuando se supera ``max_entries`` se borran las entradas usadas
+    hace más tiempo (el último uso se actualiza a lo sumo cada
+    ``TOUCH_INTERVAL`` segundos).
+    """
+
+    # Cada cuántas escrituras se revisa el límite de entradas
+    EVICT_EVERY = 100
+    # Claves por consulta en get_many (SQLite limita los parámetros por sentencia)
+    CHUNK_SIZE = 500
+    # Segundos que pueden pasar antes de actualizar el último uso de una
+    # entrada: así la mayoría de las lecturas no abren una transacción de
+    # escritura (en WAL hay un único escritor para todos los workers)
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, path, max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)"
+        )
+        self._connection().execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+
+    def _connection(self):
+        # Las conexiones no se comparten entre hilos ni sobreviven a un fork
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _transaction(self, connection):
+        # La conexión está en modo autocommit: sin BEGIN explícito cada
+        # sentencia de un executemany sería su propia transacción
+        connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        connection = self._connection()
+        rows = {}
+        for start in range(0, len(keys), self.CHUNK_SIZE):
+            chunk = keys[start:start + self.CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            rows.update(
+                (key, (value, expires, used)) for key, value, expires, used in connection.execute(
+                    f"SELECT key, value, expires, used FROM results WHERE key IN ({placeholders})", chunk
+                )
+            )
+        now = time.time()
+        values, expired, stale = [], [], []
+        for key in keys:
+            row = rows.get(key)
+            if row is None:
+                values.append(MISSING)
+                continue
+            value, expires, used = row
+            if expires and expires <= now:
+                expired.append((key,))
+                values.append(MISSING)
+                continue
+            if now - used >= self.TOUCH_INTERVAL:
+                stale.append((now, key))
+            values.append(json.loads(value))
+        if expired or stale:
+            with self._transaction(connection):
+                connection.executemany("DELETE FROM results WHERE key = ?", expired)
+                connection.executemany("UPDATE results SET used = ? WHERE key = ?", stale)
+        return values
+
+    def set(self, key, value):
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        if self.max_entries <= 0 or not items:
+            return
+        now = time.time()
+        expires = now + self.ttl if self.ttl else 0
+        connection = self._connection()
+        # Una sola transacción para todo el lote
+        with self._transaction(connection):
+            connection.executemany(
+                "INSERT OR REPLACE INTO results (key, value, expires, used) VALUES (?, ?, ?, ?)",
+                [(key, json.dumps(value), expires, now) for key, value in items],
+            )
+        previous = self._writes
+        self._writes += len(items)
+        if self._writes // self.EVICT_EVERY != previous // self.EVICT_EVERY:
+            self._evict(connection)
+
+    def _evict(self, connection):
+        connection.execute("DELETE FROM results WHERE expires > 0 AND expires <= ?", (time.time(),))
+        (count,) = connection.execute("SELECT COUNT(*) FROM results").fetchone()
+        if count > self.max_entries:
+            connection.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self):
+        self._connection().execute("DELETE FROM results")
+
+    def size(self):
+        (count,) = self._connection().execute("SELECT COUNT(*) FROM results").fetchone()
+        return count
+
+
+class RedisBackend:
+    """
+    Almacenamiento en un servidor compatible con el protocolo Redis.
+
+    El límite de memoria lo administra el servidor (por ejemplo con
+    ``maxmemory-policy allkeys-lru``); acá solo se aplica el TTL. Se puede
+    pasar un ``client`` ya creado (por ejemplo un servidor de prueba local);
+    si no, se crea uno a partir de ``url`` con el paquete ``redis``.
+    """
+
+    def __init__(self, url=None, ttl=RESULT_CACHE_TTL, prefix="dark-patterns:", client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError(
+                    "El backend de caché 'redis' requiere el paquete redis (pip install redis)"
+                ) from e
+            client = redis.Redis.from_url(url or "redis://localhost:6379/0")
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        # Un único MGET en lugar de un GET por clave
+        if not keys:
+            return []
+        values = self.client.mget([self.prefix + key for key in keys])
+        return [MISSING if value is None else json.loads(value) for value in values]
+
+    def set(self, key, value):
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        # Los SET van en un pipeline: un solo viaje de ida y vuelta por lote.
+        # El TTL va en milisegundos: con ``ex`` un TTL menor a un segundo
+        # quedaría en 0, que Redis rechaza
+        if not items:
+            return
+        ttl = math.ceil(self.ttl * 1000) if self.ttl else None
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items:
+            pipeline.set(self.prefix + key, json.dumps(value), px=ttl)
+        pipeline.execute()
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def size(self):
+        # Contar las claves con el prefijo requiere recorrer todo el keyspace
+        return None
+
+
+class ResultCache:
+    """
+    Caché de resultados con contadores de aciertos y fallos por proceso.
+
+    Delega el almacenamiento en un backend (MemoryBackend por defecto). Los
+    errores del backend (por ejemplo, Redis caído) se cuentan y se tratan
+    como fallos de caché: la detección nunca se interrumpe por la caché.
+    """
+
+    def __init__(self, backend=None, max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        if backend is None:
+            backend = MemoryBackend(max_entries, ttl)
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key):
+        """
+        Devuelve el valor guardado para la clave o MISSING si no existe o expiró.
+        """
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        """
+        Devuelve los valores guardados para varias claves (MISSING para las
+        que no existen o expiraron) con una sola consulta al backend.
+        """
+        try:
+            values = self.backend.get_many(keys)
+        except Exception:
+            self._count("errors")
+            values = [MISSING] * len(keys)
+        found = sum(value is not MISSING for value in values)
+        with self._lock:
+            self.hits += found
+            self.misses += len(values) - found
+        return values
+
+    def set(self, key, value):
+        """
+        Guarda un valor en el backend.
+        """
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        """
+        Guarda varios pares (clave, valor) con una sola escritura al backend.
+        """
+        try:
+            self.backend.set_many(items)
+        except Exception:
+            self._count("errors")
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.errors = 0
+
+    def stats(self):
+        """
+        Devuelve los contadores de la caché.
+        """
+        try:
+            size = self.backend.size()
+        except Exception:
+            size = None
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "size": size,
+                "max_entries": getattr(self.backend, "max_entries", None),
+                "ttl": self.backend.ttl,
+            }
+
+
+def create_cache(backend=RESULT_CACHE_BACKEND, url=RESULT_CACHE_URL,
+                 max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+    """
+    Crea la caché de resultados con el backend configurado.
+
+    Parámetros:
+        backend (str): "memory", "sqlite" o "redis".
+        url (str): Ruta del archivo SQLite o URL del servidor Redis.
+        max_entries (int): Límite de entradas (memory y sqlite).
+        ttl (float): Segundos de vida de cada entrada (0 = sin expiración).
+    """
+    if backend == "memory":
+        return ResultCache(MemoryBackend(max_entries, ttl))
+    if backend == "sqlite":
+        return ResultCache(SqliteBackend(url or "result_cache.sqlite3", max_entries, ttl))
+    if backend == "redis":
+        return ResultCache(RedisBackend(url, ttl))
+    raise ValueError(f"Backend de caché desconocido: {backend!r}")
+
+
+RESULT_CACHE = create_cache()
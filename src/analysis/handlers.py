@@ -0,0 +1,89 @@
+"""
+Lógica de cada endpoint, independiente del servidor web.
+
+Reciben el JSON de la solicitud ya decodificado y devuelven la respuesta
+serializable. Las usan tanto ``app.py`` (Flask) como ``async_app.py``, que
+las ejecuta en procesos del pool de NLP.
+"""
+
+from src.analysis.analysis import check_text_analyze_schema
+from src.analysis.incremental import check_incremental_schema
+from src.analysis.types import AnalyzeRequestSchema, IncrementalRequestSchema
+from src.scarcity.scarcity import check_text_scarcity_schema
+from src.scarcity.types import ScarcityRequestSchema
+from src.shaming.my_types import ShamingResponse, ShamingSchema
+from src.shaming.shaming import check_text_shaming, check_text_shaming_nopath
+from src.urgency.types import UrgencyRequestSchema
+from src.urgency.urgency import check_text_urgency_schema
+
+
+def handle_scarcity(json_data):
+    return check_text_scarcity_schema(ScarcityRequestSchema().load(json_data))
+
+
+def handle_shaming(json_data):
+    # Las versiones anteriores a 0.2 envían una lista de tokens {text, path}
+    if json_data.get("Version", "0.1") != "0.2":
+        sentences = []
+        for token in json_data.get("tokens"):
+            sentences.extend(check_text_shaming(token["text"], token["path"]))
+        return sentences
+    data = ShamingSchema().load(json_data)
+    return ShamingResponse().dump(check_text_shaming_nopath(data))
+
+
+def handle_urgency(json_data):
+    return check_text_urgency_schema(UrgencyRequestSchema().load(json_data))
+
+
+def handle_analyze(json_data):
+    return check_text_analyze_schema(AnalyzeRequestSchema().load(json_data))
+
+
+def handle_incremental(json_data):
+    return check_incremental_schema(IncrementalRequestSchema().load(json_data))
+
+
+# El re-escaneo incremental no figura acá: depende del snapshot guardado en
+# el proceso que atiende la solicitud (ver src/analysis/incremental.py)
+HANDLERS = {
+    "scarcity": handle_scarcity,
+    "shaming": handle_shaming,
+    "urgency": handle_urgency,
+    "analyze": handle_analyze,
+}
+
+
+def run_handler(name, json_data):
+    """
+    Ejecuta el handler ``name``; es el punto de entrada de los procesos del pool.
+    """
+    return HANDLERS[name](json_data)
+
+
+# Campos de los distintos esquemas que contienen texto a analizar
+TEXT_FIELDS = {"text", "Text", "Label", "Title"}
+
+
+def request_size(json_data):
+    """
+    Cuenta los textos a analizar y su cantidad total de caracteres.
+
+    Retorna:
+        tuple: (cantidad de textos, cantidad de caracteres)
+    """
+    texts = 0
+    chars = 0
+    stack = [json_data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key in TEXT_FIELDS and isinstance(item, str):
+                    texts += 1
+                    chars += len(item)
+                else:
+                    stack.append(item)
+        elif isinstance(value, list):
+            stack.extend(value)
+    return texts, chars
@@ -0,0 +1,165 @@
+"""
+Re-escaneo incremental de páginas.
+
+La extensión vuelve a escanear la página cada vez que cambia el DOM (scroll
+infinito, contadores regresivos), aunque solo hayan cambiado unos pocos
+textos. El servidor guarda por cliente (``session``) y página (``page``) un
+snapshot con el hash y el resultado de cada texto, identificado por su
+``id``, y las solicitudes siguientes solo envían:
+
+- los textos agregados o modificados (con ``text``),
+- opcionalmente, referencias a los que no cambiaron (con el ``hash`` que
+  devolvió la respuesta anterior),
+- los ids que desaparecieron (``removed``).
+
+Solo se analizan los textos nuevos o modificados y la respuesta trae el
+resultado combinado de toda la página. Con ``complete`` la solicitud
+describe la página entera en orden (textos o hashes) y los ids que no
+figuran se descartan.
+
+Si el snapshot no existe o expiró (otro worker con el backend ``memory``, un
+reinicio) y la solicitud referencia hashes desconocidos, se lanza
+SnapshotMismatchError con los ids a reenviar completos. Si cambiaron los
+patrones desde el snapshot, todos los textos guardados se vuelven a analizar.
+Los snapshots no se comparten entre clientes: dos clientes que ven la misma
+URL tienen ids distintos y, con un único snapshot, cada uno vería los textos
+del otro. Dos solicitudes simultáneas del mismo cliente sobre la misma
+página no se coordinan: queda el snapshot de la última en terminar.
+
+Sin ``complete`` los ids se acumulan (scroll infinito), así que cada página
+guarda a lo sumo ``PAGE_SNAPSHOT_MAX_ITEMS`` textos: al superarlo se
+descartan los más viejos que no vinieron en la solicitud y la respuesta los
+informa en ``evicted``.
+"""
+
+import hashlib
+
+from marshmallow import ValidationError
+
+from config import (
+    PAGE_SNAPSHOT_MAX_ITEMS,
+    PAGE_SNAPSHOT_MAX_PAGES,
+    PAGE_SNAPSHOT_TTL,
+    RESULT_CACHE_BACKEND,
+    RESULT_CACHE_URL,
+)
+from src.analysis.analysis import analyze_instance, current_detectors
+from src.analysis.batch import run_detectors
+from src.analysis.cache import MISSING, MemoryBackend, RedisBackend, ResultCache, SqliteBackend
+from src.analysis.types import IncrementalResponseSchema
+
+
+class SnapshotMismatchError(ValueError):
+    """
+    La solicitud referencia por hash textos que el snapshot de la página no
+    tiene. ``ids`` son los textos que el cliente debe reenviar completos.
+    """
+
+    def __init__(self, ids):
+        super().__init__(ids)
+        self.ids = ids
+
+    def __str__(self):
+        return f"Textos desconocidos para el snapshot de la página: {', '.join(self.ids)}"
+
+
+def create_snapshot_store():
+    """
+    Crea el almacenamiento de snapshots con el backend de RESULT_CACHE_BACKEND,
+    separado de la caché de resultados (otro archivo SQLite u otro prefijo de
+    Redis) para que sus límites no se mezclen.
+    """
+    if RESULT_CACHE_BACKEND == "sqlite":
+        path = (RESULT_CACHE_URL or "result_cache.sqlite3") + ".pages"
+        return ResultCache(SqliteBackend(path, PAGE_SNAPSHOT_MAX_PAGES, PAGE_SNAPSHOT_TTL))
+    if RESULT_CACHE_BACKEND == "redis":
+        return ResultCache(RedisBackend(RESULT_CACHE_URL, PAGE_SNAPSHOT_TTL, prefix="dark-patterns:page:"))
+    return ResultCache(MemoryBackend(PAGE_SNAPSHOT_MAX_PAGES, PAGE_SNAPSHOT_TTL))
+
+
+PAGE_SNAPSHOTS = create_snapshot_store()
+
+
+def text_hash(text):
+    """
+    Hash del texto exacto que identifica un texto sin cambios.
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def snapshot_key(session, page):
+    return hashlib.sha1(f"{session}\0{page}".encode("utf-8")).hexdigest()
+
+
+def check_incremental_schema(data, store=PAGE_SNAPSHOTS, max_items=PAGE_SNAPSHOT_MAX_ITEMS):
+    """
+    Recibe un dict validado por IncrementalRequestSchema, lo aplica sobre el
+    snapshot de la página y devuelve la respuesta serializada por
+    IncrementalResponseSchema. El snapshot conserva a lo sumo ``max_items``
+    textos; una solicitud con más textos se rechaza con ValidationError.
+    """
+    if len(data["texts"]) > max_items:
+        raise ValidationError({"texts": [f"A lo sumo {max_items} textos por página."]})
+    detectors = current_detectors()
+    versions = [detector.version for detector in detectors]
+    key = snapshot_key(data["session"], data["page"])
+    snapshot = store.get(key)
+
+    # id -> [hash, instancia] en el orden de la página
+    items = {}
+    stale = False
+    if snapshot is not MISSING:
+        items = {id_: [hash_, instance] for id_, hash_, instance in snapshot["items"]}
+        stale = snapshot["versions"] != versions
+    for id_ in data["removed"]:
+        items.pop(id_, None)
+
+    updated = {}
+    to_analyze = {}
+    unknown = []
+    for item in data["texts"]:
+        id_ = item["id"]
+        current = items.get(id_)
+        hash_ = item["hash"] if "hash" in item else text_hash(item["text"])
+        if current is None or current[0] != hash_:
+            if "text" not in item:
+                unknown.append(id_)
+                continue
+            to_analyze[id_] = item
+            updated[id_] = [hash_, None]
+            continue
+        instance = current[1]
+        if item.get("path") is not None and item["path"] != instance.get("path"):
+            instance = {**instance, "path": item["path"]}
+        updated[id_] = [hash_, instance]
+    if unknown:
+        raise SnapshotMismatchError(unknown)
+
+    if data["complete"]:
+        items = updated
+    else:
+        items.update(updated)
+    # Los ids se guardan en el orden en que llegaron: se descartan primero los
+    # más viejos, nunca los de esta solicitud
+    evicted = [id_ for id_ in items if id_ not in updated][:max(0, len(items) - max_items)]
+    for id_ in evicted:
+        del items[id_]
+    if stale:
+        # Los patrones cambiaron: se vuelven a analizar los textos guardados
+        for id_, (hash_, instance) in items.items():
+            if id_ not in to_analyze:
+                to_analyze[id_] = {field: instance[field] for field in ("text", "path") if field in instance}
+
+    results = run_detectors([item["text"] for item in to_analyze.values()], detectors)
+    for (id_, item), result in zip(to_analyze.items(), results):
+        items[id_][1] = analyze_instance({**item, "id": id_}, result)
+
+    store.set(key, {"versions": versions, "items": [[id_, hash_, instance] for id_, (hash_, instance) in items.items()]})
+    response = {
+        "version": data["version"],
+        "page": data["page"],
+        "analyzed": len(to_analyze),
+        "evicted": evicted,
+        "instances": [{**instance, "hash": hash_} for hash_, instance in items.values()],
+    }
+    return IncrementalResponseSchema().dump(response)
@@ -0,0 +1,106 @@
+"""
+Índices léxicos precalculados para los patrones del Matcher.
+
+Los predicados ``FUZZY`` y ``FUZZYn`` sobre ``LOWER`` hacen que spaCy
+calcule una distancia de edición por token en cada documento. Al compilar un
+paquete de patrones (ver src/analysis/packs.py) se reemplazan por
+``{"IN": [...]}`` con las variantes en minúscula de cada palabra (con y sin
+tildes y con errores de tipeo), de modo que la comparación pasa a ser una
+búsqueda en un conjunto.
+
+Las variantes cubren todas las ediciones de distancia 1 (borrar, insertar o
+reemplazar una letra). Si el predicado admite más ediciones se
+agregan solo los errores de tipeo comunes sobre esas variantes (letra
+faltante, letras transpuestas, letra duplicada y tilde de más o de menos),
+en lugar de todas las combinaciones posibles.
+
+También se registran atributos de token propios (``token._.starts_with_digit``)
+para reemplazar expresiones regulares simples.
+"""
+
+from spacy.tokens import Token
+
+from src.analysis.prefilter import strip_accents
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyzáéíóúüñ"
+_ACCENT_SWAPS = {"a": "á", "e": "é", "i": "í", "o": "ó", "u": "úü", "á": "a", "é": "e", "í": "i", "ó": "o", "ú": "u", "ü": "u"}
+FUZZY_OPS = ("FUZZY", "FUZZY1", "FUZZY2", "FUZZY3", "FUZZY4", "FUZZY5", "FUZZY6", "FUZZY7", "FUZZY8", "FUZZY9")
+
+Token.set_extension("starts_with_digit", getter=lambda token: token.text[:1].isdigit(), force=True)
+
+
+def edits1(word):
+    """
+    Todas las palabras a una edición de distancia de Levenshtein de ``word``
+    (la misma distancia que usa spaCy: una transposición cuenta como dos).
+    """
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    deletes = {left + right[1:] for left, right in splits if right}
+    replaces = {left + c + right[1:] for left, right in splits if right for c in ALPHABET}
+    inserts = {left + c + right for left, right in splits for c in ALPHABET}
+    return deletes | replaces | inserts
+
+
+def common_typos(word):
+    """
+    Errores de tipeo comunes sobre ``word``: una letra faltante, dos letras
+    transpuestas, una letra duplicada o una tilde agregada/quitada.
+    """
+    typos = set()
+    for i, char in enumerate(word):
+        typos.add(word[:i] + word[i + 1:])
+        typos.add(word[:i] + char + word[i:])
+        if i + 1 < len(word):
+            typos.add(word[:i] + word[i + 1] + char + word[i + 2:])
+        for swap in _ACCENT_SWAPS.get(char, ""):
+            typos.add(word[:i] + swap + word[i + 1:])
+    return typos
+
+
+def fuzzy_max_edits(op, word):
+    """
+    Ediciones que admite el predicado ``op`` de spaCy para ``word``.
+    """
+    if op == "FUZZY":
+        # Igual que spacy.matcher.levenshtein.levenshtein_compare con fuzzy=-1
+        return max(2, round(0.3 * len(word)))
+    return int(op[len("FUZZY"):])
+
+
+def typo_variants(word, max_edits):
+    """
+    Variantes en minúscula de ``word`` hasta ``max_edits`` ediciones (ver el
+    docstring del módulo para las distancias mayores a 1).
+    """
+    bases = {word.lower(), strip_accents(word.lower())}
+    variants = set(bases)
+    if max_edits >= 1:
+        for base in bases:
+            variants |= edits1(base)
+    if max_edits >= 2:
+        variants |= {typo for variant in list(variants) for typo in common_typos(variant)}
+    variants.discard("")
+    return variants
+
+
+def expand_token(token_spec):
+    """
+    Devuelve una copia del token del patrón con los predicados FUZZY sobre
+    LOWER reemplazados por el conjunto de variantes.
+    """
+    value = token_spec.get("LOWER")
+    op = next((op for op in FUZZY_OPS if op in value), None) if isinstance(value, dict) else None
+    if op is None:
+        return token_spec
+    words = value[op]["IN"] if isinstance(value[op], dict) else [value[op]]
+    variants = set()
+    for word in words:
+        variants |= typo_variants(word, fuzzy_max_edits(op, word))
+    return {**token_spec, "LOWER": {"IN": sorted(variants)}}
+
+
+def expand_patterns(patterns):
+    """
+    Aplica expand_token a todos los tokens de una lista de patrones.
+    """
+    return [[expand_token(token_spec) for token_spec in pattern] for pattern in patterns]
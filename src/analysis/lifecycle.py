@@ -0,0 +1,150 @@
+"""
+Precalentamiento del modelo y estado para el orquestador.
+
+``config`` carga el modelo de spaCy al importarse y ``app.py`` (como
+``async_app.py``) importa los detectores, que compilan los paquetes de
+patrones y cargan el clasificador de shaming: cuando el servidor atiende
+solicitudes eso ya está hecho. La primera solicitud igual tardaba, porque
+la primera pasada del pipeline inicializa cachés internas (vocabulario,
+tablas del lematizador, filas de vectores). ModelLifecycle hace esa pasada
+una vez, antes de atender tráfico: procesa los textos de los ejemplos
+incluidos en el repositorio con el pipeline completo y con todos los
+detectores, sin pasar por la caché de resultados.
+
+``/health`` (liveness) responde siempre que el proceso atiende solicitudes;
+``/ready`` (readiness) responde 503 hasta que termina el precalentamiento.
+Con ``MODEL_WARMUP=sync`` se precalienta al importar la app (con gunicorn,
+en el maestro antes del fork, así los workers ya nacen listos); con
+``background`` en un hilo, mientras ``/ready`` responde 503; con ``off`` el
+proceso queda listo enseguida.
+
+Con gunicorn y ``background`` el maestro no crea el hilo: hacer fork con un
+hilo en curso puede dejar a los workers con locks tomados. Cada worker
+precalienta en su propio hilo desde el hook ``post_fork`` (ver
+gunicorn.conf.py y ``MODEL_WARMUP_IN_WORKERS``).
+"""
+
+import json
+import os
+import threading
+import time
+
+from config import BASE_DIR, MODEL_WARMUP, MODEL_WARMUP_IN_WORKERS, SPACY_MODEL
+
+# Ejemplos incluidos en el repositorio que se usan para precalentar
+WARMUP_FILES = ("ejemplos_urgency.json", "ejemplos_scarcity.json", "ejemplos.json")
+
+
+def warmup_texts(files=WARMUP_FILES):
+    """
+    Junta los textos de los ejemplos (formato de /urgency, /scarcity o
+    /shaming 0.2). Los archivos que no existen se ignoran.
+    """
+    texts = []
+    for name in files:
+        path = os.path.join(BASE_DIR, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        texts.extend(item["text"] for item in data.get("texts", []))
+        if "Title" in data:
+            texts.append(data["Title"])
+        texts.extend(item["Text"] for item in data.get("Texts", []))
+        texts.extend(item["Label"] for item in data.get("Buttons", []))
+    return texts
+
+
+class ModelLifecycle:
+    """
+    Estado del precalentamiento en el proceso: "starting", "warming",
+    "ready" o "failed".
+    """
+
+    def __init__(self):
+        self.state = "starting"
+        self.error = None
+        self.warmup_seconds = None
+        self.warmup_texts = 0
+        self._lock = threading.Lock()
+        self._started = False
+
+    def warm_up(self, texts=None):
+        """
+        Procesa ``texts`` (por defecto los de WARMUP_FILES) con el pipeline
+        completo y con los detectores en modo normal y detallado.
+        """
+        from src.analysis.analysis import current_detectors
+        from src.analysis.batch import parse_texts, run_detectors
+        from src.analysis.cache import ResultCache
+
+        self.state = "warming"
+        texts = warmup_texts() if texts is None else texts
+        start = time.perf_counter()
+        parse_texts(texts)
+        # Sin caché: los resultados del precalentamiento no cuentan como aciertos
+        detectors = current_detectors()
+        detectors += [detector.detailed for detector in detectors if detector.detailed is not None]
+        run_detectors(texts, detectors, ResultCache(max_entries=0))
+        self.warmup_seconds = time.perf_counter() - start
+        self.warmup_texts = len(texts)
+
+    def _run(self, warm):
+        try:
+            if warm:
+                self.warm_up()
+            self.state = "ready"
+        except Exception as e:  # noqa: BLE001  (se informa en /ready)
+            self.state = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+
+    def start(self, mode=MODEL_WARMUP, in_workers=MODEL_WARMUP_IN_WORKERS):
+        """
+        Precalienta según ``mode`` ("sync", "background" u "off"). Con
+        ``background`` e ``in_workers`` no hace nada: el hilo lo crea cada
+        worker con start_in_worker. Llamadas posteriores no hacen nada.
+        """
+        if mode == "background" and in_workers:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        if mode == "background":
+            self._start_thread()
+        else:
+            self._run(warm=mode != "off")
+
+    def start_in_worker(self, mode=MODEL_WARMUP):
+        """
+        Hook ``post_fork`` de gunicorn: con ``background`` crea el hilo de
+        precalentamiento en el worker recién creado.
+        """
+        if mode == "background":
+            self.start(mode, in_workers=False)
+
+    def _start_thread(self):
+        threading.Thread(target=self._run, args=(True,), name="warmup", daemon=True).start()
+
+    def ready(self):
+        return self.state == "ready"
+
+    def status(self):
+        """
+        Estado para /ready.
+        """
+        from src.shaming.shaming import CLASSIFIER_STATUS
+
+        status = {
+            "status": self.state,
+            "model": SPACY_MODEL,
+            "warmup_seconds": self.warmup_seconds,
+            "warmup_texts": self.warmup_texts,
+            "shaming_model": CLASSIFIER_STATUS,
+        }
+        if self.error is not None:
+            status["error"] = self.error
+        return status
+
+
+LIFECYCLE = ModelLifecycle()
@@ -0,0 +1,81 @@
+"""
+Modo detallado de los detectores de urgencia y escasez.
+
+En lugar de un booleano por texto, el modo detallado devuelve cada
+coincidencia con el nombre de la regla, sus offsets de caracteres en el
+texto y los de la oración que la contiene:
+
+    {"rule": "fake_scarcity", "text": "Solo quedan 3",
+     "start": 0, "end": 13, "sentence_start": 0, "sentence_end": 23}
+
+Así la extensión puede enviar contenedores completos y ubicar el patrón
+dentro del texto, sin partirlo en fragmentos. Las coincidencias salen del
+mismo Doc (un único parseo) y de los mismos matchers compilados que el modo
+normal; el Detector detallado se compila junto con el normal y queda en su
+campo ``detailed`` (ver src/analysis/batch.py).
+"""
+
+from spacy.util import filter_spans
+
+from config import NLP
+from src.analysis.batch import Detector
+
+# Los atributos del modo detallado agregan los límites de oración
+SENT_ATTRS = frozenset({"SENT"})
+
+
+def match_details(rule, span):
+    """
+    Describe una coincidencia del Doc como dict serializable a JSON.
+
+    Los patrones pueden empezar con tokens opcionales de puntuación, así que
+    una coincidencia puede cruzar un límite de oración (``". Quedan pocas"``
+    en ``"Aprovecha. Quedan pocas"``): el rango de oración va del inicio de
+    la oración del primer token al final de la del último.
+    """
+    doc = span.doc
+    return {
+        "rule": rule,
+        "text": span.text,
+        "start": span.start_char,
+        "end": span.end_char,
+        "sentence_start": doc[span.start].sent.start_char,
+        "sentence_end": doc[span.end - 1].sent.end_char,
+    }
+
+
+def matcher_spans(matcher, doc):
+    """
+    Aplica un Matcher o PhraseMatcher sobre ``doc`` y devuelve
+    (regla, Span) en orden de aparición.
+
+    Los patrones con tokens opcionales generan varias coincidencias
+    superpuestas de la misma regla; de cada grupo se conserva la más larga.
+    """
+    by_rule = {}
+    for match_id, start, end in matcher(doc):
+        by_rule.setdefault(NLP.vocab.strings[match_id], []).append(doc[start:end])
+    spans = [(rule, span) for rule, group in by_rule.items() for span in filter_spans(group)]
+    return sorted(spans, key=lambda item: (item[1].start, item[1].end, item[0]))
+
+
+def detailed_detector(detector, detect_matches):
+    """
+    Arma el Detector detallado de ``detector``: comparte versión, prefiltro
+    y matchers compilados, y devuelve la lista de coincidencias de
+    ``detect_matches(doc)`` (vacía si no hay ninguna).
+
+    El nombre es distinto (``<detector>_matches``) para que la caché guarde
+    por separado los resultados de ambos modos. Los offsets de oración
+    dependen de si las oraciones las definió el parser o el senter:
+    run_detectors lo agrega a la versión (ver batch.profile_version).
+    """
+    return Detector(
+        f"{detector.name}_matches",
+        detector.version,
+        detector.attrs | SENT_ATTRS,
+        detect_matches,
+        compiled=detector.compiled,
+        prefilter=detector.prefilter,
+        no_match=[],
+    )
@@ -0,0 +1,150 @@
+"""
+Micro-lotes entre solicitudes concurrentes.
+
+Con varios hilos por worker (``GUNICORN_THREADS``) cada solicitud en curso
+procesaba sus pocos textos con su propio ``NLP.pipe``. Con textos cortos
+(botones, etiquetas) domina el costo fijo de cada llamada. El
+MicroBatcher junta los textos que llegan de solicitudes concurrentes
+durante a lo sumo ``max_wait`` segundos (o hasta reunir ``max_texts``
+textos), los procesa con una única llamada y devuelve a cada solicitud sus
+Docs, en el mismo orden.
+
+El lote combinado se procesa con la unión de los atributos que pide cada
+solicitud (ver batch.disabled_components): un Doc con anotaciones de más
+sirve igual a cualquier detector, salvo por los límites de oración, que
+cambian si el parser reemplaza al senter. Por eso las solicitudes se agrupan
+por perfil (``profile``, normalmente batch.sentence_source) y cada perfil se
+procesa por separado.
+
+Solo ayuda cuando hay varios hilos atendiendo solicitudes en el mismo
+proceso; con un hilo por worker cada solicitud esperaría ``max_wait`` sin
+compañía, por eso está desactivado por defecto (``MICROBATCH_MAX_WAIT_MS``).
+"""
+
+import os
+import queue
+import threading
+import time
+
+
+class _Pending:
+    """
+    Textos de una solicitud a la espera de ser procesados.
+    """
+
+    __slots__ = ("texts", "attrs", "done", "docs", "error")
+
+    def __init__(self, texts, attrs):
+        self.texts = texts
+        self.attrs = attrs
+        self.done = threading.Event()
+        self.docs = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Agrupa los textos de llamadas concurrentes a ``parse`` en una sola
+    llamada a ``parse_texts``.
+
+    Parámetros:
+        parse_texts (callable): Función (textos, attrs) -> list[Doc]
+            (normalmente batch.parse_texts).
+        max_wait (float): Segundos que se espera a otras solicitudes desde
+            que llega la primera del lote.
+        max_texts (int): Cantidad de textos a partir de la cual el lote se
+            procesa sin seguir esperando.
+        profile (callable, opcional): Función attrs -> clave; solo se
+            procesan juntas las solicitudes con la misma clave.
+    """
+
+    def __init__(self, parse_texts, max_wait, max_texts, profile=None):
+        self.parse_texts = parse_texts
+        self.max_wait = max_wait
+        self.max_texts = max_texts
+        self.profile = profile
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+        self.batches = 0
+        self.requests = 0
+
+    def _ensure_worker(self):
+        # El hilo no sobrevive al fork de los workers de gunicorn: se crea
+        # en el primer uso dentro de cada proceso
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, args=(self._queue,), name="microbatch", daemon=True).start()
+            return self._queue
+
+    def parse(self, texts, attrs=None):
+        """
+        Procesa ``texts`` junto con los de otras solicitudes concurrentes.
+
+        Retorna:
+            list[Doc]: Un Doc por cada texto, en el mismo orden.
+        """
+        if not texts:
+            return []
+        pending = _Pending(list(texts), attrs)
+        self._ensure_worker().put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.docs
+
+    def _collect(self, work_queue):
+        """
+        Espera la primera solicitud y junta las que lleguen dentro de max_wait.
+        """
+        batch = [work_queue.get()]
+        count = len(batch[0].texts)
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_texts:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                pending = work_queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            count += len(pending.texts)
+        return batch
+
+    def _run(self, work_queue):
+        while True:
+            groups = {}
+            for pending in self._collect(work_queue):
+                key = self.profile(pending.attrs) if self.profile is not None else None
+                groups.setdefault(key, []).append(pending)
+            for batch in groups.values():
+                self._parse_batch(batch)
+
+    def _parse_batch(self, batch):
+        if any(pending.attrs is None for pending in batch):
+            attrs = None
+        else:
+            attrs = set().union(*(pending.attrs for pending in batch))
+        try:
+            docs = self.parse_texts([text for pending in batch for text in pending.texts], attrs)
+        except Exception as e:  # noqa: BLE001  (se propaga a cada solicitud del lote)
+            for pending in batch:
+                pending.error = e
+                pending.done.set()
+            return
+        self.batches += 1
+        self.requests += len(batch)
+        offset = 0
+        for pending in batch:
+            pending.docs = docs[offset:offset + len(pending.texts)]
+            offset += len(pending.texts)
+            pending.done.set()
+
+    def stats(self):
+        """
+        Devuelve la cantidad de lotes procesados y de solicitudes atendidas.
+        """
+        return {"batches": self.batches, "requests": self.requests}
@@ -0,0 +1,221 @@
+"""
+Paquetes de patrones externos y recargables en caliente.
+
+Los patrones de cada detector viven en archivos JSON (``PATTERNS_DIR``, por
+defecto ``patterns/``). Cada detector registra una función que compila su
+paquete en un Detector (matchers incluidos). Al recargar se leen, validan y
+compilan todos los paquetes pedidos y recién entonces se reemplazan los
+Detectors actuales; si algo falla se sigue usando la versión anterior. No
+hace falta reiniciar el proceso ni volver a cargar ``NLP``.
+
+Formato común de un paquete:
+{
+    "description": "Texto libre",
+    "rules": {
+        "NOMBRE_REGLA": [
+            [{"LOWER": "solo"}, {"LOWER": "hoy"}],
+            {"description": "Ejemplo de lo que detecta", "pattern": [{"LOWER": "hoy"}]}
+        ]
+    },
+    ...campos propios de cada detector (ej. "phrases")
+}
+"""
+
+import json
+import os
+import threading
+import time
+
+from config import PATTERNS_DIR, PATTERNS_WATCH_IN_WORKERS, PATTERNS_WATCH_INTERVAL
+
+
+class PatternPackError(ValueError):
+    """
+    Un paquete de patrones no existe, no es JSON válido o no respeta el formato.
+    """
+
+
+# nombre -> (función que compila el paquete, campos extra requeridos {campo: tipo})
+_compilers = {}
+# nombre -> (paquete, Detector, mtime del archivo)
+_current = {}
+_lock = threading.Lock()
+
+
+def pack_path(name):
+    return os.path.join(PATTERNS_DIR, f"{name}.json")
+
+
+def load_pack(name, fields=None):
+    """
+    Lee y valida el paquete de patrones ``name``.
+
+    Parámetros:
+        name (str): Nombre del paquete (archivo ``<name>.json``).
+        fields (dict, opcional): Campos extra obligatorios y su tipo.
+
+    Lanza:
+        PatternPackError: Si el archivo no existe o el formato es inválido.
+    """
+    path = pack_path(name)
+    try:
+        with open(path, encoding="utf-8") as f:
+            pack = json.load(f)
+    except (OSError, ValueError) as e:
+        raise PatternPackError(f"No se pudo leer {path}: {e}") from e
+
+    if not isinstance(pack, dict):
+        raise PatternPackError(f"{path}: se esperaba un objeto JSON")
+    rules = pack.get("rules")
+    if not isinstance(rules, dict) or not rules:
+        raise PatternPackError(f"{path}: 'rules' debe ser un objeto no vacío")
+    for rule_name, items in rules.items():
+        if not isinstance(items, list) or not items:
+            raise PatternPackError(f"{path}: la regla {rule_name} debe tener una lista de patrones")
+        for item in items:
+            pattern = item.get("pattern") if isinstance(item, dict) else item
+            if not isinstance(pattern, list) or not pattern or not all(isinstance(t, dict) for t in pattern):
+                raise PatternPackError(f"{path}: patrón inválido en la regla {rule_name}: {item!r}")
+    for field, field_type in (fields or {}).items():
+        if not isinstance(pack.get(field), field_type):
+            raise PatternPackError(f"{path}: falta el campo '{field}' ({field_type.__name__})")
+    return pack
+
+
+def rule_patterns(pack):
+    """
+    Devuelve las reglas del paquete como {nombre: [patrón, ...]}, sin las
+    descripciones, listas para ``Matcher.add``.
+    """
+    return {
+        rule_name: [item["pattern"] if isinstance(item, dict) else item for item in items]
+        for rule_name, items in pack["rules"].items()
+    }
+
+
+def _compile(name):
+    compile_pack, fields = _compilers[name]
+    pack = load_pack(name, fields)
+    mtime = os.path.getmtime(pack_path(name))
+    try:
+        detector = compile_pack(pack)
+    except (ValueError, KeyError, TypeError) as e:
+        # Matcher(validate=True) lanza MatchPatternError (ValueError) con patrones inválidos
+        raise PatternPackError(f"{pack_path(name)}: {e}") from e
+    return pack, detector, mtime
+
+
+def register(name, compile_pack, fields=None):
+    """
+    Registra un detector y compila su paquete por primera vez.
+
+    Parámetros:
+        name (str): Nombre del paquete y del detector.
+        compile_pack (callable): Función paquete -> Detector.
+        fields (dict, opcional): Campos extra obligatorios del paquete.
+
+    Retorna:
+        Detector: El detector compilado.
+    """
+    _compilers[name] = (compile_pack, fields)
+    compiled = _compile(name)
+    with _lock:
+        _current[name] = compiled
+    return compiled[1]
+
+
+def get_detector(name):
+    """
+    Devuelve el Detector vigente. Conviene tomarlo una vez por solicitud para
+    que toda la solicitud use la misma versión de los patrones.
+    """
+    return _current[name][1]
+
+
+def get_pack(name):
+    """
+    Devuelve el contenido del paquete vigente.
+    """
+    return _current[name][0]
+
+
+def pack_versions():
+    """
+    Devuelve {nombre: versión} de los detectores registrados.
+    """
+    return {name: detector.version for name, (_, detector, _) in _current.items()}
+
+
+def reload_packs(names=None):
+    """
+    Vuelve a leer y compilar los paquetes indicados (todos por defecto) y los
+    reemplaza de forma atómica. Si alguno falla no se reemplaza ninguno.
+
+    Lanza:
+        PatternPackError: Si algún paquete es inválido.
+
+    Retorna:
+        dict: {nombre: versión} de los paquetes recargados.
+    """
+    if names is None:
+        names = list(_compilers)
+    compiled = {name: _compile(name) for name in names}
+    with _lock:
+        _current.update(compiled)
+    return {name: detector.version for name, (_, detector, _) in compiled.items()}
+
+
+def reload_if_changed():
+    """
+    Recarga los paquetes cuyo archivo cambió desde la última compilación.
+    """
+    changed = []
+    for name, (_, _, mtime) in list(_current.items()):
+        try:
+            if os.path.getmtime(pack_path(name)) != mtime:
+                changed.append(name)
+        except OSError:
+            continue
+    if not changed:
+        return {}
+    return reload_packs(changed)
+
+
+def _watch(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            reloaded = reload_if_changed()
+        except PatternPackError as e:
+            print(f"No se recargaron los patrones: {e}")
+        else:
+            if reloaded:
+                print(f"Patrones recargados: {reloaded}")
+
+
+def start_watcher(interval, in_workers=PATTERNS_WATCH_IN_WORKERS):
+    """
+    Inicia un hilo que revisa los archivos cada ``interval`` segundos y
+    recarga los que cambiaron. Los errores se informan por consola y se
+    sigue usando la versión anterior.
+
+    Con ``in_workers`` (gunicorn) no hace nada: el maestro importa la app
+    antes del fork y un fork con el hilo en curso puede dejar locks tomados
+    en los workers. Cada worker inicia el suyo con start_watcher_in_worker;
+    los procesos auxiliares (n_process de spaCy, el pool de bulk o de
+    async_app.py) no revisan los archivos.
+    """
+    if in_workers:
+        return None
+    thread = threading.Thread(target=_watch, args=(interval,), name="pattern-pack-watcher", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_watcher_in_worker(interval=PATTERNS_WATCH_INTERVAL):
+    """
+    Hook ``post_fork`` de gunicorn: inicia el hilo en el worker recién creado.
+    """
+    if interval > 0:
+        return start_watcher(interval, in_workers=False)
+    return None
@@ -0,0 +1,326 @@
+"""
+Prefiltro léxico previo al análisis con spaCy.
+
+La mayoría de los textos de una página (precios, menús, nombres de producto)
+no pueden coincidir con ninguna regla de urgencia o escasez, pero igual
+pagaban una pasada completa del pipeline. El prefiltro se arma a partir de
+los mismos patrones del paquete (ver src/analysis/packs.py) y solo usa el
+tokenizador: para cada patrón toma los tokens obligatorios (sin OP "?", "*",
+"!" ni cuantificadores que admiten cero repeticiones, como "{0,2}" o "{,3}")
+y sus condiciones léxicas (LOWER, TEXT, ORTH, REGEX, FUZZY, IS_*,
+LIKE_NUM, LEMMA). Si en el texto no hay ningún token que cumpla cada una de
+esas condiciones para al menos un patrón, el detector no puede encontrar
+nada y el texto no se procesa.
+
+Las condiciones sobre atributos que requieren el pipeline (POS, MORPH, DEP,
+IS_SENT_START, ...) se consideran siempre cumplidas. LEMMA es la única
+aproximada: se compara el comienzo del token con la raíz del lema (con las
+alternancias vocálicas e→ie/i y o/u→ue), con las excepciones del
+lematizador y con las formas irregulares declaradas en ``lemma_forms`` del
+paquete. ``python -m src.analysis.prefilter``
+verifica que el prefiltro no descarte ningún texto de los ejemplos que el
+detector sí detecta, ni los de QUANTIFIER_CASES.
+"""
+
+import re
+import sys
+import json
+import unicodedata
+
+from spacy.matcher.levenshtein import levenshtein_compare
+
+from config import NLP
+
+# Operadores con los que un token del patrón puede no aparecer en el texto
+OPTIONAL_OPS = {"?", "*", "!"}
+# Cuantificadores de spaCy: {n}, {n,m}, {,m} y {n,}
+_QUANTIFIER = re.compile(r"^\{(\d*)(,\d*)?\}$")
+# Patrones con cuantificadores y un texto con el que el Matcher coincide
+# (ver verify_quantifiers)
+QUANTIFIER_CASES = [
+    ([{"LOWER": "solo"}, {"LOWER": "por", "OP": "{0,1}"}, {"LOWER": "hoy"}], "Solo hoy"),
+    ([{"LOWER": "últimas", "OP": "{,2}"}, {"LOWER": "unidades"}], "Quedan unidades"),
+    ([{"LOWER": "solo"}, {"LOWER": "por", "OP": "{0}"}, {"LOWER": "hoy"}], "Solo hoy"),
+    ([{"IS_DIGIT": True, "OP": "{1,}"}, {"LOWER": "en"}, {"LOWER": "stock"}], "3 en stock"),
+]
+# Atributos booleanos que el tokenizador ya resuelve
+LEXICAL_FLAGS = {
+    "IS_ALPHA", "IS_ASCII", "IS_DIGIT", "IS_LOWER", "IS_UPPER", "IS_TITLE",
+    "IS_PUNCT", "IS_SPACE", "IS_STOP", "IS_BRACKET", "IS_QUOTE",
+    "IS_LEFT_PUNCT", "IS_RIGHT_PUNCT", "IS_CURRENCY",
+    "LIKE_NUM", "LIKE_URL", "LIKE_EMAIL",
+}
+# Cantidad de letras de la raíz del lema que debe compartir el token
+LEMMA_PREFIX_LENGTH = 3
+_VOWEL_ALTERNATIONS = {"e": ["ie", "i"], "o": ["ue"], "u": ["ue"]}
+
+
+def is_optional(op):
+    """
+    Devuelve True si un token con el operador ``op`` puede no aparecer en el
+    texto: "?", "*", "!" o un cuantificador con mínimo 0 ("{0,2}", "{,3}").
+    """
+    if op in OPTIONAL_OPS:
+        return True
+    match = _QUANTIFIER.match(op or "")
+    return match is not None and int(match.group(1) or 0) == 0
+
+
+def _strip_char(char):
+    base = "".join(c for c in unicodedata.normalize("NFD", char) if not unicodedata.combining(c))
+    return base if len(base) == 1 else char
+
+
+# Tabla para quitar tildes y diéresis con str.translate. Conserva la "ñ" y la
+# longitud del texto (un carácter por otro), así los offsets no cambian.
+_ACCENT_TABLE = {
+    code: _strip_char(chr(code))
+    for code in range(0xC0, 0x250)
+    if chr(code) not in "ñÑ" and _strip_char(chr(code)) != chr(code)
+}
+
+
+def strip_accents(text):
+    """
+    Quita tildes y diéresis de un texto sin cambiar su longitud.
+    """
+    return text.translate(_ACCENT_TABLE)
+
+
+def normalize(text):
+    """
+    Minúscula y sin tildes ni diéresis, igual que las frases de urgencia.
+    """
+    return strip_accents(text.lower())
+
+
+def lemma_prefixes(lemma):
+    """
+    Comienzos posibles de las formas flexionadas de ``lemma``: la raíz (sin
+    la terminación del infinitivo o la vocal final) con y sin alternancia
+    vocálica en su última vocal, recortada a LEMMA_PREFIX_LENGTH letras.
+    """
+    word = normalize(lemma)
+    if word.endswith("se") and word[:-2].endswith(("ar", "er", "ir")):
+        word = word[:-2]
+    if len(word) > 3 and word.endswith(("ar", "er", "ir")):
+        stem = word[:-2]
+    elif len(word) > 3 and word[-1] in "aeos":
+        stem = word[:-1]
+    else:
+        return {word}
+    stems = {stem}
+    vowels = [i for i, c in enumerate(stem) if c in "aeiou"]
+    if vowels:
+        i = vowels[-1]
+        for alternative in _VOWEL_ALTERNATIONS.get(stem[i], []):
+            stems.add(stem[:i] + alternative + stem[i + 1:])
+    return {s[:LEMMA_PREFIX_LENGTH] for s in stems}
+
+
+def lemma_exceptions():
+    """
+    Invierte las tablas de excepciones del lematizador de NLP:
+    {lema: {formas}} (ej. "él": {"se", ...}).
+    """
+    inverse = {}
+    if "lemmatizer" not in NLP.pipe_names:
+        return inverse
+    lookups = NLP.get_pipe("lemmatizer").lookups
+    if not lookups.has_table("lemma_exc"):
+        return inverse
+    for forms in lookups.get_table("lemma_exc").values():
+        for form, lemmas in forms.items():
+            for lemma in lemmas:
+                inverse.setdefault(lemma, set()).add(normalize(form))
+    return inverse
+
+
+def _values(value):
+    """
+    Normaliza el valor de una condición de patrón a (operador, valores).
+    """
+    if isinstance(value, dict):
+        for op in ("IN", "REGEX", "FUZZY", "FUZZY1", "FUZZY2", "FUZZY3", "FUZZY4", "FUZZY5"):
+            if op in value:
+                inner = value[op]
+                if op.startswith("FUZZY") and isinstance(inner, dict):
+                    return op, inner.get("IN", [])
+                return op, inner if isinstance(inner, list) else [inner]
+        return None, None
+    return "==", [value]
+
+
+def _token_condition(attr, value, lemma_forms, exceptions):
+    """
+    Convierte una condición de un token del patrón en una función
+    Token -> bool sobre un Doc solo tokenizado, o None si no se puede
+    evaluar sin el pipeline.
+    """
+    if attr in LEXICAL_FLAGS:
+        return lambda token: getattr(token, attr.lower()) == value
+    if attr not in ("LOWER", "TEXT", "ORTH", "LEMMA"):
+        return None
+    op, values = _values(value)
+    if op is None:
+        return None
+
+    if attr == "LEMMA":
+        if op not in ("==", "IN"):
+            return None
+        prefixes = set()
+        forms = set()
+        for lemma in values:
+            prefixes.update(lemma_prefixes(lemma))
+            forms.update(normalize(form) for form in lemma_forms.get(lemma, []))
+            forms.update(exceptions.get(lemma, ()))
+        prefixes = tuple(sorted(prefixes))
+        forms = frozenset(forms)
+        return lambda token: normalize(token.text).startswith(prefixes) or normalize(token.text) in forms
+
+    get = (lambda token: token.lower_) if attr == "LOWER" else (lambda token: token.text)
+    if op in ("==", "IN"):
+        values = frozenset(values)
+        return lambda token: get(token) in values
+    if op == "REGEX":
+        regex = re.compile(values[0])
+        return lambda token: regex.search(get(token)) is not None
+    fuzzy = -1 if op == "FUZZY" else int(op[-1])
+    return lambda token: any(levenshtein_compare(get(token), v, fuzzy) for v in values)
+
+
+class Prefilter:
+    """
+    Decide, solo con el tokenizador, si un texto puede coincidir con alguno
+    de los patrones.
+
+    Parámetros:
+        patterns (Iterable[list[dict]]): Patrones del Matcher.
+        phrases (Iterable[str], opcional): Frases del PhraseMatcher; se
+            comparan sin tildes ni mayúsculas, como en urgencia.
+        lemma_forms (dict, opcional): Formas irregulares por lema, para
+            los lemas cuyas formas no comparten la raíz (ej. "ir": ["ve"]).
+    """
+
+    def __init__(self, patterns, phrases=(), lemma_forms=None):
+        lemma_forms = lemma_forms or {}
+        exceptions = lemma_exceptions()
+        # Cada patrón queda como una lista de condiciones obligatorias; cada
+        # condición es una lista de funciones que un mismo token debe cumplir
+        self.patterns = []
+        for pattern in patterns:
+            required = []
+            for token_spec in pattern:
+                if is_optional(token_spec.get("OP")):
+                    continue
+                checks = [
+                    check
+                    for attr, value in token_spec.items()
+                    if attr != "OP"
+                    for check in [_token_condition(attr, value, lemma_forms, exceptions)]
+                    if check is not None
+                ]
+                if checks:
+                    required.append(checks)
+            self.patterns.append(required)
+        self.phrase_starts = frozenset(
+            phrase_doc[0].lower_ for phrase_doc in NLP.tokenizer.pipe(normalize(p) for p in phrases)
+            if len(phrase_doc)
+        )
+        # Un patrón sin condiciones léxicas puede coincidir con cualquier texto
+        self.always = any(not required for required in self.patterns)
+
+    def __call__(self, text):
+        """
+        Retorna:
+            bool: False si el texto no puede coincidir con ningún patrón.
+        """
+        if self.always:
+            return True
+        if self.phrase_starts:
+            if any(token.lower_ in self.phrase_starts for token in NLP.make_doc(normalize(text))):
+                return True
+        tokens = NLP.make_doc(text)
+        for required in self.patterns:
+            if all(any(all(check(token) for check in checks) for token in tokens) for checks in required):
+                return True
+        return False
+
+
+def verify_prefilter(detector, texts):
+    """
+    Ejecuta el detector completo (sin prefiltro ni caché) sobre ``texts`` y
+    devuelve los textos con alguna detección que el prefiltro descartaría.
+
+    Retorna:
+        tuple: (lista de falsos negativos, cantidad de textos que el
+            prefiltro descarta)
+    """
+    from src.analysis.batch import parse_texts
+
+    docs = parse_texts(texts, detector.attrs)
+    false_negatives = []
+    skipped = 0
+    for text, doc in zip(texts, docs):
+        if detector.prefilter(text):
+            continue
+        skipped += 1
+        if detector.detect_doc(doc):
+            false_negatives.append(text)
+    return false_negatives, skipped
+
+
+def verify_quantifiers(cases=QUANTIFIER_CASES):
+    """
+    Comprueba que el prefiltro no descarte los textos de ``cases`` con los
+    que el Matcher coincide.
+
+    Retorna:
+        list: Textos que el prefiltro descartaría.
+    """
+    from spacy.matcher import Matcher
+
+    false_negatives = []
+    for pattern, text in cases:
+        matcher = Matcher(NLP.vocab, validate=True)
+        matcher.add("CASE", [pattern])
+        if matcher(NLP.make_doc(text)) and not Prefilter([pattern])(text):
+            false_negatives.append(text)
+    return false_negatives
+
+
+def main(argv):
+    """
+    Verifica el prefiltro contra los corpus de ejemplo.
+
+    Uso:
+        python -m src.analysis.prefilter [urgency=ejemplos_urgency.json] [scarcity=ejemplos_scarcity.json]
+    """
+    from src.analysis.packs import get_detector
+    import src.scarcity.scarcity  # noqa: F401  (registra los detectores)
+    import src.urgency.urgency  # noqa: F401
+
+    corpora = {"urgency": "ejemplos_urgency.json", "scarcity": "ejemplos_scarcity.json"}
+    for arg in argv:
+        name, _, path = arg.partition("=")
+        corpora[name] = path
+
+    failed = False
+    for name, path in corpora.items():
+        with open(path, encoding="utf-8") as f:
+            texts = [item["text"] for item in json.load(f)["texts"]]
+        false_negatives, skipped = verify_prefilter(get_detector(name), texts)
+        print(f"{name}: {len(texts)} textos, {skipped} descartados por el prefiltro, "
+              f"{len(false_negatives)} falsos negativos")
+        for text in false_negatives:
+            print(f"  - {text}")
+        failed = failed or bool(false_negatives)
+    false_negatives = verify_quantifiers()
+    print(f"cuantificadores: {len(QUANTIFIER_CASES)} casos, {len(false_negatives)} falsos negativos")
+    for text in false_negatives:
+        print(f"  - {text}")
+    return 1 if failed or false_negatives else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
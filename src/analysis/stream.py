@@ -0,0 +1,180 @@
+"""
+Análisis en streaming con NDJSON (un JSON por línea).
+
+Las páginas muy largas se envían como una secuencia de líneas, cada una con
+un texto en el mismo formato que los elementos de ``texts`` de ``/analyze``,
+``/urgency`` o ``/scarcity``:
+
+    {"text": "Solo quedan 3 unidades!", "path": "/producto/123", "id": "a1"}
+    {"text": "Oferta limitada"}
+
+Las líneas se leen a medida que llegan, se agrupan en lotes de
+NLP_BATCH_SIZE textos y la respuesta de cada lote se escribe apenas termina
+de procesarse, con una línea por texto y en el mismo orden:
+
+    {"line": 0, "instance": {...}}
+    {"line": 1, "error": {...}}
+
+Así la memoria depende del tamaño del lote y no del de la página. Todos los
+lotes de una misma solicitud usan los mismos Detectors, aunque los paquetes
+de patrones se recarguen mientras tanto.
+
+Se aplican los mismos límites que en ``async_app.py`` (MAX_REQUEST_TEXTS,
+MAX_REQUEST_CHARS, MAX_REQUEST_BYTES). Como la respuesta ya empezó, al
+superarlos no se puede responder 413: se escriben los resultados de las
+líneas anteriores, una última línea con ``error`` y se deja de leer.
+
+Con un cuerpo chunked (sin Content-Length) una línea sin salto de línea
+podría ocupar toda la memoria antes de llegar a contarla. read_lines lee
+cada línea con ``readline(STREAM_MAX_LINE_BYTES + 1)``: de una línea más
+larga solo se guarda ese tramo, el resto se descarta por partes y la línea
+responde con ``error``.
+"""
+
+import json
+from collections import namedtuple
+
+from marshmallow import ValidationError
+
+from config import MAX_REQUEST_BYTES, MAX_REQUEST_CHARS, MAX_REQUEST_TEXTS, NLP_BATCH_SIZE, STREAM_MAX_LINE_BYTES
+from src.analysis.analysis import DETECTOR_NAMES, analyze_instance
+from src.analysis.batch import run_detectors
+from src.analysis.packs import get_detector
+from src.analysis.types import AnalyzeInstanceSchema, AnalyzeTextSchema
+from src.scarcity.scarcity import scarcity_instance
+from src.scarcity.types import ScarcityInstanceSchema, TextSchema
+from src.urgency.types import UrgencyInstanceSchema, UrgencyTextSchema
+from src.urgency.urgency import urgency_instance
+
+# Para cada endpoint: esquema de cada línea de entrada, detectores que se
+# ejecutan, función que arma la instancia a partir de los resultados de
+# run_detectors y esquema de la instancia de salida
+StreamEndpoint = namedtuple("StreamEndpoint", ["text_schema", "detectors", "build_instance", "instance_schema"])
+
+STREAM_ENDPOINTS = {
+    "analyze": StreamEndpoint(AnalyzeTextSchema, DETECTOR_NAMES, analyze_instance, AnalyzeInstanceSchema),
+    "urgency": StreamEndpoint(
+        UrgencyTextSchema, ["urgency"],
+        lambda item, results: urgency_instance(item, results["urgency"]),
+        UrgencyInstanceSchema,
+    ),
+    "scarcity": StreamEndpoint(
+        TextSchema, ["scarcity"],
+        lambda item, results: scarcity_instance(item, results["scarcity"]),
+        ScarcityInstanceSchema,
+    ),
+}
+
+
+# Línea que superó STREAM_MAX_LINE_BYTES (ver read_lines); size es su tamaño total
+LongLine = namedtuple("LongLine", ["size", "max_size"])
+
+
+def read_lines(stream, max_size=STREAM_MAX_LINE_BYTES, max_bytes=MAX_REQUEST_BYTES):
+    """
+    Genera las líneas de ``stream`` (bytes) sin guardar en memoria más de
+    ``max_size`` bytes por línea, salto de línea incluido. En lugar de cada
+    línea más larga genera un LongLine; si la línea sola supera
+    ``max_bytes`` se deja de leer (stream_results corta la solicitud).
+    """
+    while True:
+        line = stream.readline(max_size + 1)
+        if not line:
+            return
+        if len(line) <= max_size:
+            yield line
+            continue
+        size = len(line)
+        while not line.endswith(b"\n") and size <= max_bytes:
+            line = stream.readline(max_size + 1)
+            if not line:
+                break
+            size += len(line)
+        yield LongLine(size, max_size)
+        if size > max_bytes:
+            return
+
+
+def parse_line(line, text_schema):
+    """
+    Decodifica (UTF-8) y valida una línea NDJSON.
+
+    Retorna:
+        tuple: (item validado, None) o (None, mensaje de error).
+    """
+    try:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        return text_schema().load(json.loads(line)), None
+    except ValidationError as e:
+        return None, e.messages
+    except UnicodeDecodeError as e:
+        return None, f"UTF-8 inválido: {e}"
+    except ValueError as e:
+        return None, f"JSON inválido: {e}"
+
+
+def stream_results(name, lines, batch_size=None, max_texts=MAX_REQUEST_TEXTS,
+                   max_chars=MAX_REQUEST_CHARS, max_bytes=MAX_REQUEST_BYTES):
+    """
+    Procesa las líneas NDJSON de ``lines`` por lotes y genera las líneas
+    NDJSON de la respuesta (con el salto de línea incluido).
+
+    Parámetros:
+        name (str): Endpoint de STREAM_ENDPOINTS ("analyze", "urgency" o "scarcity").
+        lines (Iterable[bytes | str | LongLine]): Líneas de la solicitud (ver
+            read_lines). Las vacías se ignoran y no cuentan en la numeración.
+        batch_size (int, opcional): Textos por lote; por defecto NLP_BATCH_SIZE.
+        max_texts, max_chars, max_bytes (int, opcional): Límites de la
+            solicitud; al superar alguno se responde un error y se deja de leer.
+    """
+    endpoint = STREAM_ENDPOINTS[name]
+    detectors = [get_detector(detector) for detector in endpoint.detectors]
+    instance_schema = endpoint.instance_schema()
+    batch_size = batch_size or NLP_BATCH_SIZE
+
+    def flush(batch):
+        valid = [item for _, item, _ in batch if item is not None]
+        results = iter(run_detectors([item["text"] for item in valid], detectors))
+        out = []
+        for number, item, error in batch:
+            if item is None:
+                response = {"line": number, "error": error}
+            else:
+                instance = endpoint.build_instance(item, next(results))
+                response = {"line": number, "instance": instance_schema.dump(instance)}
+            out.append(json.dumps(response, ensure_ascii=False) + "\n")
+        return "".join(out)
+
+    batch = []
+    number = 0
+    size = 0
+    chars = 0
+    for line in lines:
+        if isinstance(line, LongLine):
+            size += line.size
+            item, error = None, f"La línea tiene {line.size} bytes (máximo {line.max_size})"
+        else:
+            size += len(line) if isinstance(line, bytes) else len(line.encode("utf-8"))
+            if not line.strip():
+                continue
+            item, error = parse_line(line, endpoint.text_schema)
+        if item is not None:
+            chars += len(item["text"])
+        if number >= max_texts or chars > max_chars or size > max_bytes:
+            if batch:
+                yield flush(batch)
+            limit = {
+                "line": number,
+                "error": f"La solicitud supera el límite de {max_texts} textos, "
+                         f"{max_chars} caracteres o {max_bytes} bytes; no se leyó el resto",
+            }
+            yield json.dumps(limit, ensure_ascii=False) + "\n"
+            return
+        batch.append((number, item, error))
+        number += 1
+        if len(batch) >= batch_size:
+            yield flush(batch)
+            batch = []
+    if batch:
+        yield flush(batch)
@@ -0,0 +1,245 @@
+import marshmallow
+
+class MatchSchema(marshmallow.Schema):
+    """
+    Esquema para una coincidencia del modo detallado (ver src/analysis/matches.py).
+
+    JSON esperado:
+    {
+        "rule": "fake_scarcity",     # Obligatorio
+        "text": "Solo quedan 3",     # Obligatorio
+        "start": 0,                  # Obligatorio
+        "end": 13,                   # Obligatorio
+        "sentence_start": 0,         # Obligatorio
+        "sentence_end": 23           # Obligatorio
+    }
+
+    Atributos:
+        rule (str): Obligatorio. Nombre de la regla que coincidió.
+        text (str): Obligatorio. Fragmento del texto que coincidió.
+        start (int): Obligatorio. Offset de caracteres del comienzo de la coincidencia.
+        end (int): Obligatorio. Offset de caracteres del final de la coincidencia.
+        sentence_start (int): Obligatorio. Offset del comienzo de la oración que la contiene.
+        sentence_end (int): Obligatorio. Offset del final de la oración que la contiene.
+    """
+    rule = marshmallow.fields.String(required=True)
+    text = marshmallow.fields.String(required=True)
+    start = marshmallow.fields.Integer(required=True)
+    end = marshmallow.fields.Integer(required=True)
+    sentence_start = marshmallow.fields.Integer(required=True)
+    sentence_end = marshmallow.fields.Integer(required=True)
+
+class AnalyzeTextSchema(marshmallow.Schema):
+    """
+    Esquema para validar un texto a analizar con todos los detectores.
+
+    JSON esperado:
+    {
+        "text": "Texto a analizar",  # Obligatorio
+        "id": "123",                 # Opcional
+        "path": "/ruta/opcional"     # Opcional
+    }
+
+    Atributos:
+        text (str): Obligatorio. El texto que se analizará.
+        id (str, opcional): Identificador opcional del texto.
+        path (str, opcional): Ruta opcional del texto.
+    """
+    text = marshmallow.fields.String(required=True, metadata={"description": "Texto a analizar."})
+    id = marshmallow.fields.String(required=False, metadata={"description": "Identificador opcional del texto."})
+    path = marshmallow.fields.String(required=False, metadata={"description": "Ruta opcional del texto."})
+
+class AnalyzeRequestSchema(marshmallow.Schema):
+    """
+    Esquema para validar una solicitud de análisis combinado.
+
+    JSON esperado:
+    {
+        "version": "1.0",
+        "texts": [
+            {
+                "text": "Texto 1",
+                "id": "id1",
+                "path": "/ruta1"
+            },
+            {
+                "text": "Texto 2"
+            }
+        ],
+        "detailed": false  # Opcional
+    }
+
+    Atributos:
+        version (str): Obligatorio. Versión del esquema.
+        texts (List[AnalyzeTextSchema]): Obligatorio. Lista de textos a analizar.
+        detailed (bool, opcional): Modo detallado; por defecto False.
+    """
+    version = marshmallow.fields.String(required=True, metadata={"description": "Versión del esquema."})
+    texts = marshmallow.fields.List(marshmallow.fields.Nested(AnalyzeTextSchema), required=True)
+    detailed = marshmallow.fields.Boolean(required=False, load_default=False, metadata={"description": "Devolver cada coincidencia con su regla y offsets."})
+
+class AnalyzeInstanceSchema(marshmallow.Schema):
+    """
+    Esquema para representar el resultado de todos los detectores sobre un texto.
+
+    JSON esperado:
+    {
+        "text": "Texto de la instancia",  # Obligatorio
+        "id": "123",                      # Opcional
+        "path": "/ruta/opcional",         # Opcional
+        "has_shaming": false,             # Obligatorio
+        "has_urgency": true,              # Obligatorio
+        "has_scarcity": false,            # Obligatorio
+        "shaming_confidence": 0.91        # Opcional, solo si has_shaming
+    }
+
+    Atributos:
+        text (str): Obligatorio. Texto analizado.
+        id (str, opcional): Identificador opcional de la instancia.
+        path (str, opcional): Ruta opcional del texto.
+        has_shaming (bool): Obligatorio. Indica si el texto tiene confirmshaming.
+        has_urgency (bool): Obligatorio. Indica si el texto tiene urgencia.
+        has_scarcity (bool): Obligatorio. Indica si el texto tiene escasez.
+        shaming_confidence (float, opcional): Confianza del clasificador de shaming.
+        urgency_matches (List[MatchSchema], opcional): Coincidencias de urgencia (modo detallado).
+        scarcity_matches (List[MatchSchema], opcional): Coincidencias de escasez (modo detallado).
+    """
+    text = marshmallow.fields.String(required=True)
+    id = marshmallow.fields.String(required=False)
+    path = marshmallow.fields.String(required=False)
+    has_shaming = marshmallow.fields.Boolean(required=True)
+    has_urgency = marshmallow.fields.Boolean(required=True)
+    has_scarcity = marshmallow.fields.Boolean(required=True)
+    shaming_confidence = marshmallow.fields.Float(required=False)
+    urgency_matches = marshmallow.fields.List(marshmallow.fields.Nested(MatchSchema), required=False)
+    scarcity_matches = marshmallow.fields.List(marshmallow.fields.Nested(MatchSchema), required=False)
+
+class AnalyzeResponseSchema(marshmallow.Schema):
+    """
+    Esquema para representar la respuesta del análisis combinado.
+
+    JSON esperado:
+    {
+        "version": "1.0",
+        "instances": [
+            {
+                "text": "Texto 1",
+                "id": "id1",
+                "has_shaming": false,
+                "has_urgency": true,
+                "has_scarcity": false
+            }
+        ]
+    }
+
+    Atributos:
+        version (str): Obligatorio. Versión de la respuesta.
+        instances (List[AnalyzeInstanceSchema]): Obligatorio. Resultados por texto.
+    """
+    version = marshmallow.fields.String(required=True)
+    instances = marshmallow.fields.List(marshmallow.fields.Nested(AnalyzeInstanceSchema), required=True)
+
+class IncrementalTextSchema(marshmallow.Schema):
+    """
+    Esquema para un elemento de un re-escaneo incremental (ver src/analysis/incremental.py).
+
+    JSON esperado:
+    {
+        "id": "a1",                  # Obligatorio
+        "text": "Texto a analizar",  # Texto nuevo o modificado, o bien
+        "hash": "5f1d...",           # hash devuelto antes si el texto no cambió
+        "path": "/ruta/opcional"     # Opcional
+    }
+
+    Atributos:
+        id (str): Obligatorio. Identificador del texto dentro de la página.
+        text (str, opcional): Texto a analizar. Excluyente con hash.
+        hash (str, opcional): Hash del texto ya enviado. Excluyente con text.
+        path (str, opcional): Ruta opcional del texto.
+    """
+    id = marshmallow.fields.String(required=True, metadata={"description": "Identificador del texto en la página."})
+    text = marshmallow.fields.String(required=False, metadata={"description": "Texto nuevo o modificado."})
+    hash = marshmallow.fields.String(required=False, metadata={"description": "Hash de un texto sin cambios."})
+    path = marshmallow.fields.String(required=False, metadata={"description": "Ruta opcional del texto."})
+
+    @marshmallow.validates_schema
+    def validate_text_or_hash(self, data, **kwargs):
+        if ("text" in data) == ("hash" in data):
+            raise marshmallow.ValidationError("Se debe enviar text o hash (uno de los dos).")
+
+class IncrementalRequestSchema(marshmallow.Schema):
+    """
+    Esquema para validar un re-escaneo incremental de una página.
+
+    JSON esperado:
+    {
+        "version": "1.0",
+        "session": "9b2e4c7a-...",
+        "page": "https://tienda.com/listado",
+        "texts": [
+            {"id": "a1", "hash": "5f1d..."},
+            {"id": "a7", "text": "Solo quedan 2 unidades!"}
+        ],
+        "removed": ["a3"],   # Opcional
+        "complete": false    # Opcional
+    }
+
+    Atributos:
+        version (str): Obligatorio. Versión del esquema.
+        session (str): Obligatorio. Token del cliente (por ejemplo, uno por
+            pestaña de la extensión): cada cliente tiene su propio snapshot
+            de la página.
+        page (str): Obligatorio. Identifica la página (por ejemplo, su URL).
+        texts (List[IncrementalTextSchema]): Obligatorio. Textos agregados o
+            modificados, o referencias por hash a los que no cambiaron (a lo
+            sumo PAGE_SNAPSHOT_MAX_ITEMS).
+        removed (List[str], opcional): ids que ya no están en la página.
+        complete (bool, opcional): Si es True, ``texts`` es la página
+            completa en orden y los ids que no figuran se descartan.
+    """
+    version = marshmallow.fields.String(required=True, metadata={"description": "Versión del esquema."})
+    session = marshmallow.fields.String(
+        required=True, validate=marshmallow.validate.Length(min=1),
+        metadata={"description": "Token del cliente que identifica su snapshot."},
+    )
+    page = marshmallow.fields.String(required=True, metadata={"description": "Identificador de la página."})
+    texts = marshmallow.fields.List(marshmallow.fields.Nested(IncrementalTextSchema), required=True)
+    removed = marshmallow.fields.List(marshmallow.fields.String(), required=False, load_default=list)
+    complete = marshmallow.fields.Boolean(required=False, load_default=False)
+
+class IncrementalInstanceSchema(AnalyzeInstanceSchema):
+    """
+    Instancia de AnalyzeInstanceSchema con el hash del texto, que el
+    cliente puede reenviar en lugar del texto mientras no cambie.
+    """
+    hash = marshmallow.fields.String(required=True)
+
+class IncrementalResponseSchema(marshmallow.Schema):
+    """
+    Esquema para la respuesta de un re-escaneo incremental: el resultado
+    completo de la página después de aplicar los cambios.
+
+    JSON esperado:
+    {
+        "version": "1.0",
+        "page": "https://tienda.com/listado",
+        "analyzed": 1,
+        "evicted": [],
+        "instances": [
+            {"id": "a1", "text": "...", "hash": "5f1d...", "has_shaming": false, ...}
+        ]
+    }
+
+    Atributos:
+        version (str): Obligatorio. Versión de la respuesta.
+        page (str): Obligatorio. Página del re-escaneo.
+        analyzed (int): Obligatorio. Textos analizados en esta solicitud.
+        evicted (List[str]): Obligatorio. ids descartados del snapshot por
+            superar PAGE_SNAPSHOT_MAX_ITEMS.
+        instances (List[IncrementalInstanceSchema]): Obligatorio. Todos los textos de la página.
+    """
+    version = marshmallow.fields.String(required=True)
+    page = marshmallow.fields.String(required=True)
+    analyzed = marshmallow.fields.Integer(required=True)
+    evicted = marshmallow.fields.List(marshmallow.fields.String(), required=True)
+    instances = marshmallow.fields.List(marshmallow.fields.Nested(IncrementalInstanceSchema), required=True)
@@ -1,181 +1,48 @@
+from functools import partial
 from config import NLP
-from spacy.matcher import Matcher
+from src.analysis.artifacts import compiled_rules, create_rule_matcher
+from src.analysis.batch import Detector, run_detector
+from src.analysis.cache import detector_version
+from src.analysis.lexicon import expand_patterns
+from src.analysis.matches import detailed_detector, match_details, matcher_spans
+from src.analysis.packs import get_detector, register, rule_patterns
+from src.analysis.prefilter import Prefilter
 from src.scarcity.types import ScarcityResponseSchema
 
-scarcity_matcher = Matcher(NLP.vocab)
-scarcity_patterns = [
-    # Oraciones del tipo "Últimas 3 unidades" o "ultimo disponible"
-    [
-        {"LOWER": {"FUZZY": {"IN": ["ultima", "ultimo"]}}},
-        {"TEXT": {"REGEX": "^\d*"}, "OP": "?"},
-        {"LOWER": {"FUZZY": {"IN": ["unidade", "disponible"]}}},
-    ],
-    # Oraciones del tipo "Solo quedan 3"
-    [
-        {"LOWER": {"FUZZY1": "solo"}},
-        {"LOWER": {"FUZZY1": "queda"}},
-        {"TEXT": {"REGEX": "^\d+"}},
-    ],
-    # Oraciones del tipo "Últimas unidades disponibles"
-    [
-        {
-            "LEMMA": {"IN": ["último", "ultimo"]},
-            "POS": "ADJ",
-        },
-        {"IS_DIGIT": True, "OP": "?"},
-        {"POS": "NOUN"},
-        {"POS": "ADJ", "OP": "?"},
-    ],
-    # Oraciones del tipo "¡Aprovecha! Quedan pocas unidades"
-    [
-        {"POS": "PUNCT", "OP": "*"},
-        {
-            "LEMMA": {"IN": ["quedar", "restar"]},
-            "POS": "VERB",
-        },
-        {
-            "LEMMA": {"IN": ["poco", "escaso", "limitado"]},
-            "POS": {"IN": ["DET", "ADJ"]},
-        },
-        {
-            "LEMMA": {"IN": ["unidad", "existencia", "articulo", "plaza"]},
-            "POS": "NOUN",
-        },
-        {"POS": "PUNCT", "OP": "*"},
-    ],
-    [
-        {"POS": "PUNCT", "OP": "*"},
-        {
-            "LEMMA": {
-                "IN": ["comprar", "compra", "adquirir", "pedir", "ordenar", "haz"]
-            },
-            "POS": {"IN": ["VERB", "NOUN"]},
-        },
-        {"LEMMA": {"IN": ["ya", "ahora"]}, "POS": "ADV", "OP": "?"},
-        {"LEMMA": "mismo", "POS": "ADJ", "OP": "?"},
-        {"LEMMA": {"IN": ["antes", "previo"]}, "POS": "ADV"},
-        {"LEMMA": "de", "POS": "ADP"},
-        {"LEMMA": "que", "POS": "SCONJ"},
-        {"LEMMA": "él", "POS": "PRON", "OP": "?"},
-        {"LEMMA": {"IN": ["acabar", "terminar", "agotar", "acabar_se"]}, "POS": "VERB"},
-        {"POS": "PUNCT", "OP": "*"},
-    ],
-    [
-        {"IS_PUNCT": True, "OP": "*"},
-        {"LOWER": {"REGEX": "s[oó]lo"}, "OP": "?"},  # Solo / Sólo (opcional)
-        {"LIKE_NUM": True},  # 3 / tres
-        {
-            "LEMMA": {
-                "IN": [
-                    "unidad",
-                    "pieza",
-                    "artículo",
-                    "articulo",
-                    "existencia",
-                    "producto",
-                    "plaza",
-                    "stock",
-                ]
-            },
-            "POS": "NOUN",
-        },
-        {
-            "POS": "ADJ",
-            "LEMMA": {
-                "IN": ["restante", "disponible", "limitado", "último", "ultimo", "poco"]
-            },
-            "OP": "?",  # restantes / disponibles (opcional)
-        },
-        {"IS_PUNCT": True, "OP": "*"},
-    ],
-    # Solo 3 restantes unidades (orden adjetivo-nombre, por si viene mal redactado)
-    [
-        {"IS_PUNCT": True, "OP": "*"},
-        {"LOWER": {"REGEX": "s[oó]lo"}, "OP": "?"},
-        {"LIKE_NUM": True},
-        {
-            "POS": "ADJ",
-            "LEMMA": {
-                "IN": ["restante", "disponible", "limitado", "último", "ultimo", "poco"]
-            },
-        },
-        {
-            "LEMMA": {
-                "IN": [
-                    "unidad",
-                    "pieza",
-                    "artículo",
-                    "articulo",
-                    "existencia",
-                    "producto",
-                    "plaza",
-                    "stock",
-                ]
-            },
-            "POS": "NOUN",
-        },
-        {"IS_PUNCT": True, "OP": "*"},
-    ],
-    # Solo 3 uds restantes!  /  Solo 3 u. disponibles
-    [
-        {"IS_PUNCT": True, "OP": "*"},
-        {"LOWER": {"REGEX": "s[oó]lo"}, "OP": "?"},
-        {"LIKE_NUM": True},
-        {"LOWER": {"IN": ["u", "u.", "ud", "uds"]}},  # abreviaturas de unidades
-        {
-            "POS": "ADJ",
-            "LEMMA": {
-                "IN": ["restante", "disponible", "limitado", "último", "ultimo", "poco"]
-            },
-            "OP": "?",
-        },
-        {"IS_PUNCT": True, "OP": "*"},
-    ],
-    # 3 unidades en stock / 3 unidades disponibles (sin "Solo")
-    [
-        {"IS_PUNCT": True, "OP": "*"},
-        {"LIKE_NUM": True},
-        {
-            "LEMMA": {
-                "IN": [
-                    "unidad",
-                    "pieza",
-                    "artículo",
-                    "articulo",
-                    "existencia",
-                    "producto",
-                    "plaza",
-                    "stock",
-                ]
-            },
-            "POS": "NOUN",
-        },
-        {"LOWER": "en", "OP": "?"},
-        {"LOWER": "stock", "OP": "?"},
-        {
-            "POS": "ADJ",
-            "LEMMA": {
-                "IN": ["restante", "disponible", "limitado", "último", "ultimo", "poco"]
-            },
-            "OP": "?",
-        },
-        {"IS_PUNCT": True, "OP": "*"},
-    ],
-    # Solo 3 restantes! (sin el sustantivo, frase cortada)
-    [
-        {"IS_PUNCT": True, "OP": "*"},
-        {"LOWER": {"REGEX": "s[oó]lo"}},
-        {"LIKE_NUM": True},
-        {
-            "POS": "ADJ",
-            "LEMMA": {
-                "IN": ["restante", "disponible", "limitado", "último", "ultimo", "poco"]
-            },
-        },
-        {"IS_PUNCT": True, "OP": "*"},
-    ],
-]
-scarcity_matcher.add("fake_scarcity", scarcity_patterns)
+# Atributos de token que usan los patrones (ver src/analysis/batch.py)
+PIPELINE_ATTRS = frozenset({"POS", "LEMMA"})
+
+def scarcity_rules(pack):
+    """
+    Reglas de patterns/scarcity.json con FUZZY reemplazado por conjuntos de
+    variantes precalculados.
+    """
+    return {name: expand_patterns(patterns) for name, patterns in rule_patterns(pack).items()}
+
+
+# Los patrones se definen en patterns/scarcity.json (ver src/analysis/packs.py)
+def compile_scarcity(pack):
+    """
+    Compila patterns/scarcity.json en un Matcher (los patrones se validan al
+    agregarlos, salvo que vengan del artefacto precompilado).
+    """
+    rules, validated = compiled_rules("scarcity", pack, scarcity_rules)
+    scarcity_matcher = create_rule_matcher(rules, validated)
+    detector = Detector(
+        "scarcity",
+        detector_version(pack),
+        PIPELINE_ATTRS,
+        partial(find_scarcity_matches, scarcity_matcher=scarcity_matcher),
+        compiled=scarcity_matcher,
+        prefilter=Prefilter(
+            [pattern for group in rules.values() for pattern in group],
+            lemma_forms=pack.get("lemma_forms"),
+        ),
+        no_match=[],
+    )
+    return detector._replace(
+        detailed=detailed_detector(detector, partial(find_scarcity_match_details, scarcity_matcher=scarcity_matcher))
+    )
 
 
 def check_text_scarcity(text):
@@ -197,7 +64,16 @@ def check_text_scarcity(text):
         - matches: Coincidencias encontradas por scarcity_matcher en el texto procesado.
         - span: Fragmento del texto correspondiente a una coincidencia.
     """
-    doc = NLP(text)
+    return run_detector([text], get_detector("scarcity"))[0]
+
+
+def find_scarcity_matches(doc, scarcity_matcher=None):
+    """
+    Aplica scarcity_matcher (por defecto el del paquete vigente) sobre un Doc
+    ya procesado y devuelve las coincidencias con el mismo formato que
+    check_text_scarcity.
+    """
+    scarcity_matcher = scarcity_matcher or get_detector("scarcity").compiled
     matches = scarcity_matcher(doc)
     results = []
     for match_id, start, end in matches:
@@ -206,22 +82,51 @@ def check_text_scarcity(text):
     return results
 
 
+def find_scarcity_match_details(doc, scarcity_matcher=None):
+    """
+    Modo detallado de find_scarcity_matches: cada coincidencia con su regla
+    y sus offsets (ver src/analysis/matches.py).
+    """
+    scarcity_matcher = scarcity_matcher or get_detector("scarcity").compiled
+    return [match_details(rule, span) for rule, span in matcher_spans(scarcity_matcher, doc)]
+
+
+register("scarcity", compile_scarcity)
+
+
+def scarcity_instance(analized_text, matches, detailed=False):
+    """
+    Arma la instancia de ScarcityInstanceSchema para un texto de la solicitud.
+    Con ``detailed`` se incluyen las coincidencias (del Detector detallado).
+    """
+    instance = {"text": analized_text["text"], "has_scarcity": bool(matches)}
+    if detailed:
+        instance["matches"] = matches
+    if analized_text.get("path") is not None:
+        instance["path"] = analized_text["path"]
+    if analized_text.get("id") is not None:
+        instance["id"] = analized_text["id"]
+    return instance
+
+
 def check_text_scarcity_schema(data):
     """
     Recibe un dict validado por ScarcityRequestSchema
     y devuelve la respuesta serializada por ScarcityResponseSchema.
     Cada instancia indica si el texto tiene escasez (has_scarcity).
+    Todos los textos de la solicitud se procesan en un único lote.
+    Con "detailed" cada instancia incluye las coincidencias encontradas.
     """
-    instances = []
-    for analized_text in data["texts"]:
-        text = analized_text["text"]
-        path = analized_text["path"]
-        id_ = analized_text.get("id")
-        matches = check_text_scarcity(text)
-        instance = {"text": text, "path": path, "has_scarcity": bool(matches)}
-        if id_ is not None:
-            instance["id"] = id_
-        instances.append(instance)
+    detailed = bool(data.get("detailed"))
+    detector = get_detector("scarcity")
+    results = run_detector(
+        [analized_text["text"] for analized_text in data["texts"]],
+        detector.detailed if detailed else detector,
+    )
+    instances = [
+        scarcity_instance(analized_text, matches, detailed)
+        for analized_text, matches in zip(data["texts"], results)
+    ]
     response_schema = ScarcityResponseSchema()
     response = {"version": data["version"], "instances": instances}
     return response_schema.dump(response)
@@ -1,4 +1,5 @@
 import marshmallow
+from src.analysis.types import MatchSchema
 
 class TextSchema(marshmallow.Schema):
     """
@@ -43,9 +44,11 @@ class ScarcityRequestSchema(marshmallow.Schema):
     Atributos:
         version (str): Obligatorio. Versión del esquema.
         texts (List[TextSchema]): Obligatorio. Lista de textos a analizar.
+        detailed (bool, opcional): Modo detallado; por defecto False.
     """
     version = marshmallow.fields.String(required=True, metadata={"description": "Versión del esquema."})
     texts = marshmallow.fields.List(marshmallow.fields.Nested(TextSchema), required=True)
+    detailed = marshmallow.fields.Boolean(required=False, load_default=False, metadata={"description": "Devolver cada coincidencia con su regla y offsets."})
 
 class ScarcityInstanceSchema(marshmallow.Schema):
     """
@@ -64,11 +67,13 @@ class ScarcityInstanceSchema(marshmallow.Schema):
         path (str): Obligatorio. Ruta asociada al texto.
         id (str, opcional): Identificador opcional de la instancia.
         has_scarcity (bool): Obligatorio. Indica si hay escasez en el texto.
+        matches (List[MatchSchema], opcional): Coincidencias (modo detallado).
     """
     text = marshmallow.fields.String(required=True)
     path = marshmallow.fields.String(required=False)
     id = marshmallow.fields.String(required=False)
     has_scarcity = marshmallow.fields.Boolean(required=True)
+    matches = marshmallow.fields.List(marshmallow.fields.Nested(MatchSchema), required=False)
 
 class ScarcityResponseSchema(marshmallow.Schema):
     """
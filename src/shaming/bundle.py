@@ -0,0 +1,120 @@
+"""
+Paquete versionado del modelo de shaming.
+
+El clasificador puntúa ``span.vector``, así que solo tiene sentido con los
+mismos vectores con los que fue entrenado. El paquete (un ``.npz``) guarda
+junto al modelo lineal los metadatos necesarios para comprobarlo al iniciar
+el servidor:
+
+- ``format_version``: versión de este formato.
+- ``embedding_model`` / ``embedding_version``: modelo de spaCy usado para vectorizar.
+- ``vector_dim``: dimensión de los vectores.
+- ``label_map``: nombre de cada etiqueta del clasificador.
+- ``metrics``: métricas del entrenamiento.
+"""
+
+import json
+
+import numpy
+
+from .linear_model import LinearShamingModel
+
+FORMAT_VERSION = 1
+
+
+class ModelBundleError(ValueError):
+    """
+    El paquete del modelo no existe, está mal formado o no corresponde al
+    modelo de spaCy cargado en el servidor.
+    """
+
+
+def save_bundle(path, model, embedding_model, embedding_version, label_map, metrics=None):
+    """
+    Guarda el modelo lineal y sus metadatos en un archivo ``.npz``.
+
+    Parámetros:
+        path (str): Ruta del archivo a escribir.
+        model (LinearShamingModel): Clasificador entrenado.
+        embedding_model (str): Nombre del modelo de spaCy (ej. "es_core_news_lg").
+        embedding_version (str): Versión del modelo de spaCy.
+        label_map (dict): Etiqueta numérica -> nombre.
+        metrics (dict, opcional): Métricas del entrenamiento.
+    """
+    metadata = {
+        "format_version": FORMAT_VERSION,
+        "embedding_model": embedding_model,
+        "embedding_version": embedding_version,
+        "vector_dim": model.vector_dim,
+        "label_map": {str(label): name for label, name in label_map.items()},
+        "metrics": metrics or {},
+    }
+    with open(path, "wb") as f:
+        numpy.savez(f, classifier=model.to_array(), metadata=numpy.array(json.dumps(metadata)))
+
+
+def load_bundle(path):
+    """
+    Lee un paquete escrito por save_bundle.
+
+    Retorna:
+        tuple: (LinearShamingModel, dict de metadatos).
+    """
+    try:
+        with numpy.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data["metadata"]))
+            model = LinearShamingModel.from_array(data["classifier"])
+    except (OSError, KeyError, ValueError) as e:
+        raise ModelBundleError(f"No se pudo leer el modelo de shaming {path}: {e}") from e
+    if metadata.get("format_version") != FORMAT_VERSION:
+        raise ModelBundleError(
+            f"Formato de modelo no soportado: {metadata.get('format_version')} (se esperaba {FORMAT_VERSION})"
+        )
+    if metadata.get("vector_dim") != model.vector_dim:
+        raise ModelBundleError("La dimensión declarada no coincide con el vector de pesos")
+    return model, metadata
+
+
+def validate_bundle(metadata, embedding_model, embedding_version, vector_dim):
+    """
+    Comprueba que el paquete fue entrenado con los mismos vectores que usa el
+    servidor. Se exige el mismo modelo, la misma versión mayor.menor y la
+    misma dimensión de vectores.
+
+    Lanza:
+        ModelBundleError: Si algún dato no coincide.
+    """
+    if metadata["embedding_model"] != embedding_model:
+        raise ModelBundleError(
+            f"El modelo de shaming fue entrenado con {metadata['embedding_model']} "
+            f"pero el servidor usa {embedding_model}"
+        )
+    if _major_minor(metadata["embedding_version"]) != _major_minor(embedding_version):
+        raise ModelBundleError(
+            f"El modelo de shaming fue entrenado con {embedding_model} {metadata['embedding_version']} "
+            f"pero el servidor usa la versión {embedding_version}"
+        )
+    if metadata["vector_dim"] != vector_dim:
+        raise ModelBundleError(
+            f"El modelo de shaming espera vectores de dimensión {metadata['vector_dim']} "
+            f"pero {embedding_model} tiene dimensión {vector_dim}"
+        )
+
+
+def check_vector_dim(model, vector_dim, source):
+    """
+    Comprueba que el clasificador puntúe vectores de la dimensión del modelo
+    de spaCy cargado; si no, cada predicción fallaría en el producto matricial.
+
+    Lanza:
+        ModelBundleError: Si las dimensiones no coinciden.
+    """
+    if model.vector_dim != vector_dim:
+        raise ModelBundleError(
+            f"El modelo de shaming {source} espera vectores de dimensión {model.vector_dim} "
+            f"pero el modelo de spaCy cargado tiene dimensión {vector_dim}"
+        )
+
+
+def _major_minor(version):
+    return tuple(str(version).split(".")[:2])
@@ -0,0 +1,137 @@
+"""
+Modelo lineal compacto para el clasificador de shaming.
+
+El clasificador se entrena con ``SVC(kernel="linear", probability=True)``.
+Como el kernel es lineal, la función de decisión se reduce a ``X @ w + b``
+y la calibración de Platt a dos parámetros (A, B). Este módulo exporta esos
+valores a un único arreglo de NumPy y los usa para puntuar todos los spans
+con un producto vectorizado, sin pasar por la maquinaria genérica de libsvm.
+
+Formato del archivo ``.npy``: ``[w_0, ..., w_{n-1}, b, A, B]``.
+"""
+
+import numpy
+
+# Cotas que libsvm aplica a las probabilidades por pares
+MIN_PROB = 1e-7
+# Iteraciones y tolerancia del acoplamiento por pares de libsvm (k = 2)
+MAX_ITER = 100
+EPS = 0.005 / 2
+
+
+class LinearShamingModel:
+    """
+    Clasificador lineal con calibración de Platt, compatible con la parte de
+    la interfaz de ``SVC`` que usa el detector (``classes_`` y ``predict_proba``).
+
+    Atributos:
+        weights (numpy.ndarray): Vector de pesos (dimensión de los vectores de spaCy).
+        bias (float): Término independiente de la función de decisión.
+        prob_a (float): Parámetro A de la calibración de Platt.
+        prob_b (float): Parámetro B de la calibración de Platt.
+    """
+
+    classes_ = numpy.array([0, 1])
+
+    def __init__(self, weights, bias, prob_a, prob_b):
+        self.weights = numpy.asarray(weights, dtype=numpy.float64)
+        self.bias = float(bias)
+        self.prob_a = float(prob_a)
+        self.prob_b = float(prob_b)
+
+    @classmethod
+    def from_svc(cls, clf):
+        """
+        Extrae los parámetros de un ``SVC(kernel="linear", probability=True)``
+        binario entrenado con las etiquetas 0/1.
+        """
+        if clf.kernel != "linear" or not clf.probability:
+            raise ValueError("Se requiere un SVC lineal entrenado con probability=True")
+        if list(clf.classes_) != [0, 1]:
+            raise ValueError(f"Etiquetas no soportadas: {list(clf.classes_)}")
+        return cls(clf.coef_[0], clf.intercept_[0], clf.probA_[0], clf.probB_[0])
+
+    @classmethod
+    def from_array(cls, array):
+        array = numpy.asarray(array, dtype=numpy.float64)
+        return cls(array[:-3], array[-3], array[-2], array[-1])
+
+    @classmethod
+    def load(cls, path):
+        return cls.from_array(numpy.load(path))
+
+    def to_array(self):
+        return numpy.concatenate([self.weights, [self.bias, self.prob_a, self.prob_b]])
+
+    def save(self, path):
+        numpy.save(path, self.to_array())
+
+    @property
+    def vector_dim(self):
+        return self.weights.shape[0]
+
+    def decision_function(self, X):
+        """
+        Devuelve la distancia al hiperplano (positiva para la clase 1).
+        """
+        return numpy.asarray(X, dtype=numpy.float64) @ self.weights + self.bias
+
+    def predict_proba(self, X):
+        """
+        Devuelve un arreglo (n, 2) con las mismas probabilidades que
+        ``SVC.predict_proba``.
+
+        libsvm aplica la sigmoide de Platt sobre su propio valor de decisión
+        (el opuesto del de sklearn) y luego resuelve el acoplamiento por pares
+        de forma iterativa con tolerancia ``EPS``; se replica ese cálculo,
+        vectorizado sobre todas las filas, para obtener los mismos valores.
+        """
+        f_apb = -self.decision_function(X) * self.prob_a + self.prob_b
+        # Sigmoide numéricamente estable, igual que sigmoid_predict de libsvm
+        r = numpy.where(
+            f_apb >= 0,
+            numpy.exp(-numpy.abs(f_apb)) / (1.0 + numpy.exp(-numpy.abs(f_apb))),
+            1.0 / (1.0 + numpy.exp(numpy.minimum(f_apb, 0))),
+        )
+        r = numpy.clip(r, MIN_PROB, 1 - MIN_PROB)
+        return _couple_pairwise(r)
+
+
+def _couple_pairwise(r01):
+    """
+    Acoplamiento por pares de libsvm (multiclass_probability) para k = 2,
+    donde ``r01`` es la probabilidad de la clase 0 frente a la clase 1.
+    """
+    r10 = 1.0 - r01
+    n = r01.shape[0]
+    Q = numpy.empty((n, 2, 2))
+    Q[:, 0, 0] = r10 * r10
+    Q[:, 1, 1] = r01 * r01
+    Q[:, 0, 1] = Q[:, 1, 0] = -r10 * r01
+    p = numpy.full((n, 2), 0.5)
+    active = numpy.ones(n, dtype=bool)
+    for _ in range(MAX_ITER):
+        Qp = numpy.einsum("nij,nj->ni", Q, p)
+        pQp = (p * Qp).sum(axis=1)
+        active &= numpy.abs(Qp - pQp[:, None]).max(axis=1) >= EPS
+        if not active.any():
+            break
+        for t in range(2):
+            diff = numpy.where(active, (pQp - Qp[:, t]) / Q[:, t, t], 0.0)
+            p[:, t] += diff
+            pQp = (pQp + diff * (diff * Q[:, t, t] + 2 * Qp[:, t])) / (1 + diff) / (1 + diff)
+            Qp = (Qp + diff[:, None] * Q[:, t, :]) / (1 + diff)[:, None]
+            p /= (1 + diff)[:, None]
+    return p
+
+
+if __name__ == "__main__":
+    # Exporta el modelo lineal a partir del SVC entrenado:
+    #   python -m src.shaming.linear_model shaming_svm.pkl shaming_linear.npy
+    import sys
+    import joblib
+
+    source = sys.argv[1] if len(sys.argv) > 1 else "shaming_svm.pkl"
+    target = sys.argv[2] if len(sys.argv) > 2 else "shaming_linear.npy"
+    LinearShamingModel.from_svc(joblib.load(source)).save(target)
+    print(f"Modelo lineal exportado a {target}")
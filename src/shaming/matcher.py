@@ -2,9 +2,10 @@ from spacy.matcher import Matcher
 from config import NLP
 from .patterns import get_patterns
 
-def create_matcher():
-    matcher = Matcher(NLP.vocab)
-    patterns = get_patterns()
+def create_matcher(patterns=None, validate=True):
+    matcher = Matcher(NLP.vocab, validate=validate)
+    if patterns is None:
+        patterns = get_patterns()
     for name, pattern in patterns.items():
         matcher.add(name, pattern)
     return matcher
@@ -1,70 +1,268 @@
-from config import NLP
+import os
+from collections import namedtuple
+from functools import partial
+from config import (
+    NLP,
+    SHAMING_EARLY_EXIT,
+    SHAMING_LEGACY_MODEL_PATH,
+    SHAMING_MODEL_PATH,
+    SHAMING_NEGATIVE_TERMS_THRESHOLD,
+    SHAMING_REQUIRE_BUNDLE,
+)
+from src.analysis.artifacts import compiled_rules
+from src.analysis.batch import Detector, parse_text, run_detector
+from src.analysis.cache import detector_version
+from src.analysis.packs import get_detector, register
+from .bundle import ModelBundleError, check_vector_dim, load_bundle, validate_bundle
+from .linear_model import LinearShamingModel
 from .matcher import create_matcher
-from .patterns import exceptions, get_negative_adjectives, get_negative_nouns, get_negative_verbs, get_negative_phrases
+from .patterns import compile_negative_lexicon
 import joblib
-clf = joblib.load("shaming_svm.pkl")  # cargamos el modelo entrenado
+import numpy
 
-matcher = create_matcher()
 
+def load_classifier():
+    """
+    Carga el clasificador de shaming.
+
+    Si existe el paquete versionado (SHAMING_MODEL_PATH) se verifica que haya
+    sido entrenado con los mismos vectores que NLP y, si no coinciden, se
+    lanza ModelBundleError para que el servidor no arranque con un modelo
+    incompatible. Si no existe, se usa el modelo lineal heredado
+    (shaming_linear.npy), entrenado con los vectores de es_core_news_md y sin
+    metadatos para validar; con SHAMING_REQUIRE_BUNDLE se lanza
+    ModelBundleError en su lugar. En ambos casos se lanza ModelBundleError
+    si la dimensión del clasificador no es la de los vectores de NLP.
 
-def is_an_exception(text):
+    Retorna:
+        tuple: (modelo, dict con el origen del modelo para /ready).
+    """
+    if os.path.exists(SHAMING_MODEL_PATH):
+        model, metadata = load_bundle(SHAMING_MODEL_PATH)
+        validate_bundle(
+            metadata,
+            embedding_model=f"{NLP.meta['lang']}_{NLP.meta['name']}",
+            embedding_version=NLP.meta["version"],
+            vector_dim=NLP.vocab.vectors_length,
+        )
+        check_vector_dim(model, NLP.vocab.vectors_length, SHAMING_MODEL_PATH)
+        status = {
+            "path": SHAMING_MODEL_PATH,
+            "validated": True,
+            "embedding_model": metadata["embedding_model"],
+            "embedding_version": metadata["embedding_version"],
+        }
+        return model, status
+    if SHAMING_REQUIRE_BUNDLE:
+        raise ModelBundleError(
+            f"No se encontró {SHAMING_MODEL_PATH} (SHAMING_REQUIRE_BUNDLE=1); "
+            "generarlo con python -m src.shaming.train_classifier"
+        )
+    warning = (
+        f"No se encontró {SHAMING_MODEL_PATH}; se usa {SHAMING_LEGACY_MODEL_PATH}, entrenado con "
+        f"es_core_news_md, sin validar que coincida con los vectores de {NLP.meta['lang']}_{NLP.meta['name']}."
+    )
+    model = LinearShamingModel.load(SHAMING_LEGACY_MODEL_PATH)
+    check_vector_dim(model, NLP.vocab.vectors_length, SHAMING_LEGACY_MODEL_PATH)
+    print(f"Aviso: {warning}")
+    status = {"path": SHAMING_LEGACY_MODEL_PATH, "validated": False, "warning": warning}
+    return model, status
+
+
+# Origen del clasificador cargado (se informa en /ready)
+clf, CLASSIFIER_STATUS = load_classifier()
+
+# Atributos de token que usan los patrones y el clasificador (span.sent),
+# ver src/analysis/batch.py
+PIPELINE_ATTRS = frozenset({"POS", "MORPH", "LEMMA", "DEP", "SENT"})
+
+
+# Matchers y listas compiladas a partir de patterns/shaming.json
+CompiledShaming = namedtuple(
+    "CompiledShaming", ["matcher", "exceptions", "negative_lemmas", "negative_phrase_matcher"]
+)
+
+
+def current_patterns():
+    return get_detector("shaming").compiled
+
+
+def is_an_exception(text, compiled=None):
     """
     Check if the text is in the list of exceptions.
     Args:
         text (str): The text to check.
+        compiled (CompiledShaming, optional): Patterns to use (defaults to the current pack).
     Returns:
         bool: True if the text is an exception, False otherwise.
     """
-    return text.lower() in exceptions()
+    compiled = compiled or current_patterns()
+    return text.lower() in compiled.exceptions
 
-def contains_negative_terms(span):
+def contains_negative_terms(span, compiled=None):
     """
     Detecta términos negativos dentro de un span:
-    - Tokens individuales usando lemma
-    - Frases compuestas usando substring en texto normalizado
+    - Tokens individuales usando el conjunto de lemas negative_lemmas
+    - Términos de varias palabras usando negative_phrase_matcher
     """
-    span_text = " ".join(span.text.lower().split())
-
-    # Revisar tokens individuales
+    compiled = compiled or current_patterns()
     for token in span:
-        if token.lemma_.lower() in get_negative_verbs() + get_negative_adjectives() + get_negative_nouns():
+        if token.lemma_.lower() in compiled.negative_lemmas:
             return True
+    return bool(compiled.negative_phrase_matcher(span))
+
+
+def has_shaming(result):
+    """
+    Decide si el resultado de check_shaming_in_doc indica shaming.
+
+    Es shaming si el clasificador lo predice o si la oración contiene
+    términos del léxico negativo y la confianza alcanza
+    SHAMING_NEGATIVE_TERMS_THRESHOLD.
+    """
+    if not result:
+        return False
+    if result["ml_pred"]:
+        return True
+    return bool(result["negative_terms"]) and result["confidence"] >= SHAMING_NEGATIVE_TERMS_THRESHOLD
 
-    # Revisar frases compuestas
-    for phrase in get_negative_phrases():
-        # reemplazamos múltiples espacios por uno solo
-        phrase_norm = " ".join(phrase.lower().split())
-        if phrase_norm in span_text:
-            return True
 
-    return False
+def _rank(result):
+    # Primero las oraciones que indican shaming, luego la mayor confianza
+    return has_shaming(result), result["confidence"]
 
 
 def check_shaming_in_text(text):
-    doc = NLP(text)
-    matches = matcher(doc)
-    if not matches:
-        return False
+    return run_detector([text], get_detector("shaming"))[0]
 
-    for match_id, start, end in matches:
+
+def find_shaming_candidates(doc, compiled=None):
+    """
+    Devuelve las oraciones del Doc que contienen alguna coincidencia del
+    matcher, sin repetir oraciones y descartando las excepciones.
+
+    Cada oración aparece una sola vez (con la primera regla que la marcó),
+    así su vector se calcula una única vez aunque varias reglas coincidan.
+
+    Returns:
+        list[tuple]: (nombre de la regla, oración) en orden de aparición.
+    """
+    compiled = compiled or current_patterns()
+    candidates = []
+    seen = set()
+    for match_id, start, end in compiled.matcher(doc):
         span = doc[start:end].sent
-        if is_an_exception(span.text):
+        if (span.start, span.end) in seen:
             continue
+        seen.add((span.start, span.end))
+        if is_an_exception(span.text, compiled):
+            continue
+        candidates.append((NLP.vocab.strings[match_id], span))
+    return candidates
+
+
+def classify_spans(spans):
+    """
+    Clasifica varios spans con una única llamada a predict_proba.
+
+    La etiqueta se deriva de la misma matriz de probabilidades, sin una
+    llamada extra a predict.
+
+    Returns:
+        tuple: (array de bool con la predicción, array con la probabilidad de shaming).
+    """
+    proba = clf.predict_proba(numpy.vstack([span.vector for span in spans]))
+    labels = clf.classes_[proba.argmax(axis=1)]
+    positive = list(clf.classes_).index(1)
+    return labels == 1, proba[:, positive]
+
+
+def check_shaming_in_docs(docs, early_exit=SHAMING_EARLY_EXIT, compiled=None):
+    """
+    Analiza varios Docs evaluando todas sus oraciones candidatas y devuelve,
+    para cada uno, la mejor: la de mayor confianza entre las que indican
+    shaming según has_shaming (por el clasificador o por el léxico negativo)
+    o, si ninguna lo indica, la de mayor confianza.
 
-        rule_name = NLP.vocab.strings[match_id]
+    Sin umbral de corte, las oraciones candidatas de todos los Docs se
+    clasifican juntas en una sola matriz. Con ``early_exit`` se clasifican
+    por rondas (la primera candidata de cada Doc, luego la segunda, ...) y un
+    Doc deja de evaluarse en cuanto alguna oración alcanza ese umbral, así
+    no se calculan vectores de oraciones que no hacen falta.
+
+    Args:
+        docs (list[Doc]): Docs a analizar.
+        early_exit (float, opcional): Confianza a partir de la cual se deja
+            de evaluar un Doc. 0 o None evalúa todas las candidatas.
+        compiled (CompiledShaming, opcional): Patrones a usar; por defecto
+            los del paquete vigente.
+
+    Returns:
+        list: Por cada Doc, False si no hay candidatas o un dict con
+            "pattern", "ml_pred", "confidence" y "negative_terms" de la
+            mejor oración.
+    """
+    compiled = compiled or current_patterns()
+    results = [False] * len(docs)
+    candidates = [find_shaming_candidates(doc, compiled) for doc in docs]
+    step = 1 if early_exit else max((len(found) for found in candidates), default=0)
+    offset = 0
+    pending = [i for i, found in enumerate(candidates) if found]
+    while pending:
+        batch = [
+            (i, rule_name, span)
+            for i in pending
+            for rule_name, span in candidates[i][offset:offset + step]
+        ]
 
         # --- IA: verificar con el clasificador ---
-        vec = span.vector.reshape(1, -1)
-        prediction = clf.predict(vec)[0]
-        confidence = clf.predict_proba(vec)[0][1]
+        predictions, confidences = classify_spans([span for _, _, span in batch])
+        for (i, rule_name, span), prediction, confidence in zip(batch, predictions, confidences):
+            result = {
+                "pattern": rule_name,
+                "ml_pred": bool(prediction),
+                "confidence": float(confidence),
+                "negative_terms": contains_negative_terms(span, compiled),
+            }
+            if not results[i] or _rank(result) > _rank(results[i]):
+                results[i] = result
 
-        if prediction == 1:
-            return {"pattern": rule_name, "ml_pred": True, "confidence": confidence}
-        else:
-            return {"pattern": rule_name, "ml_pred": False, "confidence": confidence}
+        offset += step
+        pending = [
+            i for i in pending
+            if len(candidates[i]) > offset
+            and not (early_exit and results[i]["confidence"] >= early_exit)
+        ]
+    return results
 
-    return False
 
+def check_shaming_in_doc(doc, compiled=None):
+    return check_shaming_in_docs([doc], compiled=compiled)[0]
+
+
+def compile_shaming(pack):
+    """
+    Compila patterns/shaming.json en el Detector de shaming.
+    """
+    rules, validated = compiled_rules("shaming", pack)
+    compiled = CompiledShaming(
+        create_matcher(rules, validate=not validated),
+        frozenset(text.lower() for text in pack["exceptions"]),
+        *compile_negative_lexicon(pack["negative_terms"]),
+    )
+    # La versión incluye el paquete (patrones, excepciones y léxico negativo),
+    # el clasificador entrenado y el umbral de corte (cambia qué oración se reporta)
+    return Detector(
+        "shaming",
+        detector_version(pack, joblib.hash(clf), SHAMING_EARLY_EXIT),
+        PIPELINE_ATTRS,
+        partial(check_shaming_in_doc, compiled=compiled),
+        partial(check_shaming_in_docs, compiled=compiled),
+        compiled,
+    )
+
+
+register("shaming", compile_shaming, {"exceptions": list, "negative_terms": dict})
 
 
 def check_text_shaming_nopath(data):
@@ -73,17 +271,27 @@ def check_text_shaming_nopath(data):
     response["ShamingInstances"] = []
     response["Path"] = data["Path"]
 
+    # Título, textos y botones se procesan juntos en un único lote
+    results = run_detector(
+        [data["Title"]]
+        + [text["Text"] for text in data["Texts"]]
+        + [button["Label"] for button in data["Buttons"]],
+        get_detector("shaming"),
+    )
+    title_result = results[0]
+    text_results = results[1:len(data["Texts"]) + 1]
+    button_results = results[len(data["Texts"]) + 1:]
+
     # --- Título ---
-    result = check_shaming_in_text(data["Title"])
-    if result and result["ml_pred"]:
+    result = title_result
+    if has_shaming(result):
         response["Title"] = {"Text": data["Title"], "HasShaming": True, "ID": "Title", "Confidence": result["confidence"]}
     else:
         response["Title"] = {"Text": data["Title"], "HasShaming": False, "ID": "Title"}
 
     # --- Textos ---
-    for text in data["Texts"]:
-        result = check_shaming_in_text(text["Text"])
-        if result and result["ml_pred"]:
+    for text, result in zip(data["Texts"], text_results):
+        if has_shaming(result):
             response["ShamingInstances"].append(
                 {
                     "Text": text["Text"],
@@ -102,9 +310,8 @@ def check_text_shaming_nopath(data):
             )
 
     # --- Botones ---
-    for button in data["Buttons"]:
-        result = check_shaming_in_text(button["Label"])
-        if result and result["ml_pred"]:
+    for button, result in zip(data["Buttons"], button_results):
+        if has_shaming(result):
             response["ShamingInstances"].append(
                 {
                     "Text": button["Label"],
@@ -143,13 +350,14 @@ def check_text_shaming(text, path):
             - "pattern" (str): El nombre del patrón identificado ("SHAMING").
         Si no se encuentran coincidencias, devuelve una lista vacía.
     """
-    doc = NLP(text)
-    matches = matcher(doc)  # matcher global con todos los patrones
+    compiled = current_patterns()
+    doc = parse_text(text, PIPELINE_ATTRS)
+    matches = compiled.matcher(doc)  # matcher con todos los patrones del paquete vigente
     results = []
 
     for match_id, start, end in matches:
         span = doc[start:end]
-        if span.text.lower() in exceptions():
+        if span.text.lower() in compiled.exceptions:
             continue  # ignorar excepciones definidas
 
         results.append({
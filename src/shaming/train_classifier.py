@@ -1,28 +1,51 @@
+# Entrena el clasificador de shaming y lo guarda como paquete versionado.
+# Se ejecuta desde la raíz del repositorio:
+#   python -m src.shaming.train_classifier
 import pandas as pd
-import spacy
+from sklearn.model_selection import cross_validate
 from sklearn.svm import SVC
-import joblib
 import os
+from config import NLP, SHAMING_MODEL_PATH
+from .bundle import save_bundle
+from .linear_model import LinearShamingModel
 
 # Ruta al dataset
 BASE_DIR = os.path.dirname(__file__)  # carpeta donde está train_classifier.py
 DATA_PATH = os.path.join(BASE_DIR, "shaming_dataset.csv")
 
-# Cargar spaCy en español
-nlp = spacy.load("es_core_news_md")
+# Etiquetas del dataset
+LABEL_MAP = {0: "no_shaming", 1: "shaming"}
 
 # Leer dataset CSV
 df = pd.read_csv(DATA_PATH)  # columnas: "text", "label"
 print(f"Dataset cargado con {len(df)} ejemplos.")
 
-# Vectorizar cada frase con spaCy
-X = [nlp(text).vector for text in df["text"]]
+# Vectorizar cada frase con el mismo modelo de spaCy que usa el servidor
+# (config.NLP), así los vectores de entrenamiento y de inferencia coinciden
+X = [doc.vector for doc in NLP.pipe(df["text"])]
 y = df["label"].values
 
+# Métricas con validación cruzada antes de entrenar con todo el dataset
+scores = cross_validate(SVC(kernel="linear"), X, y, cv=5, scoring=["accuracy", "f1"])
+metrics = {
+    "samples": int(len(df)),
+    "cv_folds": 5,
+    "cv_accuracy": float(scores["test_accuracy"].mean()),
+    "cv_f1": float(scores["test_f1"].mean()),
+}
+print(f"Métricas (validación cruzada): {metrics}")
+
 # Entrenar clasificador SVM
 clf = SVC(kernel="linear", probability=True)
 clf.fit(X, y)
 
-# Guardar el modelo en disco
-joblib.dump(clf, "shaming_svm.pkl")
-print("Modelo entrenado y guardado en shaming_svm.pkl")
+# Guardar el modelo en disco junto con los datos del modelo de spaCy usado
+save_bundle(
+    SHAMING_MODEL_PATH,
+    LinearShamingModel.from_svc(clf),
+    embedding_model=f"{NLP.meta['lang']}_{NLP.meta['name']}",
+    embedding_version=NLP.meta["version"],
+    label_map=LABEL_MAP,
+    metrics=metrics,
+)
+print(f"Modelo entrenado y guardado en {SHAMING_MODEL_PATH}")
@@ -1,4 +1,5 @@
 import marshmallow
+from src.analysis.types import MatchSchema
 
 class UrgencyTextSchema(marshmallow.Schema):
     """
@@ -42,9 +43,11 @@ class UrgencyRequestSchema(marshmallow.Schema):
     Atributos:
         version (str): Obligatorio. Versión del esquema.
         texts (List[UrgencyTextSchema]): Obligatorio. Lista de textos de urgencia.
+        detailed (bool, opcional): Modo detallado; por defecto False.
     """
     version = marshmallow.fields.String(required=True, metadata={"description": "Versión del esquema."})
     texts = marshmallow.fields.List(marshmallow.fields.Nested(UrgencyTextSchema), required=True)
+    detailed = marshmallow.fields.Boolean(required=False, load_default=False, metadata={"description": "Devolver cada coincidencia con su regla y offsets."})
 
 class UrgencyInstanceSchema(marshmallow.Schema):
     """
@@ -62,11 +65,13 @@ class UrgencyInstanceSchema(marshmallow.Schema):
         text (str): Obligatorio. Texto asociado a la instancia de urgencia.
         has_urgency (bool): Obligatorio. Indica si el texto tiene urgencia.
         id (str, opcional): Identificador opcional de la instancia.
+        matches (List[MatchSchema], opcional): Coincidencias (modo detallado).
     """
     text = marshmallow.fields.String(required=True)
     has_urgency = marshmallow.fields.Boolean(required=True)
     id = marshmallow.fields.String(required=False)
     path = marshmallow.fields.String(required=False)
+    matches = marshmallow.fields.List(marshmallow.fields.Nested(MatchSchema), required=False)
 
 class UrgencyResponseSchema(marshmallow.Schema):
     """
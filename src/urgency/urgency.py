@@ -3,398 +3,150 @@ Este módulo detecta patrones de urgencia en textos usando spaCy.
 
 Incluye dos tipos de matchers:
 - PhraseMatcher: detecta coincidencias exactas de frases típicas de urgencia
-    (ej: "ventas flash", "compre ya", "última oportunidad", "limited time offer").
+    (ej: "ventas flash", "compre ya", "última oportunidad", "limited time offer"),
+    sin distinguir mayúsculas ni tildes. Se arma solo con el tokenizador, sin
+    correr el pipeline completo sobre cada frase.
 - Matcher: detecta patrones estructurales flexibles, como verbos imperativos
     combinados con palabras de urgencia, o frases como
     "no se quede fuera", "la promoción termina pronto", "quedan pocas horas".
 
-Esto permite cubrir tanto frases hardcodeadas como variantes y estructuras
-comunes de urgencia comercial (dark patterns).
+Esto permite cubrir tanto frases fijas como variantes y estructuras
+comunes de urgencia comercial (dark patterns). Las frases y los patrones se
+definen en patterns/urgency.json (ver src/analysis/packs.py).
 """
 
-import unicodedata
+from collections import namedtuple
+from functools import partial
 from config import NLP
-from spacy.matcher import Matcher
+from spacy.matcher import PhraseMatcher
+from src.analysis.artifacts import compiled_rules, create_rule_matcher
+from src.analysis.batch import Detector, run_detector
+from src.analysis.cache import detector_version
+from src.analysis.matches import detailed_detector, match_details, matcher_spans
+from src.analysis.packs import get_detector, register
+from src.analysis.prefilter import Prefilter, strip_accents
 from .types import UrgencyResponseSchema
 
 
-frases_urgencia = [
-    "ventas flash",
-    "venta flash",
-    "oferta flash",
-    "ventas relampago",
-    "compre ya",
-    "compra ya",
-    "promoción relampago",
-    "promoción relámpago",
-    "promocion relampago",
-    "promoción flash",
-    "no se quede fuera",
-    "última oportunidad",
-    "oferta especial",
-    "oferta única",
-    "solo hoy",
-    "solo por hoy",
-    "descuento por tiempo limitado",
-    "promoción limitada",
-    "flash sale",
-    "flash deals",
-    "limited time offer",
-    "hurry up",
-    "last chance",
-    "offer ends soon",
-    "limited offer",
-    "time is running out",
-    "apresúrate",
-    "tiempo restante",
-    "ofertas por dia",
-    "ofertas por día",
-    "cupon",
-    "cupón",
-    "mega oferta",
-    "última oportunidad",
-    "super oferta",
-    "caduca en"
-]
+# Atributos de token que usan los patrones (ver src/analysis/batch.py).
+# IS_SENT_START se resuelve con el senter, sin necesidad del parser.
+PIPELINE_ATTRS = frozenset({"POS", "MORPH", "LEMMA", "SENT"})
 
 
-urgency_matcher = Matcher(NLP.vocab)
 
-for texto in frases_urgencia:
-    doc_frase = NLP(texto)
-    pattern = [{"LOWER": token.lower_} for token in doc_frase]
-    urgency_matcher.add("URGENCIA_PHRASE", [pattern])
-
-urgency_matcher.add(
-    "URGENT_IMPERATIVE_DIRECT",
-    [
-        [
-            {
-                "LEMMA": {
-                    "IN": [
-                        "comprar",
-                        "aprovechar",
-                        "entrar",
-                        "participar",
-                        "apresurarse",
-                        "adquirir",
-                        "obtener",
-                        "reservar",
-                        "haz",
-                    ]
-                },
-                "POS": "VERB",
-                "MORPH": {"IS_SUPERSET": ["Mood=Imp"]},
-            },
-            {"LOWER": {"IN": ["ya", "ahora", "mismo", "hoy"]}, "OP": "?"},
-        ],
-    ],
-)
+def phrase_doc(text):
+    """
+    Devuelve un Doc solo tokenizado, en minúscula y sin tildes, sobre el que
+    se aplica el PhraseMatcher de frases.
+    """
+    return NLP.make_doc(strip_accents(text.lower()))
 
-urgency_matcher.add(
-    "URGENT_IMPERATIVE_SIMPLE",
-    [
-        [
-            {
-                "POS": "VERB",
-                "MORPH": {"IS_SUPERSET": ["Mood=Imp"]},
-                "LEMMA": {"IN": ["comprar", "hacer", "aprovechar", "venir", "ir"]},
-            },
-        ],
-    ],
-)
 
-urgency_matcher.add(
-    "URGENT_DONT_MISS_OUT",
-    [
-        [
-            {"LOWER": {"IN": ["no"]}},
-            {
-                "POS": {"IN": ["PRON", "ADV", "DET", "ADP"]},
-                "OP": "*",
-            },
-            {"LEMMA": {"IN": ["quedar", "perder", "dejar"]}},
-            {
-                "POS": {"IN": ["PRON", "ADV", "ADP", "DET"]},
-                "OP": "*",
-            },
-            {"LOWER": {"IN": ["fuera", "atrás", "oportunidad", "pasar", "esto"]}},
-        ],
-    ],
-)
+# Matchers compilados a partir de patterns/urgency.json
+CompiledUrgency = namedtuple("CompiledUrgency", ["phrase_matcher", "matcher"])
 
-urgency_matcher.add(
-    "URGENT_OFFER_ENDING_VERB",
-    [
-        [
-            {"LOWER": {"IN": ["la", "esta", "el", "este"]}, "OP": "?"},
-            {"LOWER": {"IN": ["oferta", "promoción", "venta", "descuento"]}},
-            {
-                "POS": {"IN": ["ADJ"]},
-                "OP": "*",
-            },  # Solo adjetivos que describan la oferta.
-            {
-                "LEMMA": {
-                    "IN": ["terminar", "finalizar", "acabar", "expirar", "validar"]
-                }
-            },
-            {
-                "LOWER": {
-                    "IN": [
-                        "pronto",
-                        "ya",
-                        "hoy",
-                        "mañana",
-                        "esta",
-                        "este",
-                        "la",
-                        "el",
-                        "en",
-                        "antes",
-                        "hasta",
-                    ]
-                },
-                "OP": "*",
-            },
-            {
-                "LOWER": {
-                    "IN": [
-                        "semana",
-                        "mes",
-                        "día",
-                        "noche",
-                        "oportunidad",
-                        "minutos",
-                        "horas",
-                        "dias",
-                        "medianoche",
-                        "mediodia",
-                    ]
-                },
-                "OP": "?",
-            },
-            {"LIKE_NUM": True, "OP": "?"},
-            {"LOWER": {"IN": ["minutos", "horas", "días", "semanas"]}, "OP": "?"},
-        ],
-        [
-            {
-                "LEMMA": {
-                    "IN": ["finalizar", "terminar", "acabar", "expirar", "vencer"]
-                },
-                "IS_SENT_START": True,
-            },
-            {"LOWER": "en", "OP": "?"},
-            {"IS_ALPHA": False, "OP": "+"},
-            {
-                "LOWER": {"IN": ["minutos", "horas", "días", "semanas", "h", "m", "s"]},
-                "OP": "*",
-            },
-        ],
-        [
-            {"LOWER": {"IN": ["la", "esta", "el", "este"]}, "OP": "?"},
-            {"LOWER": {"IN": ["oferta", "promoción", "venta", "descuento"]}},
-            {"LEMMA": "válido"},
-            {"LOWER": "hasta"},
-            {"LOWER": {"IN": ["medianoche", "mediodia", "hoy", "mañana", "noche"]}},
-        ],
-    ],
-)
 
-urgency_matcher.add(
-    "URGENT_OFFER_ENDING_BEFORE",
-    [
-        [
-            {"LOWER": {"IN": ["antes"]}},
-            {"LOWER": {"IN": ["de"]}},
-            {"LOWER": {"IN": ["que"]}},
-            {"LOWER": {"IN": ["se"]}, "OP": "?"},
-            {"LEMMA": {"IN": ["acabar", "terminar", "agotar", "finalizar", "expirar"]}},
-        ],
-    ],
-)
+def compile_urgency(pack):
+    """
+    Compila patterns/urgency.json: las frases van a un PhraseMatcher y las
+    reglas estructurales a un Matcher (validadas al agregarlas, salvo que
+    vengan del artefacto precompilado).
+    """
+    phrase_matcher = PhraseMatcher(NLP.vocab, attr="LOWER")
+    phrase_matcher.add("URGENCIA_PHRASE", [phrase_doc(texto) for texto in pack["phrases"]])
+    rules, validated = compiled_rules("urgency", pack)
+    compiled = CompiledUrgency(phrase_matcher, create_rule_matcher(rules, validated))
+    patterns = [pattern for group in rules.values() for pattern in group]
+    detector = Detector(
+        "urgency",
+        detector_version(pack),
+        PIPELINE_ATTRS,
+        partial(check_doc_urgency, compiled=compiled),
+        compiled=compiled,
+        prefilter=Prefilter(patterns, pack["phrases"], pack.get("lemma_forms")),
+        no_match=False,
+    )
+    return detector._replace(
+        detailed=detailed_detector(detector, partial(find_urgency_matches, compiled=compiled))
+    )
+
+
+def check_doc_urgency(doc, compiled=None):
+    """
+    Analiza un Doc ya procesado para detectar patrones de urgencia
+    y devuelve True si detecta al menos un patrón.
+    """
+    compiled = compiled or get_detector("urgency").compiled
+    if compiled.phrase_matcher(phrase_doc(doc.text)):
+        return True
+    for _ in compiled.matcher(doc):
+        return True
+    return False
 
-urgency_matcher.add(
-    "URGENT_LAST_CHANCE",
-    [
-        [
-            {"LOWER": {"IN": ["última", "último", "últimas", "últimos"]}},
-            {
-                "LOWER": {
-                    "IN": [
-                        "oportunidad",
-                        "chance",
-                        "posibilidad",
-                        "días",
-                        "horas",
-                        "cupos",
-                        "plazas",
-                    ]
-                }
-            },
-        ],
-        [{"LOWER": {"IN": ["last"]}}, {"LOWER": {"IN": ["chance", "opportunity"]}}],
-    ],
-)
 
-urgency_matcher.add(
-    "URGENT_TIME_LIMIT",
-    [
-        [
-            {"LOWER": {"IN": ["tiempo", "oferta", "promoción", "descuento"]}},
-            {"LOWER": {"IN": ["limitado", "limitada"]}},
-        ],
-        [{"LOWER": {"IN": ["limited"]}}, {"LOWER": {"IN": ["time", "offer"]}}],
-    ],
-)
+def find_urgency_matches(doc, compiled=None):
+    """
+    Modo detallado de check_doc_urgency: devuelve todas las coincidencias
+    de frases y de reglas con sus offsets (ver src/analysis/matches.py).
+    """
+    compiled = compiled or get_detector("urgency").compiled
+    matches = []
+    # phrase_doc conserva la longitud del texto, así los offsets de las
+    # frases valen para el Doc original
+    for rule, span in matcher_spans(compiled.phrase_matcher, phrase_doc(doc.text)):
+        doc_span = doc.char_span(span.start_char, min(span.end_char, len(doc.text)), alignment_mode="expand")
+        if doc_span is not None:
+            matches.append(match_details(rule, doc_span))
+    matches.extend(match_details(rule, span) for rule, span in matcher_spans(compiled.matcher, doc))
+    return sorted(matches, key=lambda match: (match["start"], match["end"], match["rule"]))
 
-urgency_matcher.add(
-    "URGENT_DONT_MISS_OUT",
-    [
-        [
-            {"LOWER": "no"},
-            {"POS": {"IN": ["PRON", "ADV", "DET", "ADP"]}, "OP": "*"},
-            {"LEMMA": "quedes"},
-            {"LOWER": "fuera"},
-            {"POS": {"IN": ["ADP", "DET"]}, "OP": "*"},
-            {
-                "LOWER": {
-                    "IN": [
-                        "oportunidad",
-                        "promoción",
-                        "esto",
-                        "ganga",
-                        "oferta",
-                        "evento",
-                    ]
-                }
-            },
-        ],
-        [
-            {"LOWER": "no"},
-            {"POS": {"IN": ["PRON", "ADV", "DET", "ADP"]}, "OP": "*"},
-            {"LEMMA": {"IN": ["perder", "dejar"]}},
-            {"POS": {"IN": ["PRON", "ADV", "ADP", "DET"]}, "OP": "*"},
-            {
-                "LOWER": {
-                    "IN": [
-                        "oportunidad",
-                        "pasar",
-                        "esto",
-                        "promoción",
-                        "ganga",
-                        "oferta",
-                        "evento",
-                    ]
-                }
-            },
-        ],
-        [
-            {
-                "LOWER": {
-                    "IN": [
-                        "envío",
-                        "oferta",
-                        "promoción",
-                        "descuento",
-                        "venta",
-                        "plazo",
-                    ]
-                }
-            },
-            {"POS": {"IN": ["ADJ", "ADV", "DET", "NOUN", "PROPN"]}, "OP": "*"},
-            {"LEMMA": {"IN": ["terminar", "acabar", "expirar", "finalizar"]}},
-            {
-                "LOWER": {
-                    "IN": ["pronto", "hoy", "ya", "ahora", "inmediatamente", "mañana"]
-                }
-            },
-        ],
-        [
-            {"LOWER": {"IN": ["último", "final", "solo"]}},
-            {"POS": {"IN": ["ADJ", "DET", "ADV"]}, "OP": "*"},
-            {"LOWER": {"IN": ["oportunidad", "día", "horas", "momentos", "chance"]}},
-        ],
-        [
-            {"LEMMA": "quedar"},
-            {"POS": {"IN": ["DET", "NUM"]}, "OP": "+"},
-            {
-                "LOWER": {
-                    "IN": ["días", "horas", "minutos", "cupos", "plazas", "unidades"]
-                }
-            },
-        ],
-    ],
-)
 
-urgency_matcher.add(
-    "URGENT_ENDS_SOON",
-    [
-        [
-            {"LOWER": {"IN": ["ends", "ending"]}},
-            {"LOWER": {"IN": ["soon", "today", "now"]}, "OP": "?"},
-        ]
-    ],
-)
-
-urgency_matcher.add(
-    "URGENT_HURRY",
-    [
-        [
-            {"LEMMA": {"IN": ["apresurarse", "apurar", "aprovechar"]}},
-            {"LOWER": {"IN": ["ya", "ahora", "mismo"]}, "OP": "?"},
-        ],
-        [
-            {"LOWER": {"IN": ["hurry", "rush"]}},
-            {"LOWER": {"IN": ["up", "now"]}, "OP": "?"},
-        ],
-    ],
-)
+def check_text_urgency(text, path):
+    """
+    Analiza un texto para detectar patrones de urgencia (no escasez)
+    y devuelve True si detecta al menos un patrón.
+    """
+    return run_detector([text], get_detector("urgency"))[0]
 
 
-urgency_matcher.add(
-    "PERCENTAGE",
-    [
-        [  # 👈 lista extra que envuelve el patrón
-            {"TEXT": {"REGEX": r"^\d{1,2}:\d{2}:\d{2}$"}},  # hora
-            {"TEXT": {"REGEX": r"^-?\d+%$"}},  # porcentaje
-        ],
-        [
-            {"TEXT": {"REGEX": r"^\d+(\.\d+)?%$"}},  # número con opcional decimal + %
-            {"LOWER": "de"},
-            {"LOWER": "descuento"},
-        ],
-    ],
-)
+register("urgency", compile_urgency, {"phrases": list})
 
 
-def check_text_urgency(text, path):
+def urgency_instance(analized_text, has_urgency, matches=None):
     """
-    Analiza un texto para detectar patrones de urgencia (no escasez)
-    y devuelve True si detecta al menos un patrón.
+    Arma la instancia de UrgencyInstanceSchema para un texto de la solicitud.
+    En el modo detallado ``matches`` trae las coincidencias.
     """
-    doc = NLP(text)
-    for _ in urgency_matcher(doc):
-        return True
-    return False
+    instance = {"text": analized_text["text"], "has_urgency": has_urgency}
+    if matches is not None:
+        instance["matches"] = matches
+    if analized_text.get("id") is not None:
+        instance["id"] = analized_text["id"]
+    if analized_text.get("path") is not None:
+        instance["path"] = analized_text["path"]
+    return instance
 
 
 def check_text_urgency_schema(data):
     """
     Recibe un dict validado por UrgencyRequestSchema
     y devuelve la respuesta serializada por UrgencyResponseSchema.
+    Todos los textos de la solicitud se procesan en un único lote.
+    Con "detailed" cada instancia incluye las coincidencias encontradas.
     """
-    urgency_instances = []
-    for current_analized_text in data["texts"]:
-        text = current_analized_text["text"]
-        id_ = current_analized_text.get("id")
-        path = current_analized_text.get("path")
-        has_urgency = check_text_urgency(text, path)
-        instance = {"text": text, "has_urgency": has_urgency}
-        if id_ is not None:
-            instance["id"] = id_
-        if path is not None:
-            instance["path"] = path
-        urgency_instances.append(instance)
+    texts = [analized_text["text"] for analized_text in data["texts"]]
+    if data.get("detailed"):
+        results = run_detector(texts, get_detector("urgency").detailed)
+        urgency_instances = [
+            urgency_instance(analized_text, bool(matches), matches)
+            for analized_text, matches in zip(data["texts"], results)
+        ]
+    else:
+        results = run_detector(texts, get_detector("urgency"))
+        urgency_instances = [
+            urgency_instance(analized_text, has_urgency)
+            for analized_text, has_urgency in zip(data["texts"], results)
+        ]
     response_schema = UrgencyResponseSchema()
     response = {"version": data["version"], "urgency_instances": urgency_instances}
     return response_schema.dump(response)
@@ -83,4 +83,42 @@ def test_scarcity(client):
         assert inst.get("has_scarcity") is True, f"ID {inst.get('id')} debería ser detectado como scarcity"
 
     for inst in n_ids:
-        assert inst.get("has_scarcity") is False, f"ID {inst.get('id')} no debe ser scarcity"
\ No newline at end of file
+        assert inst.get("has_scarcity") is False, f"ID {inst.get('id')} no debe ser scarcity"
+
+
+def test_analyze(client):
+    with open("ejemplos_urgency.json", encoding="utf-8") as f:
+        urgency_data = json.load(f)
+    with open("ejemplos_scarcity.json", encoding="utf-8") as f:
+        scarcity_data = json.load(f)
+
+    for data, flag in ((urgency_data, "has_urgency"), (scarcity_data, "has_scarcity")):
+        response = client.post("/analyze", json=data)
+        assert response.status_code == 200
+        assert response.json["version"] == data["version"]
+
+        instances = response.json["instances"]
+        assert len(instances) == len(data["texts"])
+        for instance, text_obj in zip(instances, data["texts"]):
+            assert instance["text"] == text_obj["text"]
+            for key in ("has_shaming", "has_urgency", "has_scarcity"):
+                assert isinstance(instance[key], bool)
+
+    # Los resultados deben coincidir con los endpoints individuales
+    urgency = client.post("/urgency", json=urgency_data).json["urgency_instances"]
+    analyze = client.post("/analyze", json=urgency_data).json["instances"]
+    assert [i["has_urgency"] for i in urgency] == [i["has_urgency"] for i in analyze]
+
+    scarcity = client.post("/scarcity", json=scarcity_data).json["instances"]
+    analyze = client.post("/analyze", json=scarcity_data).json["instances"]
+    assert [i["has_scarcity"] for i in scarcity] == [i["has_scarcity"] for i in analyze]
+
+
+def test_cache_stats(client):
+    payload = {"version": "1.0", "texts": [{"text": "Solo por hoy", "id": "c1"}]}
+    client.post("/urgency", json=payload)
+    before = client.get("/cache/stats").json
+    response = client.post("/urgency", json=payload)
+    after = client.get("/cache/stats").json
+    assert response.json["urgency_instances"][0]["has_urgency"] is True
+    assert after["hits"] == before["hits"] + 1
@@ -0,0 +1,45 @@
+import src.analysis.analysis  # noqa: F401  (registra los detectores)
+from src.analysis.artifacts import build_artifact, compiled_rules, create_rule_matcher, load_artifact
+from src.analysis.batch import parse_text
+from src.analysis.packs import get_pack
+from src.scarcity.scarcity import scarcity_rules
+
+
+def test_artifact_rules_match_compiled_rules(tmp_path):
+    path = str(tmp_path / "compiled_patterns.msgpack")
+    counts = build_artifact(path)
+    assert {"urgency", "scarcity", "shaming"} <= set(counts)
+
+    artifact = load_artifact(path)
+    pack = get_pack("scarcity")
+    rules, validated = compiled_rules("scarcity", pack, scarcity_rules, artifact=artifact)
+    assert validated
+    assert rules == scarcity_rules(pack)
+    assert len(create_rule_matcher(rules, validated)) == len(rules)
+
+
+def test_changed_pack_is_compiled(tmp_path):
+    path = str(tmp_path / "compiled_patterns.msgpack")
+    build_artifact(path)
+    pack = get_pack("urgency")
+    changed = {**pack, "rules": {"SOLO_HOY": [[{"LOWER": "solo"}, {"LOWER": "hoy"}]]}}
+    rules, validated = compiled_rules("urgency", changed, artifact=load_artifact(path))
+    assert not validated
+    assert list(rules) == ["SOLO_HOY"]
+
+
+def test_missing_or_corrupt_artifact_is_ignored(tmp_path):
+    path = tmp_path / "compiled_patterns.msgpack"
+    assert load_artifact(str(path)) == {}
+    assert load_artifact("") == {}
+    path.write_bytes(b"\xc1 no es msgpack")
+    assert load_artifact(str(path)) == {}
+
+
+def test_artifact_matcher_finds_same_matches(tmp_path):
+    path = str(tmp_path / "compiled_patterns.msgpack")
+    build_artifact(path)
+    pack = get_pack("scarcity")
+    rules, validated = compiled_rules("scarcity", pack, scarcity_rules, artifact=load_artifact(path))
+    doc = parse_text("¡Solo quedan 3 unidades! Ultimas unidades disponibles")
+    assert create_rule_matcher(rules, validated)(doc) == create_rule_matcher(scarcity_rules(pack))(doc)
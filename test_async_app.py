@@ -0,0 +1,85 @@
+import asyncio
+import json
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+import async_app
+from async_app import NLPPool, Overloaded, create_app
+
+
+def request(method, path, **kwargs):
+    async def run():
+        async with TestClient(TestServer(create_app())) as client:
+            response = await client.request(method, path, **kwargs)
+            return response.status, await response.json(), response.headers
+    return asyncio.run(run())
+
+
+def test_urgency_matches_flask_app():
+    from app import app
+    with open("ejemplos_urgency.json", encoding="utf-8") as f:
+        data = json.load(f)
+    status, body, headers = request("POST", "/urgency", json=data)
+    assert status == 200
+    assert headers["Access-Control-Allow-Origin"] == "*"
+    assert body == app.test_client().post("/urgency", json=data).json
+
+
+def test_health_and_ready():
+    assert request("GET", "/health")[0] == 200
+    status, body, _ = request("GET", "/ready")
+    assert status == 200
+    assert body["status"] == "ready"
+
+
+def test_invalid_request():
+    status, body, _ = request("POST", "/urgency", json={"texts": []})
+    assert status == 400
+    assert "version" in body["error"]
+
+
+def test_size_limit(monkeypatch):
+    monkeypatch.setattr(async_app, "MAX_REQUEST_TEXTS", 1)
+    data = {"version": "1.0", "texts": [{"text": "a"}, {"text": "b"}]}
+    status, _, _ = request("POST", "/urgency", json=data)
+    assert status == 413
+
+
+def test_backpressure():
+    async def run():
+        pool = NLPPool(workers=1, reserved=0, max_pending=1, max_large_pending=0, small_chars=10)
+        try:
+            with pytest.raises(Overloaded) as large:
+                await pool.run("urgency", {}, chars=11)
+            assert large.value.status == 429
+            pool.pending = 1
+            with pytest.raises(Overloaded) as full:
+                await pool.run("urgency", {}, chars=1)
+            assert full.value.status == 503
+        finally:
+            pool.shutdown()
+    asyncio.run(run())
+
+
+def test_broken_pool_is_replaced():
+    import os
+    import signal
+    import time
+
+    data = {"version": "1.0", "texts": [{"text": "Solo por hoy"}]}
+
+    async def run():
+        pool = NLPPool(workers=1, reserved=0)
+        try:
+            expected = await pool.run("urgency", data, chars=1)
+            # Como si el sistema matara el proceso por falta de memoria
+            for process in list(pool.executor._processes.values()):
+                os.kill(process.pid, signal.SIGKILL)
+            time.sleep(0.5)
+            with pytest.raises(Overloaded) as lost:
+                await pool.run("urgency", data, chars=1)
+            assert lost.value.status == 503
+            assert pool.stats()["restarts"] == 1
+            assert await pool.run("urgency", data, chars=1) == expected
+        finally:
+            pool.shutdown()
+    asyncio.run(run())
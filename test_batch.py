@@ -0,0 +1,101 @@
+import json
+from src.analysis.batch import parse_texts, run_detector, run_detectors
+from src.analysis.analysis import current_detectors, get_detector
+from src.analysis.cache import MemoryBackend, ResultCache
+import src.analysis.batch as batch
+
+
+def load_texts():
+    with open("ejemplos_urgency.json", encoding="utf-8") as f:
+        return [item["text"] for item in json.load(f)["texts"]]
+
+
+def test_multiprocess_parse_keeps_order():
+    texts = load_texts()
+    single = parse_texts(texts, batch_size=4, n_process=1)
+    multi = parse_texts(texts, batch_size=4, n_process=2)
+    assert [doc.text for doc in multi] == texts
+    assert [[token.lemma_ for token in doc] for doc in multi] == [[token.lemma_ for token in doc] for doc in single]
+
+
+def test_multiprocess_threshold(monkeypatch):
+    texts = load_texts()
+    expected = run_detectors(texts, current_detectors(), ResultCache(max_entries=0))
+    monkeypatch.setattr(batch, "NLP_N_PROCESS", 2)
+    monkeypatch.setattr(batch, "NLP_MULTIPROCESS_THRESHOLD", 10)
+    monkeypatch.setattr(batch, "NLP_BATCH_SIZE", 4)
+    assert run_detectors(texts, current_detectors(), ResultCache(max_entries=0)) == expected
+
+
+def test_repeated_texts_are_analyzed_once(monkeypatch):
+    parsed = []
+    parse_shared = batch.parse_shared
+
+    def recording_parse(texts, attrs=None):
+        parsed.extend(texts)
+        return parse_shared(texts, attrs)
+
+    monkeypatch.setattr(batch, "parse_shared", recording_parse)
+    texts = ["Agregar al carrito", "Solo quedan 3 unidades!", "Agregar  al carrito ", "Agregar al carrito"]
+    results = run_detectors(texts, current_detectors(), ResultCache(max_entries=0))
+    assert parsed.count("Agregar al carrito") == 1
+    assert parsed.count("Agregar  al carrito ") == 1
+    assert results[0] == results[3]
+    assert results == [run_detectors([text], current_detectors(), ResultCache(max_entries=0))[0] for text in texts]
+
+
+def test_detailed_results_are_not_shared_across_whitespace_variants():
+    texts = ["Solo quedan 3 unidades!", "  Solo quedan 3 unidades!"]
+    results = run_detectors(texts, current_detectors(detailed=True), ResultCache())
+    assert [match["start"] for match in results[0]["scarcity_matches"]] == [0]
+    assert [match["start"] for match in results[1]["scarcity_matches"]] == [2]
+
+
+def test_sentence_results_are_cached_per_boundary_source():
+    def sentence_starts(doc):
+        return [sent.start_char for sent in doc.sents]
+
+    sentences = batch.Detector("sentences", "v1", frozenset({"SENT"}), sentence_starts)
+    parsed = batch.Detector("parsed", "v1", frozenset({"DEP"}), lambda doc: None)
+    text = "oferta por tiempo limitado solo hoy 50% off en todo el sitio termina pronto aprovecha"
+    cache = ResultCache()
+    alone = run_detectors([text], [sentences], cache)[0]["sentences"]
+    together = run_detectors([text], [sentences, parsed], cache)[0]["sentences"]
+    assert alone == sentence_starts(batch.parse_text(text, {"SENT"}))
+    assert together == sentence_starts(batch.parse_text(text, {"DEP", "SENT"}))
+    assert batch.sentence_source({"POS", "SENT"}) == "senter"
+    assert batch.sentence_source({"SENT", "DEP"}) == batch.sentence_source(None) == "parser"
+
+
+def test_whitespace_variants_do_not_share_cached_results():
+    urgency = get_detector("urgency")
+    cache = ResultCache()
+    assert run_detector(["solo\n\npor hoy"], urgency, cache) == [False]
+    assert run_detector(["solo por hoy"], urgency, cache) == [True]
+
+
+def test_whitespace_variants_are_not_deduplicated():
+    urgency = get_detector("urgency")
+    texts = ["solo\n\npor hoy", "solo por hoy"]
+    assert run_detector(texts, urgency, ResultCache(max_entries=0)) == [False, True]
+    assert run_detector(texts[::-1], urgency, ResultCache(max_entries=0)) == [True, False]
+
+
+def test_cache_is_queried_once_per_request():
+    class CountingBackend(MemoryBackend):
+        calls = 0
+
+        def get_many(self, keys):
+            self.calls += 1
+            return super().get_many(keys)
+
+        def set_many(self, items):
+            self.calls += 1
+            super().set_many(items)
+
+    backend = CountingBackend()
+    texts = load_texts()
+    run_detectors(texts, current_detectors(), ResultCache(backend))
+    assert backend.calls == 2
+    run_detectors(texts, current_detectors(), ResultCache(backend))
+    assert backend.calls == 3
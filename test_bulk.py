@@ -0,0 +1,76 @@
+import json
+from src.analysis.bulk import resume_offset, run
+
+
+def write_pages(path, count):
+    with open("ejemplos_urgency.json", encoding="utf-8") as f:
+        page = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps(page if i != 2 else {"texts": []}, ensure_ascii=False) + "\n")
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_bulk_run_and_resume(tmp_path):
+    pages = tmp_path / "pages.jsonl"
+    full = tmp_path / "full.jsonl"
+    partial = tmp_path / "partial.jsonl"
+    write_pages(pages, 5)
+
+    assert run(pages, full, "urgency", chunk_size=2) == 5
+    records = read_lines(full)
+    assert [record["offset"] for record in records] == [0, 1, 2, 3, 4]
+    assert "error" in records[2]
+    assert records[0]["result"]["urgency_instances"]
+
+    # Salida cortada en la mitad de la cuarta línea
+    with open(full, "rb") as f:
+        lines = f.readlines()
+    with open(partial, "wb") as f:
+        f.write(b"".join(lines[:3]) + lines[3][:10])
+    assert resume_offset(partial) == 3
+    assert run(pages, partial, "urgency", start=3) == 2
+    assert read_lines(partial) == records
+
+
+def test_bulk_workers_do_not_spawn_processes(tmp_path, monkeypatch):
+    import src.analysis.batch as batch
+    from src.analysis.cache import RESULT_CACHE
+
+    pages = tmp_path / "pages.jsonl"
+    expected = tmp_path / "expected.jsonl"
+    output = tmp_path / "output.jsonl"
+    write_pages(pages, 4)
+    run(pages, expected, "urgency")
+    # Sin caché, para que los procesos del pool tengan que parsear
+    RESULT_CACHE.clear()
+
+    # Con NLP_N_PROCESS > 1 cada página supera el umbral de multiproceso
+    monkeypatch.setattr(batch, "NLP_N_PROCESS", 2)
+    monkeypatch.setattr(batch, "NLP_MULTIPROCESS_THRESHOLD", 1)
+    monkeypatch.setattr(batch, "NLP_BATCH_SIZE", 1)
+    assert run(pages, output, "urgency", processes=2, chunk_size=2) == 4
+    assert read_lines(output) == read_lines(expected)
+
+
+def test_unexpected_errors_are_recorded_per_record(tmp_path, monkeypatch):
+    import src.analysis.bulk as bulk
+
+    def failing_handler(detector, data):
+        if not data["texts"]:
+            raise RuntimeError("falla inesperada")
+        return run_handler(detector, data)
+
+    run_handler = bulk.run_handler
+    monkeypatch.setattr(bulk, "run_handler", failing_handler)
+    pages = tmp_path / "pages.jsonl"
+    output = tmp_path / "output.jsonl"
+    write_pages(pages, 4)
+    assert run(pages, output, "urgency") == 4
+    records = read_lines(output)
+    assert records[2]["error"] == "RuntimeError: falla inesperada"
+    assert all("result" in record for i, record in enumerate(records) if i != 2)
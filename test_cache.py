@@ -0,0 +1,179 @@
+import time
+from config import NLP
+from src.analysis.cache import (
+    MISSING,
+    MemoryBackend,
+    RedisBackend,
+    ResultCache,
+    SqliteBackend,
+    cache_key,
+    detector_version,
+    pattern_version,
+)
+
+
+def test_lru_eviction_and_counters():
+    cache = ResultCache(max_entries=2, ttl=0)
+    cache.set("a", True)
+    cache.set("b", False)
+    assert cache.get("a") is True   # "a" pasa a ser la más reciente
+    cache.set("c", [])
+    assert cache.get("b") is MISSING
+    assert cache.get("a") is True
+    assert cache.get("c") == []
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["size"] == 2
+
+
+def test_ttl_expiration():
+    cache = ResultCache(max_entries=10, ttl=0.05)
+    cache.set("a", True)
+    assert cache.get("a") is True
+    time.sleep(0.1)
+    assert cache.get("a") is MISSING
+
+
+def test_key_uses_exact_text_and_versioning():
+    # Los espacios cambian la tokenización: las variantes no comparten resultado
+    assert cache_key("urgency", "v1", "Solo  por hoy ") != cache_key("urgency", "v1", "Solo por hoy")
+    assert cache_key("urgency", "v1", "Solo por hoy") != cache_key("scarcity", "v1", "Solo por hoy")
+    assert cache_key("urgency", "v1", "Solo por hoy") != cache_key("urgency", "v2", "Solo por hoy")
+    assert pattern_version(["solo hoy"]) != pattern_version(["solo hoy", "última oportunidad"])
+
+
+def test_detector_version_depends_on_the_model(monkeypatch):
+    version = detector_version(["solo hoy"])
+    assert version != pattern_version(["solo hoy"])
+    monkeypatch.setitem(NLP.meta, "version", NLP.meta["version"] + "-otro")
+    assert detector_version(["solo hoy"]) != version
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = ResultCache(SqliteBackend(path, max_entries=10, ttl=0))
+    reader = ResultCache(SqliteBackend(path, max_entries=10, ttl=0))
+    writer.set("k", [{"text": "Solo quedan 3", "pattern": "fake_scarcity"}])
+    assert reader.get("k") == [{"text": "Solo quedan 3", "pattern": "fake_scarcity"}]
+    assert reader.get("otra") is MISSING
+    assert reader.stats()["hits"] == 1
+
+
+def test_sqlite_backend_eviction(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "cache.sqlite3"), max_entries=5, ttl=0)
+    backend.EVICT_EVERY = 1
+    for i in range(8):
+        backend.set(str(i), i)
+    assert backend.size() == 5
+    assert backend.get("7") == 7
+
+
+class FakeRedis:
+    """Sustituto local de un cliente Redis con las operaciones que usa RedisBackend."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        return self.data.get(key)
+
+    def mget(self, keys):
+        self.calls += 1
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def set(self, key, value, ex=None, px=None):
+        if ex == 0 or px == 0:
+            raise ValueError("invalid expire time in 'set' command")
+        self.data[key] = value.encode("utf-8")
+        self.ttls[key] = px
+
+    def scan_iter(self, match):
+        return [key for key in self.data if key.startswith(match.rstrip("*"))]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class FakePipeline:
+    """Acumula los SET y los aplica todos en execute (un solo viaje al servidor)."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def set(self, key, value, ex=None, px=None):
+        self.commands.append((key, value, ex, px))
+
+    def execute(self):
+        self.client.calls += 1
+        for key, value, ex, px in self.commands:
+            if ex == 0 or px == 0:
+                raise ValueError("invalid expire time in 'set' command")
+            self.client.data[key] = value.encode("utf-8")
+            self.client.ttls[key] = px
+
+
+def test_redis_backend_with_stand_in():
+    cache = ResultCache(RedisBackend(client=FakeRedis()))
+    cache.set("k", {"pattern": "FP_VERB", "ml_pred": True, "confidence": 0.9})
+    assert cache.get("k") == {"pattern": "FP_VERB", "ml_pred": True, "confidence": 0.9}
+    cache.clear()
+    assert cache.get("k") is MISSING
+
+
+def test_redis_backend_subsecond_ttl():
+    client = FakeRedis()
+    cache = ResultCache(RedisBackend(ttl=0.5, client=client))
+    cache.set("k", True)
+    assert cache.get("k") is True
+    assert cache.stats()["errors"] == 0
+    assert client.ttls["dark-patterns:k"] == 500
+
+
+def test_redis_batches_use_one_round_trip():
+    client = FakeRedis()
+    cache = ResultCache(RedisBackend(client=client))
+    cache.set_many([(str(i), i) for i in range(300)])
+    assert client.calls == 1
+    assert cache.get_many([str(i) for i in range(300)] + ["otra"]) == list(range(300)) + [MISSING]
+    assert client.calls == 2
+    assert cache.stats()["hits"] == 300
+    assert cache.stats()["misses"] == 1
+
+
+def test_sqlite_batches(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "cache.sqlite3"), max_entries=2000, ttl=0)
+    backend.CHUNK_SIZE = 7
+    backend.set_many([(str(i), {"n": i}) for i in range(20)])
+    assert backend.get_many(["19", "x", "0"]) == [{"n": 19}, MISSING, {"n": 0}]
+    assert backend.get_many([str(i) for i in range(20)]) == [{"n": i} for i in range(20)]
+
+
+def test_sqlite_hits_do_not_write(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "cache.sqlite3"), max_entries=10, ttl=0)
+    backend.set("k", True)
+    connection = backend._connection()
+    changes = connection.total_changes
+    assert [backend.get("k") for _ in range(3)] == [True, True, True]
+    assert connection.total_changes == changes
+    backend.TOUCH_INTERVAL = 0
+    assert backend.get("k") is True
+    assert connection.total_changes == changes + 1
+
+
+def test_backend_errors_are_cache_misses():
+    class BrokenBackend(MemoryBackend):
+        def get(self, key):
+            raise ConnectionError("backend caído")
+
+    cache = ResultCache(BrokenBackend())
+    assert cache.get("k") is MISSING
+    assert cache.stats()["errors"] == 1
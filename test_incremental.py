@@ -0,0 +1,101 @@
+import pytest
+from marshmallow import ValidationError
+from app import app
+from src.analysis.cache import MemoryBackend, ResultCache
+from src.analysis.incremental import SnapshotMismatchError, check_incremental_schema, text_hash
+from src.analysis.types import IncrementalRequestSchema
+
+
+@pytest.fixture
+def store():
+    return ResultCache(MemoryBackend(max_entries=10, ttl=0))
+
+
+def rescan(store, texts, session="cliente-1", **extra):
+    data = IncrementalRequestSchema().load(
+        {"version": "1.0", "session": session, "page": "https://tienda.com/listado", "texts": texts, **extra}
+    )
+    return check_incremental_schema(data, store)
+
+
+def test_only_changed_texts_are_analyzed(store):
+    first = rescan(store, [
+        {"id": "a1", "text": "Agregar al carrito"},
+        {"id": "a2", "text": "Solo quedan 3 unidades!"},
+        {"id": "a3", "text": "Envío gratis"},
+    ])
+    assert first["analyzed"] == 3
+    assert [instance["id"] for instance in first["instances"]] == ["a1", "a2", "a3"]
+    assert first["instances"][1]["has_scarcity"] is True
+
+    second = rescan(store, [
+        {"id": "a1", "hash": first["instances"][0]["hash"]},
+        {"id": "a2", "text": "Quedan muchas unidades"},
+        {"id": "a4", "text": "Ver más"},
+    ], removed=["a3"])
+    assert second["analyzed"] == 2
+    assert [instance["id"] for instance in second["instances"]] == ["a1", "a2", "a4"]
+    assert second["instances"][0] == first["instances"][0]
+    assert second["instances"][1]["has_scarcity"] is False
+    assert second["instances"][2]["hash"] == text_hash("Ver más")
+
+
+def test_complete_request_replaces_the_page(store):
+    first = rescan(store, [{"id": "a1", "text": "Agregar al carrito"}, {"id": "a2", "text": "Comprar"}])
+    second = rescan(store, [{"id": "a2", "hash": first["instances"][1]["hash"]}], complete=True)
+    assert second["analyzed"] == 0
+    assert [instance["id"] for instance in second["instances"]] == ["a2"]
+
+
+def test_unknown_hash_asks_to_resend(store):
+    with pytest.raises(SnapshotMismatchError) as error:
+        rescan(store, [{"id": "a1", "hash": text_hash("Agregar al carrito")}])
+    assert error.value.ids == ["a1"]
+
+
+def test_endpoint_returns_409_with_ids_to_resend():
+    with app.test_client() as client:
+        response = client.post("/analyze/incremental", json={
+            "version": "1.0", "session": "cliente-1", "page": "https://tienda.com/otra",
+            "texts": [{"id": "x", "hash": "0" * 40}],
+        })
+    assert response.status_code == 409
+    assert response.json["resend"] == ["x"]
+
+
+def test_pattern_change_reanalyzes_the_snapshot(store):
+    first = rescan(store, [{"id": "a1", "text": "Solo quedan 3 unidades!", "path": "/p"}])
+    key, (snapshot, _) = next(iter(store.backend._entries.items()))
+    store.set(key, {**snapshot, "versions": ["vieja"]})
+    second = rescan(store, [], removed=[])
+    assert second["analyzed"] == 1
+    assert second["instances"] == first["instances"]
+
+
+def test_oldest_ids_are_evicted_over_the_cap(store):
+    def rescan_capped(texts):
+        data = IncrementalRequestSchema().load(
+            {"version": "1.0", "session": "cliente-1", "page": "https://tienda.com/infinito", "texts": texts}
+        )
+        return check_incremental_schema(data, store, max_items=3)
+
+    rescan_capped([{"id": f"p{i}", "text": f"Producto {i}"} for i in range(3)])
+    response = rescan_capped([{"id": "p0", "text": "Producto 0"}, {"id": "p3", "text": "Producto 3"}])
+    assert response["evicted"] == ["p1"]
+    assert [instance["id"] for instance in response["instances"]] == ["p0", "p2", "p3"]
+
+    with pytest.raises(ValidationError):
+        rescan_capped([{"id": f"n{i}", "text": f"Nuevo {i}"} for i in range(4)])
+
+
+def test_clients_do_not_share_snapshots(store):
+    first = rescan(store, [{"id": "a1", "text": "Solo quedan 3 unidades!"}], session="cliente-1")
+    other = rescan(store, [{"id": "b1", "text": "Agregar al carrito"}], session="cliente-2")
+    assert [instance["id"] for instance in other["instances"]] == ["b1"]
+    again = rescan(store, [{"id": "a1", "hash": first["instances"][0]["hash"]}], session="cliente-1")
+    assert again["analyzed"] == 0
+    assert [instance["id"] for instance in again["instances"]] == ["a1"]
+    with pytest.raises(SnapshotMismatchError):
+        rescan(store, [{"id": "a1", "hash": first["instances"][0]["hash"]}], session="cliente-3")
+    with pytest.raises(ValidationError):
+        rescan(store, [], session="")
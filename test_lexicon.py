@@ -0,0 +1,24 @@
+from spacy.matcher.levenshtein import levenshtein_compare
+from src.analysis.lexicon import edits1, expand_token, typo_variants
+
+
+def test_edit_distance_one_matches_spacy():
+    for word in ("solo", "queda"):
+        variants = typo_variants(word, 1)
+        assert all(levenshtein_compare(variant, word, 1) for variant in variants)
+        assert {"sola", "slo", "sólo", "quedan", "qeda"} & variants
+
+
+def test_common_typos_for_larger_distances():
+    variants = typo_variants("ultima", 2)
+    for typo in ("última", "últimas", "ultmia", "ultimaa", "utlimas"):
+        assert typo in variants
+    assert edits1("ultima") <= variants
+
+
+def test_expand_token():
+    token = expand_token({"LOWER": {"FUZZY": {"IN": ["unidade", "disponible"]}}, "OP": "?"})
+    assert token["OP"] == "?"
+    assert {"unidades", "unidad", "disponibles"} <= set(token["LOWER"]["IN"])
+    plain = {"LOWER": {"IN": ["solo", "sólo"]}}
+    assert expand_token(plain) is plain
@@ -0,0 +1,54 @@
+import time
+from app import app
+from src.analysis.lifecycle import ModelLifecycle, warmup_texts
+
+
+def test_warmup_uses_bundled_examples():
+    texts = warmup_texts()
+    assert "Solo quedan 2 en stock" in texts
+    assert "Title" not in texts
+
+
+def test_health_and_ready():
+    with app.test_client() as client:
+        assert client.get("/health").status_code == 200
+        response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json["status"] == "ready"
+    # Sin shaming_model.npz se informa que el clasificador no fue validado
+    assert "validated" in response.json["shaming_model"]
+
+
+def test_background_warmup_becomes_ready():
+    lifecycle = ModelLifecycle()
+    lifecycle.start("background")
+    deadline = time.monotonic() + 60
+    while not lifecycle.ready() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert lifecycle.ready()
+    assert lifecycle.status()["warmup_texts"] == len(warmup_texts())
+
+
+def test_failed_warmup_is_not_ready(monkeypatch):
+    lifecycle = ModelLifecycle()
+
+    def broken(texts=None):
+        raise RuntimeError("sin modelo")
+
+    monkeypatch.setattr(lifecycle, "warm_up", broken)
+    lifecycle.start("sync")
+    assert not lifecycle.ready()
+    assert lifecycle.status()["status"] == "failed"
+    assert "sin modelo" in lifecycle.status()["error"]
+
+
+def test_background_warmup_waits_for_the_worker():
+    lifecycle = ModelLifecycle()
+    lifecycle.start("background", in_workers=True)
+    time.sleep(0.1)
+    assert lifecycle.status()["status"] == "starting"
+    lifecycle.start_in_worker("background")
+    deadline = time.monotonic() + 60
+    while not lifecycle.ready() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert lifecycle.ready()
@@ -0,0 +1,44 @@
+import json
+import pytest
+from src.analysis.analysis import current_detectors
+from src.analysis.batch import run_detectors
+from src.analysis.cache import ResultCache
+from src.analysis.handlers import handle_urgency
+
+
+@pytest.mark.parametrize("corpus", ["ejemplos_urgency.json", "ejemplos_scarcity.json"])
+def test_detailed_matches_agree_with_flags(corpus):
+    with open(corpus, encoding="utf-8") as f:
+        texts = [item["text"] for item in json.load(f)["texts"]]
+    flags = run_detectors(texts, current_detectors(), ResultCache(max_entries=0))
+    detailed = run_detectors(texts, current_detectors(detailed=True), ResultCache(max_entries=0))
+    for text, flag, result in zip(texts, flags, detailed):
+        assert bool(result["urgency_matches"]) == flag["urgency"], text
+        assert bool(result["scarcity_matches"]) == bool(flag["scarcity"]), text
+        for match in result["urgency_matches"] + result["scarcity_matches"]:
+            assert text[match["start"]:match["end"]] == match["text"]
+            assert match["sentence_start"] <= match["start"] < match["end"] <= match["sentence_end"]
+
+
+def test_detailed_phrase_offsets():
+    text = "Nuevos modelos. ¡Última semana de OFERTA FLASH en toda la tienda!"
+    response = handle_urgency({"version": "1.0", "texts": [{"text": text}], "detailed": True})
+    instance = response["urgency_instances"][0]
+    assert instance["has_urgency"] is True
+    phrase = next(match for match in instance["matches"] if match["rule"] == "URGENCIA_PHRASE")
+    assert phrase["text"] == "OFERTA FLASH"
+    assert text[phrase["sentence_start"]:phrase["sentence_end"]].startswith("¡Última semana")
+
+
+
+def test_match_crossing_a_sentence_boundary():
+    text = "Aprovecha. Quedan pocas unidades"
+    analyze = current_detectors(detailed=True)
+    scarcity = [detector for detector in analyze if detector.name == "scarcity_matches"]
+    # Misma caché: /scarcity (senter) no reutiliza los offsets de /analyze (parser)
+    cache = ResultCache()
+    for detectors in (analyze, scarcity):
+        [result] = run_detectors([text], detectors, cache)
+        assert result == run_detectors([text], detectors, ResultCache(max_entries=0))[0]
+        for match in result["scarcity_matches"]:
+            assert match["sentence_start"] <= match["start"] < match["end"] <= match["sentence_end"]
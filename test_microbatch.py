@@ -0,0 +1,83 @@
+import threading
+import pytest
+from src.analysis.batch import parse_texts, sentence_source
+from src.analysis.microbatch import MicroBatcher
+
+
+def test_concurrent_requests_share_a_batch():
+    calls = []
+
+    def fake_parse(texts, attrs):
+        calls.append((list(texts), attrs))
+        return [text.upper() for text in texts]
+
+    batcher = MicroBatcher(fake_parse, max_wait=0.2, max_texts=1000)
+    results = {}
+    barrier = threading.Barrier(4)
+
+    def request(i):
+        barrier.wait()
+        results[i] = batcher.parse([f"texto {i}", f"boton {i}"], {"POS"} if i % 2 else {"SENT"})
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: [f"TEXTO {i}", f"BOTON {i}"] for i in range(4)}
+    assert len(calls) < 4
+    assert all(len(texts) % 2 == 0 for texts, _ in calls)
+    assert set().union(*(attrs for _, attrs in calls)) == {"POS", "SENT"}
+
+
+def test_batch_closes_at_max_texts():
+    sizes = []
+    batcher = MicroBatcher(lambda texts, attrs: sizes.append(len(texts)) or list(texts), max_wait=5, max_texts=2)
+    assert batcher.parse(["a", "b"]) == ["a", "b"]
+    assert sizes == [2]
+
+
+def test_errors_reach_the_caller():
+    def failing(texts, attrs):
+        raise ValueError("falló el pipeline")
+
+    batcher = MicroBatcher(failing, max_wait=0, max_texts=10)
+    with pytest.raises(ValueError):
+        batcher.parse(["a"])
+
+
+def test_docs_match_parse_texts():
+    texts = ["Solo quedan 3 unidades!", "Compra ya", "Agregar al carrito"]
+    batcher = MicroBatcher(parse_texts, max_wait=0.01, max_texts=100)
+    docs = batcher.parse(texts, {"LEMMA"})
+    assert [[token.lemma_ for token in doc] for doc in docs] == [
+        [token.lemma_ for token in doc] for doc in parse_texts(texts, {"LEMMA"})
+    ]
+
+
+def test_sentence_profiles_are_not_mixed():
+    calls = []
+
+    def fake_parse(texts, attrs):
+        calls.append((list(texts), attrs))
+        return list(texts)
+
+    batcher = MicroBatcher(fake_parse, max_wait=0.2, max_texts=1000, profile=sentence_source)
+    barrier = threading.Barrier(3)
+    attrs = {"urgencia": {"POS", "SENT"}, "escasez": {"POS", "LEMMA"}, "analyze": {"DEP", "SENT"}}
+
+    def request(name):
+        barrier.wait()
+        assert batcher.parse([name], attrs[name]) == [name]
+
+    threads = [threading.Thread(target=request, args=(name,)) for name in attrs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for texts, batch_attrs in calls:
+        assert not ("urgencia" in texts and "analyze" in texts)
+        if "urgencia" in texts:
+            assert "DEP" not in batch_attrs
@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import pytest
+from app import app
+import src.analysis.packs as packs
+from src.analysis.packs import PatternPackError, get_detector, load_pack, reload_packs, reload_if_changed
+from src.analysis.batch import run_detector
+
+
+@pytest.fixture
+def patterns_dir(tmp_path, monkeypatch):
+    # Copia de los paquetes para poder modificarlos sin tocar patterns/
+    for name in ("urgency", "scarcity", "shaming"):
+        shutil.copy(packs.pack_path(name), tmp_path / f"{name}.json")
+    monkeypatch.setattr(packs, "PATTERNS_DIR", str(tmp_path))
+    reload_packs()
+    yield tmp_path
+    monkeypatch.undo()
+    reload_packs()
+
+
+def write_pack(patterns_dir, name, pack):
+    with open(patterns_dir / f"{name}.json", "w", encoding="utf-8") as f:
+        json.dump(pack, f, ensure_ascii=False)
+    # Asegura un mtime distinto aunque el sistema de archivos tenga poca resolución
+    path = patterns_dir / f"{name}.json"
+    mtime = path.stat().st_mtime + 1
+    os.utime(path, (mtime, mtime))
+
+
+def test_load_pack_rejects_invalid(patterns_dir):
+    write_pack(patterns_dir, "scarcity", {"rules": {"fake_scarcity": [{"pattern": "no es una lista"}]}})
+    with pytest.raises(PatternPackError):
+        load_pack("scarcity")
+    write_pack(patterns_dir, "urgency", {"rules": {"R": [[{"LOWER": "hoy"}]]}})
+    with pytest.raises(PatternPackError):
+        load_pack("urgency", {"phrases": list})
+
+
+def test_reload_swaps_detector(patterns_dir):
+    text = "Aprovechá la promo zanahoria"
+    before = get_detector("urgency")
+    assert run_detector([text], before) == [False]
+
+    pack = load_pack("urgency")
+    pack["phrases"].append("promo zanahoria")
+    write_pack(patterns_dir, "urgency", pack)
+    assert set(reload_if_changed()) == {"urgency"}
+
+    after = get_detector("urgency")
+    assert after.version != before.version
+    assert run_detector([text], after) == [True]
+
+
+def test_invalid_reload_keeps_previous(patterns_dir):
+    before = get_detector("scarcity")
+    # Atributo inexistente: lo rechaza Matcher(validate=True) al compilar
+    write_pack(patterns_dir, "scarcity", {"rules": {"fake_scarcity": [[{"NO_EXISTE": "x"}]]}})
+    with pytest.raises(PatternPackError):
+        reload_packs()
+    assert get_detector("scarcity") is before
+
+
+def test_admin_reload_requires_token(monkeypatch):
+    client = app.test_client()
+    monkeypatch.setattr("app.ADMIN_TOKEN", "secreto")
+    assert client.post("/admin/patterns/reload").status_code == 403
+    response = client.post("/admin/patterns/reload", headers={"X-Admin-Token": "secreto"})
+    assert response.status_code == 200
+    assert set(response.json) == {"urgency", "scarcity", "shaming"}
+
+
+def test_watcher_is_started_per_worker():
+    import multiprocessing
+    import threading
+    from src.analysis.packs import start_watcher, start_watcher_in_worker
+
+    # Bajo gunicorn el maestro no crea el hilo antes del fork
+    assert start_watcher(60, in_workers=True) is None
+    assert start_watcher_in_worker(0) is None
+    thread = start_watcher_in_worker(60)
+    assert thread.is_alive()
+
+    # Los procesos auxiliares creados con fork no inician su propio hilo
+    def count_watchers(queue):
+        queue.put(sum(t.name == "pattern-pack-watcher" for t in threading.enumerate()))
+
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=count_watchers, args=(queue,))
+    process.start()
+    process.join()
+    assert queue.get(timeout=5) == 0
@@ -0,0 +1,55 @@
+import json
+import pytest
+import src.analysis.batch as batch
+from src.analysis.cache import ResultCache
+from src.analysis.packs import get_detector
+from src.analysis.prefilter import Prefilter, is_optional, lemma_prefixes, verify_prefilter, verify_quantifiers
+import src.scarcity.scarcity  # noqa: F401
+import src.urgency.urgency  # noqa: F401
+
+
+def load_texts(path):
+    with open(path, encoding="utf-8") as f:
+        return [item["text"] for item in json.load(f)["texts"]]
+
+
+@pytest.mark.parametrize("name, path", [
+    ("urgency", "ejemplos_urgency.json"),
+    ("scarcity", "ejemplos_scarcity.json"),
+])
+def test_no_false_negatives_on_examples(name, path):
+    false_negatives, _ = verify_prefilter(get_detector(name), load_texts(path))
+    assert false_negatives == []
+
+
+def test_prefilter_skips_texts_without_triggers():
+    for name in ("urgency", "scarcity"):
+        prefilter = get_detector(name).prefilter
+        assert not prefilter("$ 12.999")
+        assert not prefilter("Zapatillas Nike Air Max")
+    assert get_detector("urgency").prefilter("Ventas FLASH")       # frase sin tildes ni mayúsculas
+    assert get_detector("scarcity").prefilter("Solo quedan 3")
+
+
+def test_lemma_prefixes():
+    assert "pie" in lemma_prefixes("perder")     # pierde
+    assert "pid" in lemma_prefixes("pedir")      # pide
+    assert lemma_prefixes("ir") == {"ir"}        # las formas irregulares van en lemma_forms
+    prefilter = Prefilter([[{"LEMMA": "ir"}, {"LOWER": "ya"}]], lemma_forms={"ir": ["ve"]})
+    assert prefilter("Ve ya")
+    assert not prefilter("Mirá ya")
+
+
+def test_same_results_with_and_without_prefilter(monkeypatch):
+    texts = load_texts("ejemplos_urgency.json") + load_texts("ejemplos_scarcity.json")
+    detectors = [get_detector("urgency"), get_detector("scarcity")]
+    with_prefilter = batch.run_detectors(texts, detectors, ResultCache(max_entries=0))
+    monkeypatch.setattr(batch, "PREFILTER_ENABLED", False)
+    without_prefilter = batch.run_detectors(texts, detectors, ResultCache(max_entries=0))
+    assert with_prefilter == without_prefilter
+
+
+def test_zero_minimum_quantifiers_are_optional():
+    assert is_optional("{0,2}") and is_optional("{,3}") and is_optional("{0}") and is_optional("*")
+    assert not is_optional("{1,}") and not is_optional("{2}") and not is_optional("+") and not is_optional(None)
+    assert verify_quantifiers() == []
@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+import joblib
+import numpy
+import pytest
+from src.shaming.linear_model import LinearShamingModel
+
+
+@pytest.fixture(scope="module")
+def svc():
+    return joblib.load("shaming_svm.pkl")
+
+
+def test_linear_model_matches_svc(svc):
+    model = LinearShamingModel.load("shaming_linear.npy")
+    X = numpy.random.default_rng(0).normal(scale=0.5, size=(2000, svc.coef_.shape[1])).astype("float32")
+
+    numpy.testing.assert_allclose(model.decision_function(X), svc.decision_function(X), atol=1e-9)
+    numpy.testing.assert_allclose(model.predict_proba(X), svc.predict_proba(X), atol=1e-9)
+    labels = model.classes_[model.predict_proba(X).argmax(axis=1)]
+    assert (labels == svc.classes_[svc.predict_proba(X).argmax(axis=1)]).all()
+
+
+def test_linear_model_roundtrip(svc, tmp_path):
+    model = LinearShamingModel.from_svc(svc)
+    model.save(tmp_path / "model.npy")
+    loaded = LinearShamingModel.load(tmp_path / "model.npy")
+    assert loaded.vector_dim == svc.coef_.shape[1]
+    numpy.testing.assert_array_equal(loaded.to_array(), model.to_array())
+
+
+def test_bundle_roundtrip_and_validation(svc, tmp_path):
+    from src.shaming.bundle import ModelBundleError, load_bundle, save_bundle, validate_bundle
+
+    path = tmp_path / "shaming_model.npz"
+    save_bundle(
+        path,
+        LinearShamingModel.from_svc(svc),
+        embedding_model="es_core_news_lg",
+        embedding_version="3.7.0",
+        label_map={0: "no_shaming", 1: "shaming"},
+        metrics={"cv_accuracy": 0.9},
+    )
+    model, metadata = load_bundle(path)
+    assert metadata["vector_dim"] == model.vector_dim == svc.coef_.shape[1]
+    assert metadata["label_map"] == {"0": "no_shaming", "1": "shaming"}
+    assert metadata["metrics"] == {"cv_accuracy": 0.9}
+
+    validate_bundle(metadata, "es_core_news_lg", "3.7.1", 300)
+    with pytest.raises(ModelBundleError):
+        validate_bundle(metadata, "es_core_news_md", "3.7.0", 300)
+    with pytest.raises(ModelBundleError):
+        validate_bundle(metadata, "es_core_news_lg", "3.8.0", 300)
+    with pytest.raises(ModelBundleError):
+        validate_bundle(metadata, "es_core_news_lg", "3.7.0", 96)
+
+
+def test_missing_bundle_is_reported_or_refused(monkeypatch, tmp_path):
+    import src.shaming.shaming as shaming
+    from src.shaming.bundle import ModelBundleError
+
+    monkeypatch.setattr(shaming, "SHAMING_MODEL_PATH", str(tmp_path / "shaming_model.npz"))
+    model, status = shaming.load_classifier()
+    assert status["validated"] is False
+    assert "es_core_news_md" in status["warning"]
+
+    monkeypatch.setattr(shaming, "SHAMING_REQUIRE_BUNDLE", True)
+    with pytest.raises(ModelBundleError):
+        shaming.load_classifier()
+
+
+def test_classifier_with_other_vector_dim_is_refused(svc, monkeypatch, tmp_path):
+    import src.shaming.shaming as shaming
+    from src.shaming.bundle import ModelBundleError, save_bundle
+
+    # Como con SPACY_MODEL=es_core_news_sm (96 dimensiones) y el modelo heredado de 300
+    monkeypatch.setattr(shaming, "SHAMING_MODEL_PATH", str(tmp_path / "shaming_model.npz"))
+    nlp = SimpleNamespace(meta=shaming.NLP.meta, vocab=SimpleNamespace(vectors_length=96))
+    monkeypatch.setattr(shaming, "NLP", nlp)
+    with pytest.raises(ModelBundleError):
+        shaming.load_classifier()
+
+    save_bundle(
+        tmp_path / "shaming_model.npz",
+        LinearShamingModel.from_svc(svc),
+        embedding_model=f"{nlp.meta['lang']}_{nlp.meta['name']}",
+        embedding_version=nlp.meta["version"],
+        label_map={0: "no_shaming", 1: "shaming"},
+    )
+    with pytest.raises(ModelBundleError):
+        shaming.load_classifier()
+
+
+def test_negative_terms_threshold_is_supported_by_the_dataset():
+    import pandas
+    from config import SHAMING_NEGATIVE_TERMS_THRESHOLD
+    from src.analysis.batch import parse_texts
+    from src.shaming.shaming import PIPELINE_ATTRS, contains_negative_terms
+
+    data = pandas.read_csv("src/shaming/shaming_dataset.csv")
+    docs = parse_texts(list(data["text"]), PIPELINE_ATTRS)
+    has_terms = numpy.array([contains_negative_terms(doc[:]) for doc in docs])
+    labels = data["label"].to_numpy()
+    # Razón de verosimilitud del léxico con suavizado de Laplace (ver config.py)
+    with_shaming = (has_terms[labels == 1].sum() + 1) / ((labels == 1).sum() + 2)
+    without_shaming = (has_terms[labels == 0].sum() + 1) / ((labels == 0).sum() + 2)
+    implied_threshold = 1 / (1 + with_shaming / without_shaming)
+    # El umbral configurado nunca es más permisivo de lo que respalda el dataset
+    assert implied_threshold <= SHAMING_NEGATIVE_TERMS_THRESHOLD < 0.5
+
+
+def test_lexicon_rule_applies_to_every_candidate(monkeypatch):
+    import src.shaming.shaming as shaming
+    from src.analysis.batch import parse_text
+
+    doc = parse_text("Prefiero seguir siendo ignorante. No quiero recibir ofertas.", shaming.PIPELINE_ATTRS)
+    lexicon, plain = doc[0:5], doc[5:]
+    monkeypatch.setattr(shaming, "find_shaming_candidates", lambda doc, compiled: [("A", lexicon), ("B", plain)])
+    # Ninguna supera 0.5; la de mayor confianza no tiene términos negativos
+    monkeypatch.setattr(shaming, "classify_spans", lambda spans: (numpy.array([False, False]), numpy.array([0.4, 0.45])))
+    monkeypatch.setattr(shaming, "contains_negative_terms", lambda span, compiled: span is lexicon)
+
+    [result] = shaming.check_shaming_in_docs([doc], compiled=shaming.current_patterns())
+    assert result["pattern"] == "A"
+    assert shaming.has_shaming(result)
@@ -0,0 +1,104 @@
+import json
+import pytest
+from app import app
+from src.analysis.stream import stream_results
+
+
+@pytest.fixture
+def client():
+    with app.test_client() as client:
+        yield client
+
+
+def load_items():
+    with open("ejemplos_urgency.json", encoding="utf-8") as f:
+        return json.load(f)["texts"]
+
+
+def test_stream_matches_analyze(client):
+    items = load_items()
+    expected = client.post("/analyze", json={"version": "1.0", "texts": items}).json["instances"]
+    body = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+    response = client.post("/analyze/stream", data=body.encode("utf-8"), content_type="application/x-ndjson")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.data.decode("utf-8").splitlines()]
+    assert [line["line"] for line in lines] == list(range(len(items)))
+    assert [line["instance"] for line in lines] == expected
+
+
+def test_stream_reports_invalid_lines():
+    lines = ['{"text": "Solo quedan 3 unidades!"}', "", "no es json", '{"id": "x"}', '{"text": "Oferta"}']
+    chunks = list(stream_results("scarcity", lines, batch_size=2))
+    # Un fragmento por lote de dos líneas no vacías
+    assert len(chunks) == 2
+    results = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+    assert [result["line"] for result in results] == [0, 1, 2, 3]
+    assert results[0]["instance"]["has_scarcity"] is True
+    assert "error" in results[1] and "error" in results[2]
+    assert results[3]["instance"] == {"text": "Oferta", "has_scarcity": False}
+
+
+def test_invalid_utf8_line_does_not_cut_the_stream():
+    lines = ['{"text": "Oferta"}'.encode("utf-8"), b'{"text": "\xff\xfe"}', '{"text": "Solo quedan 3 unidades!"}'.encode("utf-8")]
+    results = [json.loads(line) for chunk in stream_results("scarcity", lines) for line in chunk.splitlines()]
+    assert [result["line"] for result in results] == [0, 1, 2]
+    assert "UTF-8" in results[1]["error"]
+    assert results[2]["instance"]["has_scarcity"] is True
+
+
+def test_stream_limits(client, monkeypatch):
+    lines = [f'{{"text": "Texto {i}"}}' for i in range(5)]
+    results = [json.loads(line) for chunk in stream_results("scarcity", lines, max_texts=3) for line in chunk.splitlines()]
+    assert [result["line"] for result in results] == [0, 1, 2, 3]
+    assert "instance" in results[2] and "error" in results[3]
+
+    results = [json.loads(line) for chunk in stream_results("scarcity", lines, max_chars=20) for line in chunk.splitlines()]
+    assert len(results) == 3 and "error" in results[2]
+
+    import app as flask_app
+    monkeypatch.setattr(flask_app, "MAX_REQUEST_BYTES", 10)
+    response = client.post("/scarcity/stream", data=lines[0] + "\n", content_type="application/x-ndjson")
+    assert response.status_code == 413
+
+
+def test_long_line_is_not_buffered():
+    import io
+    from src.analysis.stream import LongLine, read_lines
+
+    class RecordingStream(io.BytesIO):
+        largest = 0
+
+        def readline(self, size=-1):
+            line = super().readline(size)
+            self.largest = max(self.largest, len(line))
+            return line
+
+    # Sin Content-Length: una línea enorme sin salto de línea entre dos válidas
+    body = b'{"text": "Oferta"}\n' + b"x" * 10000 + b'\n{"text": "Solo quedan 3 unidades!"}\n'
+    stream = RecordingStream(body)
+    lines = list(read_lines(stream, max_size=100))
+    assert stream.largest <= 101
+    assert lines[1] == LongLine(10001, 100)
+    results = [json.loads(line) for chunk in stream_results("scarcity", lines) for line in chunk.splitlines()]
+    assert [result["line"] for result in results] == [0, 1, 2]
+    assert "100" in results[1]["error"]
+    assert results[2]["instance"]["has_scarcity"] is True
+
+    stream = RecordingStream(b"x" * 10000)
+    assert list(read_lines(stream, max_size=100, max_bytes=1000)) == [LongLine(1010, 100)]
+
+
+def test_long_line_in_chunked_request(client, monkeypatch):
+    import io
+    from functools import partial
+    import app as flask_app
+    from src.analysis.stream import read_lines
+
+    monkeypatch.setattr(flask_app, "read_lines", partial(read_lines, max_size=100))
+    body = b'{"text": "Oferta"}\n' + b"x" * 5000 + b'\n{"text": "Oferta"}\n'
+    # input_stream sin Content-Length, como un cuerpo chunked
+    response = client.post("/scarcity/stream", input_stream=io.BytesIO(body), content_type="application/x-ndjson")
+    results = [json.loads(line) for line in response.data.decode("utf-8").splitlines()]
+    assert [result["line"] for result in results] == [0, 1, 2]
+    assert "error" in results[1] and "instance" in results[2]